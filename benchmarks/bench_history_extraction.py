@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark history extraction against local fixture pages.
+
+Compares the per-element extraction with the single-script bulk extraction
+for growing row counts and prints one JSON result per measurement. Needs
+Chrome, but no network or Devin account.
+
+Usage:
+    python -m benchmarks.bench_history_extraction [--rows 100 500 1000 2000] [--output results.json]
+"""
+
+import os
+import json
+import time
+import argparse
+import tempfile
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from src.scraper.scraper import DevinCreditScraper
+from benchmarks.fixtures import history_rows, history_page_html
+
+MODES = {
+    "element": DevinCreditScraper.extract_history_rows_by_element,
+    "bulk": DevinCreditScraper.extract_history_rows_bulk,
+}
+
+
+def run(row_counts, layouts, repeats):
+    scraper = DevinCreditScraper()
+    driver = scraper.setup_driver()
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for layout in layouts:
+                for count in row_counts:
+                    rows = history_rows(count)
+                    path = os.path.join(tmp_dir, f"history-{layout}-{count}.html")
+                    with open(path, 'w') as f:
+                        f.write(history_page_html(rows, layout))
+
+                    driver.get(f"file://{path}")
+                    WebDriverWait(driver, 10).until(
+                        lambda d: len(d.find_elements(By.XPATH, "//*[contains(text(), 'Session')]")) > 0
+                    )
+
+                    for mode, extract in MODES.items():
+                        # The per-element fallback only reads divs when the table approach fails
+                        if layout == "divs" and mode == "element":
+                            continue
+                        timings = []
+                        for _ in range(repeats):
+                            start = time.perf_counter()
+                            extracted = extract(scraper, driver)
+                            timings.append(time.perf_counter() - start)
+                        result = {
+                            "benchmark": "history_extraction",
+                            "layout": layout,
+                            "mode": mode,
+                            "rows": count,
+                            "extracted_rows": len(extracted),
+                            "correct": extracted == rows,
+                            "best_seconds": min(timings),
+                            "mean_seconds": sum(timings) / len(timings),
+                        }
+                        print(json.dumps(result))
+                        results.append(result)
+    finally:
+        driver.quit()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history extraction modes.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 500, 1000, 2000])
+    parser.add_argument("--layouts", nargs="+", default=["table", "divs"], choices=["table", "divs"])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="write all results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.layouts, args.repeats)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
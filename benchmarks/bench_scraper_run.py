@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark end-to-end scraper runs against the local Devin stand-in.
+
+Starts ``benchmarks.standin`` on a free port, points the scraper at it and
+times ``DevinCreditScraper.run`` several times in a row for each fetch
+mode: the first run logs in and crawls the whole history, later runs
+reuse the saved session and stop at the stored history. Prints one JSON
+result per run with the per-phase timings. Browser mode needs Chrome;
+``--seed-session`` saves a stand-in session up front, so HTTP mode runs
+without Chrome.
+
+Usage:
+    python -m benchmarks.bench_scraper_run [--modes browser http] [--rows 1000] [--page-size 100]
+                                           [--runs 3] [--seed-session] [--output results.json]
+"""
+
+import os
+import json
+import time
+import argparse
+import tempfile
+from benchmarks.standin import create_standin_app, StandinServer, seed_session
+
+
+def run(modes, rows, page_size, runs, seeded):
+    from src.scraper.scraper import DevinCreditScraper
+    from src.storage.store import open_store
+
+    results = []
+    app = create_standin_app(rows=rows, page_size=page_size)
+    with StandinServer(app) as server:
+        os.environ.update(server.scraper_env())
+        os.environ.setdefault("DEVIN_USERNAME", "bench@example.com")
+        os.environ.setdefault("DEVIN_CONFIRMATION_CODE", "000000")
+        for mode in modes:
+            os.environ["SCRAPER_FETCH_MODE"] = mode
+            with tempfile.TemporaryDirectory() as data_dir:
+                for index in range(runs):
+                    scraper = DevinCreditScraper(data_dir=data_dir)
+                    if seeded and index == 0:
+                        seed_session(scraper, server.server.host)
+                    start = time.perf_counter()
+                    success = scraper.run()
+                    elapsed = time.perf_counter() - start
+                    latest = open_store(data_dir).latest() or {}
+                    result = {
+                        "benchmark": "scraper_run",
+                        "mode": mode,
+                        "run": index + 1,
+                        "rows": rows,
+                        "page_size": page_size,
+                        "success": success,
+                        "stored_rows": len(latest.get("usage_history") or []),
+                        "seconds": round(elapsed, 3),
+                        "timings": scraper.last_timings,
+                    }
+                    print(json.dumps(result))
+                    results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scraper runs against the local stand-in")
+    parser.add_argument("--modes", nargs="+", default=["browser", "http"], choices=["browser", "http"])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=3, help="consecutive runs per mode")
+    parser.add_argument("--seed-session", action="store_true", help="start with a saved session instead of logging in")
+    parser.add_argument("--output", help="write all results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.modes, args.rows, args.page_size, args.runs, args.seed_session)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark the data loading functions and the API endpoints of the web app.
+
+Measures ``load_credit_data`` and ``process_credit_data`` and the latency
+of each endpoint through the Flask test client, both cold (caches cleared,
+so the data is read from disk) and warm, plus the peak Python memory
+allocated by a cold call (tracemalloc). Runs against a data directory made
+by ``benchmarks.generate_data``, or generates one. Prints one JSON result
+per measurement.
+
+Usage:
+    python -m benchmarks.bench_web [--data DATA_DIR | --snapshots 1000 --rows 500 --format jsonl]
+                                   [--repeats 5] [--output results.json]
+"""
+
+import os
+import gc
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+import tracemalloc
+from benchmarks.generate_data import generate
+
+ENDPOINTS = [
+    "/",
+    "/api/credit-data",
+    "/api/latest-credit-data",
+    "/api/usage-history",
+    "/api/bootstrap",
+    "/api/history",
+    "/api/history?min_acus=25&limit=500",
+    "/api/snapshots",
+    "/api/chart/usage",
+    "/api/chart/usage?points=5000",
+    "/api/rollups/usage?period=day",
+    "/api/rollups/usage?period=month",
+    "/api/rollups/sessions",
+    "/api/rollups/available-acus",
+    "/api/export/snapshots.csv",
+    "/api/export/sessions.csv",
+    "/api/export/sessions.ndjson",
+    "/api/export/sessions.parquet",
+]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def clear_caches(web):
+    for cache in list(web.response_caches.values()) + [web.combined_cache]:
+        cache.clear()
+    gc.collect()
+
+
+def measure(call, clear, repeats):
+    """Time ``call`` cold and warm, and trace the peak memory of a cold call."""
+    clear()
+    start = time.perf_counter()
+    result = call()
+    cold = time.perf_counter() - start
+
+    clear()
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    call()
+    warm = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        warm.append(time.perf_counter() - start)
+    warm.sort()
+    return result, {
+        "cold_seconds": round(cold, 6),
+        "warm_median_seconds": round(statistics.median(warm), 6),
+        "warm_p95_seconds": round(warm[min(len(warm) - 1, int(len(warm) * 0.95))], 6),
+        "peak_bytes": peak,
+    }
+
+
+def run(data_dir, repeats):
+    # The app reads ./data, so it is imported from the repository and then pointed at data_dir
+    from src.web import app as web
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.symlink(os.path.abspath(data_dir), os.path.join(work_dir, "data"))
+        cwd = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            client = web.app.test_client()
+            clear = lambda: clear_caches(web)
+
+            def emit(result):
+                print(json.dumps(result))
+                results.append(result)
+
+            data, timings = measure(web.load_credit_data, clear, repeats)
+            emit({"benchmark": "load_credit_data", "snapshots": len(data), **timings})
+
+            start = time.perf_counter()
+            tracemalloc.start()
+            processed = web.process_credit_data(data)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            emit({
+                "benchmark": "process_credit_data",
+                "snapshots": len(processed),
+                "seconds": round(time.perf_counter() - start, 6),
+                "peak_bytes": peak,
+            })
+            del data, processed
+
+            for endpoint in ENDPOINTS:
+                response, timings = measure(lambda: client.get(endpoint), clear, repeats)
+                emit({
+                    "benchmark": "endpoint",
+                    "endpoint": endpoint,
+                    "status": response.status_code,
+                    "bytes": len(response.get_data()),
+                    **timings,
+                })
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the web app against a synthetic data set")
+    parser.add_argument("--data", help="data directory made by benchmarks.generate_data (default: generate one)")
+    parser.add_argument("--snapshots", type=int, default=1000)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--format", choices=["legacy", "jsonl", "sqlite"], default="jsonl")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="write all results, with the run parameters, to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.data:
+            data_dir = args.data
+            dataset = {"data_dir": data_dir}
+        else:
+            data_dir = os.path.join(tmp_dir, "data")
+            dataset = generate(data_dir, args.snapshots, args.rows, data_format=args.format)
+        if os.path.exists(os.path.join(data_dir, "credit_data.db")):
+            os.environ["STORAGE_BACKEND"] = "sqlite"
+
+        results = run(data_dir, args.repeats)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "dataset": dataset,
+                "repeats": args.repeats,
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Regression benchmark for web worker boot: import time, memory and imported modules.
+
+Each sample imports ``src.web.app`` in a fresh interpreter and reports the
+import time, the peak RSS after importing and after the first dashboard
+request, and whether any module of the scraper tier (Selenium,
+webdriver-manager, ``src.scraper``) was loaded. Prints one JSON result and
+exits non-zero if the scraper tier was imported or a limit is exceeded.
+
+Usage:
+    python -m benchmarks.bench_web_boot [--samples 5] [--max-import-seconds 1.0] [--max-rss-mb 150]
+                                        [--output results.json]
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that only the scrape-job path and the scheduler may load
+SCRAPER_TIER = ("selenium", "webdriver_manager", "src.scraper")
+
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+import src.web.app as web
+import_seconds = time.perf_counter() - start
+import_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+modules = sorted(sys.modules)
+start = time.perf_counter()
+status = web.app.test_client().get("/").status_code
+print(json.dumps({
+    "import_seconds": import_seconds,
+    "import_rss_kb": import_rss,
+    "first_request_seconds": time.perf_counter() - start,
+    "first_request_status": status,
+    "first_request_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": modules,
+}))
+"""
+
+
+def sample():
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=REPO_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(samples):
+    results = [sample() for _ in range(samples)]
+    modules = results[0]["modules"]
+    scraper_modules = [m for m in modules if any(m == tier or m.startswith(tier + ".") for tier in SCRAPER_TIER)]
+    median = lambda key: statistics.median(result[key] for result in results)
+    return {
+        "benchmark": "web_boot",
+        "samples": samples,
+        "import_seconds": round(median("import_seconds"), 4),
+        "import_rss_mb": round(median("import_rss_kb") / 1024, 1),
+        "first_request_seconds": round(median("first_request_seconds"), 4),
+        "first_request_status": results[0]["first_request_status"],
+        "first_request_rss_mb": round(median("first_request_rss_kb") / 1024, 1),
+        "modules": len(modules),
+        "scraper_modules": scraper_modules,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure web worker boot time and memory")
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--max-import-seconds", type=float, help="fail if the median import time is higher")
+    parser.add_argument("--max-rss-mb", type=float, help="fail if the median RSS after the first request is higher")
+    parser.add_argument("--output", help="write the result to this JSON file")
+    args = parser.parse_args()
+
+    result = run(args.samples)
+    problems = []
+    if result["scraper_modules"]:
+        problems.append("the web app imports the scraper tier")
+    if args.max_import_seconds and result["import_seconds"] > args.max_import_seconds:
+        problems.append(f"import takes more than {args.max_import_seconds}s")
+    if args.max_rss_mb and result["first_request_rss_mb"] > args.max_rss_mb:
+        problems.append(f"RSS exceeds {args.max_rss_mb} MB")
+    result["problems"] = problems
+
+    print(json.dumps(result))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Synthetic credit data and fixture pages that mimic the Devin usage pages.
+"""
+
+import html
+import random
+from datetime import datetime, timedelta
+
+SNAPSHOT_START = datetime(2025, 1, 1)
+
+
+def history_rows(count):
+    """Return ``count`` synthetic history rows, newest first."""
+    return [
+        {
+            "session_name": f"Session {count - i}",
+            "created_at": f"2025-01-{1 + (count - i) % 28:02d} {(count - i) % 24:02d}:00",
+            "acus_used": f"{(count - i) % 50 + 0.5:.1f}"
+        }
+        for i in range(count)
+    ]
+
+
+def synthetic_snapshots(snapshots, rows, new_rows=1, interval_minutes=60, seed=0):
+    """
+    Yield ``snapshots`` raw snapshots, oldest first, as the scraper saved them before normalization.
+
+    Each snapshot shows the newest ``rows`` sessions, newest first; between
+    two snapshots ``new_rows`` sessions start and the oldest ones drop out
+    of the window. The newest session is still running, so its ACUs grow
+    in the next snapshot. Values depend only on ``seed``.
+    """
+    rng = random.Random(seed)
+    session_minutes = interval_minutes / new_rows
+    acus = {}
+
+    def acus_used(k):
+        if k not in acus:
+            acus[k] = round(rng.uniform(0.5, 50), 1)
+        return acus[k]
+
+    available = 100000.0
+    for i in range(snapshots):
+        taken_at = SNAPSHOT_START + timedelta(minutes=i * interval_minutes)
+        newest = rows + i * new_rows - 1
+        history = []
+        for k in range(newest, max(newest - rows, -1), -1):
+            used = acus_used(k) if k != newest else round(acus_used(k) / 2, 1)
+            created_at = SNAPSHOT_START + timedelta(minutes=(k - rows + 1) * session_minutes)
+            history.append({
+                "session_name": f"Session {k}",
+                "created_at": created_at.strftime("%Y-%m-%d %H:%M"),
+                "acus_used": f"{used:.1f}"
+            })
+        available = max(available - sum(acus_used(k) for k in range(newest - new_rows + 1, newest + 1)), 0)
+        yield {
+            "timestamp": taken_at.isoformat(),
+            "current_usage": {"timestamp": taken_at.isoformat(), "available_acus": f"{available:,.0f}"},
+            "usage_history": history
+        }
+
+
+def history_page_html(rows, layout="table", next_url=None):
+    """Render a history page with a ``table`` or a ``divs`` layout, linking to ``next_url`` if given."""
+    if layout == "table":
+        body_rows = "\n".join(
+            "<tr><td>{}</td><td>{}</td><td>{}</td></tr>".format(
+                html.escape(row["session_name"]), html.escape(row["created_at"]), html.escape(row["acus_used"])
+            )
+            for row in rows
+        )
+        content = (
+            "<table><thead><tr><th>Session</th><th>Created At</th><th>ACUs Used</th></tr></thead>"
+            f"<tbody>\n{body_rows}\n</tbody></table>"
+        )
+    else:
+        content = "\n".join(
+            '<div class="list-item"><div>Session: {}</div><div>Created At: {}</div><div>ACUs Used: {}</div></div>'.format(
+                html.escape(row["session_name"]), html.escape(row["created_at"]), html.escape(row["acus_used"])
+            )
+            for row in rows
+        )
+    if next_url:
+        content += f'<a rel="next" href="{html.escape(next_url)}">Next</a>'
+    return f"<!DOCTYPE html><html><head><title>Usage history</title></head><body>{content}</body></html>"
+
+
+def usage_page_html(available_acus):
+    """Render a usage page showing ``available_acus``."""
+    return (
+        "<!DOCTYPE html><html><head><title>Usage</title></head><body>"
+        f"<div><span>Available ACUs</span><span>{html.escape(available_acus)}</span></div>"
+        "</body></html>"
+    )
+
+
+def login_page_html(step):
+    """Render the ``email`` or the ``code`` step of the login form."""
+    if step == "email":
+        field = '<input id="email" name="email" type="email">'
+    else:
+        field = '<input id="code" name="code" placeholder="Enter code">'
+    return (
+        "<!DOCTYPE html><html><head><title>Log in</title></head><body>"
+        f'<form method="post">{field}<button type="submit">Continue</button></form>'
+        "</body></html>"
+    )
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic credit data at a configurable scale.
+
+Writes a legacy ``credit_data.json`` (the raw, unnormalized format the
+scraper used to write) or fills a segmented or SQLite store the way the
+scraper does, with rollups. The data is deterministic for a given
+``--seed``, so benchmark results of different versions can be compared.
+
+Usage:
+    python -m benchmarks.generate_data DATA_DIR [--snapshots 10000] [--rows 5000] [--new-rows 1]
+                                       [--format legacy|jsonl|sqlite] [--seed 0]
+"""
+
+import os
+import json
+import time
+import argparse
+from benchmarks.fixtures import synthetic_snapshots
+
+# Snapshots committed together when filling a store
+BATCH_SIZE = 100
+
+
+def write_legacy(path, snapshots):
+    """Stream ``snapshots`` into a legacy JSON array file; returns the number written."""
+    count = 0
+    with open(path, 'w') as f:
+        f.write("[")
+        for snapshot in snapshots:
+            if count:
+                f.write(",\n")
+            json.dump(snapshot, f)
+            count += 1
+        f.write("]\n")
+    return count
+
+
+def fill_store(data_dir, backend, snapshots):
+    """Append ``snapshots`` to a new store in ``data_dir`` and build its rollups; returns the number written."""
+    os.environ["STORAGE_BACKEND"] = backend
+    from src.storage.store import open_store
+    from src.storage.normalize import normalize_snapshot
+    from src.storage.rollups import Rollups
+
+    store = open_store(data_dir)
+    if store.version() is not None:
+        raise SystemExit(f"{data_dir} already holds snapshots")
+
+    count = 0
+    batch = []
+    for snapshot in snapshots:
+        batch.append(normalize_snapshot(snapshot))
+        if len(batch) == BATCH_SIZE:
+            store.append_many(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        store.append_many(batch)
+        count += len(batch)
+
+    rollups = Rollups(store.data_dir)
+    rollups.save(rollups.rebuild(store))
+    return count
+
+
+def generate(data_dir, snapshots, rows, new_rows=1, data_format="legacy", seed=0):
+    """Generate the data set and return a summary of it."""
+    os.makedirs(data_dir, exist_ok=True)
+    source = synthetic_snapshots(snapshots, rows, new_rows=new_rows, seed=seed)
+
+    start = time.perf_counter()
+    if data_format == "legacy":
+        path = os.path.join(data_dir, "credit_data.json")
+        count = write_legacy(path, source)
+    else:
+        count = fill_store(data_dir, data_format, source)
+
+    size = 0
+    for root, _, files in os.walk(data_dir):
+        size += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+
+    return {
+        "data_dir": data_dir,
+        "format": data_format,
+        "snapshots": count,
+        "rows_per_snapshot": rows,
+        "new_rows_per_snapshot": new_rows,
+        "seed": seed,
+        "bytes": size,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic credit data")
+    parser.add_argument("data_dir")
+    parser.add_argument("--snapshots", type=int, default=1000)
+    parser.add_argument("--rows", type=int, default=500, help="history rows per snapshot")
+    parser.add_argument("--new-rows", type=int, default=1, help="new sessions between two snapshots")
+    parser.add_argument("--format", choices=["legacy", "jsonl", "sqlite"], default="legacy")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps(generate(args.data_dir, args.snapshots, args.rows, args.new_rows, args.format, args.seed)))
+
+
+if __name__ == "__main__":
+    main()
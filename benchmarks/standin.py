@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Devin web app.
+
+Serves a two-step login form, the usage page and the paginated usage
+history page that the scraper reads in browser mode, and the JSON usage
+and usage-history endpoints used by its HTTP fetch mode, so scraper runs
+can be exercised and timed without network access or a Devin account.
+Any email and confirmation code are accepted.
+
+Usage:
+    python -m benchmarks.standin [--port 5055] [--rows 1000] [--page-size 100]
+"""
+
+import os
+import json
+import argparse
+import threading
+from flask import Flask, jsonify, request, redirect, url_for
+from werkzeug.serving import make_server
+from benchmarks.fixtures import history_rows, history_page_html, usage_page_html, login_page_html
+
+SESSION_COOKIE = "devin_session"
+SESSION_VALUE = "standin-session"
+
+
+def create_standin_app(rows=1000, page_size=100, available_acus="12,345"):
+    """Create the stand-in Flask app serving ``rows`` synthetic history rows."""
+    app = Flask(__name__)
+    app.config["rows"] = history_rows(rows)
+
+    def authenticated():
+        return request.cookies.get(SESSION_COOKIE) == SESSION_VALUE
+
+    @app.route('/')
+    def home():
+        return redirect(url_for('usage_page'))
+
+    @app.route('/login', methods=['GET', 'POST'])
+    def login():
+        if request.method == 'GET':
+            return login_page_html("email")
+        if "code" not in request.form:
+            return login_page_html("code")
+        response = redirect(url_for('usage_page'))
+        response.set_cookie(SESSION_COOKIE, SESSION_VALUE)
+        return response
+
+    @app.route('/settings/usage')
+    def usage_page():
+        if not authenticated():
+            return redirect(url_for('login'))
+        if request.args.get("tab") != "history":
+            return usage_page_html(available_acus)
+        page = int(request.args.get("page", "1"))
+        start = (page - 1) * page_size
+        rows = app.config["rows"]
+        next_url = None
+        if start + page_size < len(rows):
+            next_url = url_for('usage_page', tab="history", page=page + 1)
+        return history_page_html(rows[start:start + page_size], next_url=next_url)
+
+    @app.route('/api/usage')
+    def usage_api():
+        if not authenticated():
+            return jsonify({"error": "unauthorized"}), 401
+        return jsonify({"available_acus": available_acus})
+
+    @app.route('/api/usage/history')
+    def usage_history_api():
+        if not authenticated():
+            return jsonify({"error": "unauthorized"}), 401
+        start = int(request.args.get("cursor", "0"))
+        items = app.config["rows"][start:start + page_size]
+        next_cursor = start + page_size if start + page_size < len(app.config["rows"]) else None
+        return jsonify({"items": items, "next_cursor": next_cursor})
+
+    return app
+
+
+def standin_session(host, value=SESSION_VALUE):
+    """Return a login session for the stand-in in the format BrowserSessionStore saves."""
+    return {
+        "saved_at": None,
+        "url": None,
+        "cookies": [{"name": SESSION_COOKIE, "value": value, "domain": host, "path": "/"}],
+        "local_storage": {},
+    }
+
+
+def seed_session(scraper, host, value=SESSION_VALUE):
+    """Save a stand-in login session where the scraper looks for one; another ``value`` is rejected."""
+    os.makedirs(os.path.dirname(scraper.session_store.path), exist_ok=True)
+    with open(scraper.session_store.path, 'w') as f:
+        json.dump(standin_session(host, value), f)
+
+
+class StandinServer:
+    """Run a stand-in app on a background thread; usable as a context manager."""
+
+    def __init__(self, app, host="127.0.0.1", port=0):
+        self.server = make_server(host, port, app, threaded=True)
+        self.url = f"http://{host}:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.thread.join()
+
+    def scraper_env(self):
+        """Return the environment variables that point the scraper at this stand-in."""
+        return {
+            "DEVIN_LOGIN_URL": f"{self.url}/login",
+            "DEVIN_USAGE_URL": f"{self.url}/settings/usage",
+            "DEVIN_HISTORY_URL": f"{self.url}/settings/usage?tab=history",
+            "DEVIN_USAGE_API_URL": f"{self.url}/api/usage",
+            "DEVIN_HISTORY_API_URL": f"{self.url}/api/usage/history",
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Devin web app.")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    app = create_standin_app(rows=args.rows, page_size=args.page_size)
+    app.run(host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test of the snapshot store.
+
+Several writer processes save snapshots into one data directory through
+the scraper's ``save_data``, as the scheduler and web containers do, while
+reader processes keep loading it. Afterwards every snapshot must be present
+with exactly the history it was written with, the rollups must match a full
+rebuild, and no reader may have failed or seen a partial snapshot. Prints
+one JSON result.
+
+Usage:
+    python -m benchmarks.stress_storage [--backend jsonl|sqlite] [--writers 4] [--readers 4] [--snapshots 50]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import multiprocessing
+from src.storage.normalize import normalize_snapshot
+from src.storage.rollups import Rollups
+from src.storage.store import open_store
+
+
+def make_snapshot(writer, index):
+    """Return snapshot ``index`` of ``writer``: its history grows by one session per snapshot."""
+    usage_history = [
+        {
+            "session_name": f"Writer {writer} session {i}",
+            "created_at": f"2025-01-{1 + i % 28:02d} {writer % 24:02d}:{i % 60:02d}",
+            "acus_used": f"{i % 50 + 0.5:.1f}"
+        }
+        for i in range(index, -1, -1)
+    ]
+    return {
+        "timestamp": f"2025-02-01T{writer % 24:02d}:{index // 60 % 60:02d}:{index % 60:02d}",
+        "current_usage": {"available_acus": f"{1000 * writer + index}", "writer": writer, "index": index},
+        "usage_history": usage_history,
+    }
+
+
+def write(data_dir, writer, snapshots):
+    from src.scraper.scraper import DevinCreditScraper
+
+    logging.getLogger().setLevel(logging.WARNING)
+    scraper = DevinCreditScraper(data_dir=data_dir)
+    failures = 0
+    for index in range(snapshots):
+        if not scraper.save_data(normalize_snapshot(make_snapshot(writer, index))):
+            failures += 1
+    return failures
+
+
+def read(data_dir, stop, results):
+    reads = errors = partial = 0
+    while not stop.is_set():
+        try:
+            store = open_store(data_dir)
+            snapshots = store.load_all()
+            latest = store.latest()
+            store.version()
+            for snapshot in snapshots[-5:] + ([latest] if latest else []):
+                usage = snapshot.get("current_usage") or {}
+                if len(snapshot.get("usage_history") or []) != usage.get("index", -1) + 1:
+                    partial += 1
+            reads += 1
+        except Exception:
+            errors += 1
+    results.put({"reads": reads, "errors": errors, "partial": partial})
+
+
+def verify(data_dir, writers, snapshots):
+    """Return the problems found in the store written by ``writers``."""
+    store = open_store(data_dir)
+    problems = []
+    stored = store.load_all()
+    if len(stored) != writers * snapshots:
+        problems.append(f"expected {writers * snapshots} snapshots, found {len(stored)}")
+
+    seen = set()
+    for snapshot in stored:
+        usage = snapshot["current_usage"]
+        marker = (usage["writer"], usage["index"])
+        if marker in seen:
+            problems.append(f"duplicate snapshot {marker}")
+        seen.add(marker)
+        expected = normalize_snapshot(make_snapshot(*marker))["usage_history"]
+        if snapshot["usage_history"] != expected:
+            problems.append(f"snapshot {marker} has the wrong history")
+
+    rollups = Rollups(store.data_dir)
+    saved = rollups.load()
+    rebuilt = rollups.rebuild(store)
+    if saved != rebuilt:
+        problems.append("rollups do not match a full rebuild")
+    return problems
+
+
+def run(backend, writers, readers, snapshots):
+    os.environ["STORAGE_BACKEND"] = backend
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as data_dir:
+        stop = context.Event()
+        results = context.Queue()
+        reader_processes = [
+            context.Process(target=read, args=(data_dir, stop, results)) for _ in range(readers)
+        ]
+        for process in reader_processes:
+            process.start()
+
+        start = time.perf_counter()
+        with context.Pool(writers) as pool:
+            failures = sum(pool.starmap(write, [(data_dir, writer, snapshots) for writer in range(writers)]))
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        reader_results = [results.get() for _ in reader_processes]
+        for process in reader_processes:
+            process.join()
+
+        problems = verify(data_dir, writers, snapshots)
+        if failures:
+            problems.append(f"{failures} writes failed")
+        read_errors = sum(result["errors"] for result in reader_results)
+        partial = sum(result["partial"] for result in reader_results)
+        if read_errors:
+            problems.append(f"{read_errors} reads failed")
+        if partial:
+            problems.append(f"{partial} partial snapshots read")
+
+        return {
+            "backend": backend,
+            "writers": writers,
+            "readers": readers,
+            "snapshots": writers * snapshots,
+            "write_seconds": round(elapsed, 3),
+            "writes_per_second": round(writers * snapshots / elapsed, 1),
+            "reads": sum(result["reads"] for result in reader_results),
+            "problems": problems,
+            "ok": not problems,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress concurrent writers and readers of the snapshot store")
+    parser.add_argument("--backend", choices=["jsonl", "sqlite"], default="jsonl")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--snapshots", type=int, default=50, help="snapshots per writer")
+    args = parser.parse_args()
+
+    result = run(args.backend, args.writers, args.readers, args.snapshots)
+    print(json.dumps(result))
+    sys.exit(0 if result["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
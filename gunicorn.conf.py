@@ -0,0 +1,67 @@
+"""
+Gunicorn configuration for serving the dashboard and API in production.
+
+Run from the repository root (gunicorn picks this file up from there):
+
+    gunicorn src.web.app:app
+
+Every setting can be overridden from the environment, see .env.example.
+"""
+
+import os
+import signal
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Threaded workers: each open Server-Sent Events stream holds one thread,
+# so a worker needs more threads than it has concurrent dashboard clients
+worker_class = "gthread"
+workers = int(os.getenv("WEB_WORKERS", "2"))
+threads = int(os.getenv("WEB_THREADS", "32"))
+
+# Import the app and build the first page's responses once, before forking
+preload_app = True
+
+timeout = int(os.getenv("WEB_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("WEB_KEEPALIVE", "5"))
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv("WEB_ACCESS_LOG", "-") or None
+errorlog = "-"
+
+
+def when_ready(server):
+    from src.web.app import warm_caches
+
+    try:
+        warm_caches()
+    except Exception as e:
+        server.log.warning(f"Could not warm the response caches: {str(e)}")
+
+
+def post_worker_init(worker):
+    from src.web.app import scrape_jobs
+
+    # A worker that was killed cannot mark its scrape job failed itself
+    scrape_jobs.recover()
+
+    # On a graceful stop, end the event streams first: they would otherwise
+    # keep the worker busy until graceful_timeout
+    handle_exit = worker.handle_exit
+
+    def close_streams_and_exit(sig, frame):
+        from src.web.app import change_watcher
+
+        change_watcher.close()
+        handle_exit(sig, frame)
+
+    signal.signal(signal.SIGTERM, close_streams_and_exit)
+
+
+def worker_exit(server, worker):
+    from src.web.app import scrape_jobs
+
+    # Job threads do not outlive the worker; do not leave their job "running"
+    scrape_jobs.interrupt()
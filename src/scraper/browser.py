@@ -0,0 +1,195 @@
+"""
+Browser helpers for the scraper: chromedriver resolution, persisted login
+sessions and a warm WebDriver kept between scheduled runs.
+"""
+
+import os
+import json
+import logging
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+from src.storage.segments import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+BROWSER_DIR = os.path.join("data", "browser")
+COOKIE_FIELDS = ("name", "value", "path", "domain", "secure", "httpOnly", "expiry", "sameSite")
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+
+def resolve_chromedriver_path(cache_file=os.path.join(BROWSER_DIR, "chromedriver_path")):
+    """
+    Return the chromedriver executable path, resolving it only once.
+
+    CHROMEDRIVER_PATH wins if set. Otherwise the path found by
+    ChromeDriverManager is remembered in memory and in ``cache_file``, so
+    later runs (and later processes) skip its network lookup as long as the
+    binary is still there.
+    """
+    global _chromedriver_path
+
+    configured = os.getenv("CHROMEDRIVER_PATH")
+    if configured:
+        return configured
+
+    with _chromedriver_lock:
+        if _chromedriver_path and os.path.exists(_chromedriver_path):
+            return _chromedriver_path
+
+        try:
+            with open(cache_file, 'r') as f:
+                cached = f.read().strip()
+            if cached and os.path.exists(cached):
+                _chromedriver_path = cached
+                return cached
+        except FileNotFoundError:
+            pass
+
+        from webdriver_manager.chrome import ChromeDriverManager
+        _chromedriver_path = ChromeDriverManager().install()
+        logger.info(f"Resolved chromedriver at {_chromedriver_path}")
+
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(cache_file, 'w') as f:
+            f.write(_chromedriver_path)
+        return _chromedriver_path
+
+
+class BrowserSessionStore:
+    """
+    Persist an authenticated browser session (cookies and localStorage) to disk.
+
+    The file holds live authentication cookies, so it is written with
+    owner-only permissions.
+    """
+
+    def __init__(self, path=os.path.join(BROWSER_DIR, "session.json")):
+        self.path = path
+
+    @staticmethod
+    def capture(driver):
+        """Return the current session of ``driver`` (cookies and localStorage)."""
+        local_storage = driver.execute_script("return Object.assign({}, window.localStorage);")
+        return {
+            "saved_at": datetime.now().isoformat(),
+            "url": driver.current_url,
+            "cookies": driver.get_cookies(),
+            "local_storage": local_storage or {},
+        }
+
+    def save(self, driver):
+        """Save the current session of ``driver``."""
+        try:
+            session_data = self.capture(driver)
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            write_json_atomic(self.path, session_data)
+            os.chmod(self.path, 0o600)
+            logger.info("Browser session saved")
+        except Exception as e:
+            logger.warning(f"Could not save browser session: {str(e)}")
+
+    def load(self):
+        """Return the saved session, or None."""
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def clear(self):
+        """Forget the saved session."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def restore(self, driver, url):
+        """
+        Load the saved cookies and localStorage into ``driver``.
+
+        ``url`` is any page on the target site; the browser has to be on its
+        origin before cookies and localStorage can be set. Returns False when
+        there is nothing to restore.
+        """
+        session_data = self.load()
+        if not session_data:
+            return False
+
+        parsed = urlparse(url)
+        driver.get(f"{parsed.scheme}://{parsed.netloc}/")
+        driver.delete_all_cookies()
+        for cookie in session_data.get("cookies", []):
+            try:
+                driver.add_cookie({key: cookie[key] for key in COOKIE_FIELDS if key in cookie})
+            except Exception as e:
+                logger.debug(f"Skipping cookie {cookie.get('name')}: {str(e)}")
+        driver.execute_script(
+            "for (const [key, value] of Object.entries(arguments[0])) { window.localStorage.setItem(key, value); }",
+            session_data.get("local_storage", {})
+        )
+        logger.info(f"Restored browser session saved at {session_data.get('saved_at')}")
+        return True
+
+
+class WarmDriverPool:
+    """
+    Keep one WebDriver alive between scrapes in a long-running process.
+
+    ``create`` builds a new driver. A driver is recycled after ``max_uses``
+    scrapes, or as soon as it stops responding or a run reports it unhealthy.
+    """
+
+    def __init__(self, create, max_uses=20):
+        self.create = create
+        self.max_uses = max_uses
+        self._lock = threading.Lock()
+        self._driver = None
+        self._uses = 0
+
+    @staticmethod
+    def _is_alive(driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """Return the warm driver, starting a new one if needed. Holds the pool until release."""
+        self._lock.acquire()
+        try:
+            if self._driver is not None and (self._uses >= self.max_uses or not self._is_alive(self._driver)):
+                self._quit()
+            if self._driver is None:
+                logger.info("Starting warm WebDriver")
+                self._driver = self.create()
+                self._uses = 0
+            self._uses += 1
+            return self._driver
+        except Exception:
+            self._lock.release()
+            raise
+
+    def release(self, driver, healthy=True):
+        """Return the driver to the pool; an unhealthy driver is shut down."""
+        try:
+            if not healthy and driver is self._driver:
+                self._quit()
+        finally:
+            self._lock.release()
+
+    def _quit(self):
+        try:
+            self._driver.quit()
+        except Exception:
+            pass
+        self._driver = None
+
+    def close(self):
+        """Shut down the warm driver."""
+        with self._lock:
+            if self._driver is not None:
+                self._quit()
@@ -0,0 +1,121 @@
+"""
+Adaptive scrape interval for the scheduler.
+
+The next scrape is planned from the outcome of the last one and from the
+stored available-ACUs trend: credits that drain fast or run low are
+checked more often, and failed runs are retried with exponential backoff.
+"""
+
+import os
+import random
+from datetime import datetime, timezone, timedelta
+
+
+def _parse_time(value):
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def burn_rate(trend, now=None, window_hours=24):
+    """
+    Return the ACUs used per hour over the last ``window_hours``.
+
+    ``trend`` is a list of ``{"timestamp", "available_acus"}`` points,
+    oldest first (see ``available_acus_trend``). Only decreases count, so a
+    top-up does not hide what was used before or after it. The window is
+    measured up to ``now``, so a balance that has not changed since the
+    last point lowers the rate. Returns None without any usable point.
+    """
+    now = now or datetime.now(timezone.utc)
+    points = [
+        (time, point["available_acus"])
+        for time, point in ((_parse_time(point.get("timestamp")), point) for point in trend)
+        if time is not None and isinstance(point.get("available_acus"), (int, float))
+    ]
+    if not points:
+        return None
+
+    since = now - timedelta(hours=window_hours)
+    # Start at the last point before the window, so the first change inside it counts
+    start = 0
+    for i, (time, _) in enumerate(points):
+        if time <= since:
+            start = i
+    points = points[start:]
+
+    used = sum(max(previous - current, 0) for (_, previous), (_, current) in zip(points, points[1:]))
+    hours = max((now - points[0][0]).total_seconds() / 3600, 1 / 60)
+    return used / hours
+
+
+class ScrapeCadence:
+    """
+    Plan the delay until the next scheduled scrape.
+
+    After a successful run the delay is ``interval_hours``, or
+    ``fast_interval_hours`` while any account burns at least
+    ``fast_burn_rate`` ACUs per hour or has ``low_balance`` ACUs or fewer
+    left (0 disables either threshold). After a failed run the delay starts
+    at ``retry_minutes`` and doubles with every consecutive failure, up to
+    the regular interval. Each backoff delay is shortened by a random
+    fraction of up to ``jitter``, so schedulers that failed together do not
+    retry in lockstep.
+    """
+
+    def __init__(self, interval_hours=24, fast_interval_hours=1, fast_burn_rate=0, low_balance=0,
+                 burn_window_hours=24, retry_minutes=5, jitter=0.5, rng=None):
+        self.interval = interval_hours * 3600
+        self.fast_interval = min(fast_interval_hours * 3600, self.interval)
+        self.fast_burn_rate = fast_burn_rate
+        self.low_balance = low_balance
+        self.burn_window_hours = burn_window_hours
+        self.retry = retry_minutes * 60
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.failures = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            interval_hours=float(os.getenv("SCRAPE_INTERVAL_HOURS", "24")),
+            fast_interval_hours=float(os.getenv("SCRAPE_FAST_INTERVAL_HOURS", "1")),
+            fast_burn_rate=float(os.getenv("SCRAPE_FAST_BURN_ACUS_PER_HOUR", "0")),
+            low_balance=float(os.getenv("SCRAPE_LOW_BALANCE_ACUS", "0")),
+            burn_window_hours=float(os.getenv("SCRAPE_BURN_WINDOW_HOURS", "24")),
+            retry_minutes=float(os.getenv("SCRAPE_RETRY_MINUTES", "5")),
+            jitter=float(os.getenv("SCRAPE_RETRY_JITTER", "0.5")),
+        )
+
+    def _speed_up_reason(self, trends, now):
+        for name, trend in trends.items():
+            if self.low_balance and trend:
+                balance = trend[-1].get("available_acus")
+                if isinstance(balance, (int, float)) and balance <= self.low_balance:
+                    return f"{name}: {balance:g} ACUs left"
+            if self.fast_burn_rate:
+                rate = burn_rate(trend, now=now, window_hours=self.burn_window_hours)
+                if rate is not None and rate >= self.fast_burn_rate:
+                    return f"{name}: burning {rate:.1f} ACUs/hour"
+        return None
+
+    def next_delay(self, success, trends=None, now=None):
+        """
+        Return the seconds until the next scrape and the reason, given the outcome of the last one.
+
+        ``trends`` maps a name (e.g. the organization) to its available-ACUs
+        trend; it is only consulted after a successful run.
+        """
+        if not success:
+            self.failures += 1
+            delay = min(self.retry * 2 ** (self.failures - 1), self.interval)
+            delay *= 1 - self.rng.uniform(0, self.jitter)
+            return delay, f"retry after {self.failures} failed run(s)"
+
+        self.failures = 0
+        reason = self._speed_up_reason(trends or {}, now or datetime.now(timezone.utc))
+        if reason:
+            return self.fast_interval, reason
+        return self.interval, "regular interval"
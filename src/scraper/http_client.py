@@ -0,0 +1,147 @@
+"""
+HTTP client for the JSON endpoints behind the Devin usage pages.
+
+Used by the scraper's ``http`` fetch mode: Chrome is only started to log
+in, and the usage data is then fetched directly with the session cookies.
+"""
+
+import logging
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from src.storage.normalize import history_key
+
+logger = logging.getLogger(__name__)
+
+AVAILABLE_ACUS_KEYS = ("available_acus", "availableAcus", "available", "acus_available", "balance")
+HISTORY_LIST_KEYS = ("sessions", "items", "history", "data", "results")
+SESSION_NAME_KEYS = ("session_name", "sessionName", "name", "title", "session")
+CREATED_AT_KEYS = ("created_at", "createdAt", "created", "start_time", "startedAt")
+ACUS_USED_KEYS = ("acus_used", "acusUsed", "acus", "acu_usage", "usage")
+NEXT_CURSOR_KEYS = ("next_cursor", "nextCursor", "cursor", "next_page_token", "nextPageToken")
+
+
+class AuthenticationExpired(Exception):
+    """Raised when the API rejects the session cookies."""
+
+
+def find_value(data, keys):
+    """Return the first value stored under any of ``keys``, searching nested objects."""
+    if isinstance(data, dict):
+        for key in keys:
+            if key in data and data[key] is not None:
+                return data[key]
+        for value in data.values():
+            found = find_value(value, keys)
+            if found is not None:
+                return found
+    return None
+
+
+def _text(value):
+    return "Unknown" if value is None else str(value).strip()
+
+
+class DevinApiClient:
+    """
+    Pooled HTTP client for the usage and usage-history endpoints.
+
+    Connections are kept alive in a pool and transient failures are retried
+    with backoff. The history endpoint is paged with a cursor.
+    """
+
+    def __init__(self, usage_api_url, history_api_url, pool_size=4, timeout=30):
+        self.usage_api_url = usage_api_url
+        self.history_api_url = history_api_url
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=("GET",))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Accept"] = "application/json"
+
+    def load_cookies(self, cookies):
+        """Replace the client's cookies with cookies in the format returned by WebDriver's get_cookies()."""
+        self.session.cookies.clear()
+        for cookie in cookies:
+            # WebDriver reports host-only cookies with a leading dot or without a domain
+            domain = (cookie.get("domain") or "").lstrip(".")
+            self.session.cookies.set(cookie["name"], cookie["value"], domain=domain, path=cookie.get("path", "/"))
+
+    def set_bearer_token(self, token):
+        """Send ``token`` as a bearer token with every request."""
+        self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def _get_json(self, url, params=None):
+        response = self.session.get(url, params=params, timeout=self.timeout)
+        if response.status_code in (401, 403) or "login" in response.url:
+            raise AuthenticationExpired(f"{url} answered {response.status_code}")
+        response.raise_for_status()
+        try:
+            return response.json()
+        except ValueError:
+            raise AuthenticationExpired(f"{url} did not return JSON")
+
+    def fetch_current_usage(self):
+        """Fetch the current usage in the same shape as the browser scraper."""
+        data = self._get_json(self.usage_api_url)
+        available_acus = find_value(data, AVAILABLE_ACUS_KEYS)
+        logger.info(f"Fetched available ACUs: {available_acus}")
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "available_acus": _text(available_acus)
+        }
+
+    @staticmethod
+    def _parse_history_page(data):
+        items = data if isinstance(data, list) else find_value(data, HISTORY_LIST_KEYS) or []
+        return [
+            {
+                "session_name": _text(find_value(item, SESSION_NAME_KEYS)),
+                "created_at": _text(find_value(item, CREATED_AT_KEYS)),
+                "acus_used": _text(find_value(item, ACUS_USED_KEYS))
+            }
+            for item in items if isinstance(item, dict)
+        ]
+
+    def fetch_usage_history(self, known_rows=None, max_pages=200):
+        """
+        Fetch the usage history newest first, following the page cursor.
+
+        Like the browser scraper, paging stops after the first page that
+        contains a session from ``known_rows`` and the remaining stored rows
+        are appended unchanged.
+        """
+        known_keys = {history_key(row) for row in known_rows or []}
+        history_rows = []
+        params = None
+        pages = 0
+
+        while pages < max_pages:
+            data = self._get_json(self.history_api_url, params=params)
+            page_rows = self._parse_history_page(data)
+            history_rows.extend(page_rows)
+            pages += 1
+
+            if known_keys and any(history_key(row) in known_keys for row in page_rows):
+                break
+            cursor = None
+            if isinstance(data, dict):
+                cursor = next((data[key] for key in NEXT_CURSOR_KEYS if data.get(key)), None)
+            if not cursor or not page_rows:
+                break
+            params = {"cursor": cursor}
+
+        if known_rows:
+            scraped_keys = {history_key(row) for row in history_rows}
+            history_rows.extend(row for row in known_rows if history_key(row) not in scraped_keys)
+
+        logger.info(f"Fetched {len(history_rows)} history rows from {pages} page(s)")
+        return history_rows
+
+    def close(self):
+        self.session.close()
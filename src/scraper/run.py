@@ -1,13 +1,29 @@
 #!/usr/bin/env python3
 """
 Script to run the Devin credit scraper.
+
+Pass --backfill to crawl the whole usage history instead of stopping at
+the sessions stored by the previous run, and --profile FILE to write the
+run's cProfile stats to FILE.
 """
 
-import logging
-from scraper import DevinCreditScraper
+import argparse
+from contextlib import nullcontext
+from src.scraper.scraper import DevinCreditScraper, configure_logging
+from src.storage.metrics import profile
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Run the Devin credit scraper once.")
+    parser.add_argument("--backfill", action="store_true",
+                        help="re-crawl the full usage history")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="write cProfile stats of the run to FILE")
+    args = parser.parse_args()
+    
+    configure_logging()
     scraper = DevinCreditScraper()
-    success = scraper.run()
+    if args.backfill:
+        scraper.history_mode = "backfill"
+    with profile(args.profile) if args.profile else nullcontext():
+        success = scraper.run()
     exit(0 if success else 1)
@@ -6,10 +6,18 @@ Scheduler for running the Devin credit scraper at regular intervals.
 import os
 import logging
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from dotenv import load_dotenv
-from scraper import DevinCreditScraper
+from src.scraper.scraper import DevinCreditScraper
+from src.scraper.browser import WarmDriverPool
+from src.storage.accounts import load_accounts
+from src.storage.retention import compact
+from src.storage.store import open_store
+from src.storage.rollups import Rollups, available_acus_trend
+from src.storage.metrics import get_metrics
+from src.scraper.cadence import ScrapeCadence
 
 # Configure logging
 logging.basicConfig(
@@ -25,49 +33,148 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Optionally keep one Chrome instance running between scheduled scrapes
+driver_pool = None
+if os.getenv("SCRAPER_WARM_DRIVER", "false").lower() == "true":
+    driver_pool = WarmDriverPool(
+        lambda: DevinCreditScraper().setup_driver(),
+        max_uses=int(os.getenv("SCRAPER_WARM_DRIVER_MAX_USES", "20"))
+    )
+
+def scrape_account(account):
+    """Scrape one configured account into its storage partition (runs in a worker process)."""
+    scraper = DevinCreditScraper(
+        username=account["username"],
+        confirmation_code=account["confirmation_code"],
+        data_dir=account["data_dir"]
+    )
+    return scraper.run()
+
+def scrape_accounts(accounts):
+    """Scrape several accounts in parallel, one browser per worker process."""
+    max_workers = min(len(accounts), int(os.getenv("SCRAPER_MAX_PARALLEL", "2")))
+    logger.info(f"Scraping {len(accounts)} accounts with {max_workers} worker(s)")
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = dict(zip((a["id"] for a in accounts), executor.map(scrape_account, accounts)))
+    
+    for org_id, success in results.items():
+        if success:
+            logger.info(f"Scrape of {org_id} completed successfully")
+        else:
+            logger.error(f"Scrape of {org_id} failed")
+    return all(results.values())
+
+# Plans the next scrape from the outcome of the last one and the ACU trend
+cadence = ScrapeCadence.from_env()
+
 def scrape_job():
-    """Job to run the scraper."""
+    """Job to run the scraper; returns whether it succeeded."""
     logger.info(f"Running scheduled scrape job at {datetime.now()}")
-    scraper = DevinCreditScraper()
-    success = scraper.run()
+    try:
+        accounts = load_accounts()
+        if accounts:
+            success = scrape_accounts(accounts)
+        else:
+            scraper = DevinCreditScraper()
+            success = scraper.run(driver_pool=driver_pool)
+    except Exception as e:
+        logger.error(f"Scheduled scrape job raised: {str(e)}")
+        success = False
     if success:
         logger.info("Scheduled scrape job completed successfully")
     else:
         logger.error("Scheduled scrape job failed")
+    return success
+
+def load_trends():
+    """Return the available-ACUs trend of every store, keyed by organization."""
+    accounts = load_accounts()
+    data_dirs = {account["id"]: account["data_dir"] for account in accounts} if accounts else {"default": "data"}
+    trends = {}
+    for name, data_dir in data_dirs.items():
+        try:
+            store = open_store(data_dir)
+            trends[name] = available_acus_trend(Rollups(store.data_dir).current(store))
+        except Exception as e:
+            logger.warning(f"Could not load the ACU trend of {name}: {str(e)}")
+    return trends
+
+def adaptive_scrape_job(scheduler):
+    """Run the scrape job, then reschedule it by the outcome and the ACU burn rate."""
+    success = scrape_job()
+    delay, reason = cadence.next_delay(success, load_trends() if success else None)
+    logger.info(f"Next scrape in {delay / 60:.0f} minutes ({reason})")
+    scheduler.reschedule_job('scrape_job', trigger=IntervalTrigger(seconds=delay))
+    
+    metrics = get_metrics()
+    metrics.inc("devin_credit_scheduler_jobs_total", {"job": "scrape", "result": "success" if success else "failure"})
+    metrics.set("devin_credit_scheduler_next_scrape_delay_seconds", delay)
+    metrics.flush()
+
+def compact_job():
+    """Job to apply the retention policy to every store."""
+    logger.info(f"Running scheduled compaction job at {datetime.now()}")
+    data_dirs = [account["data_dir"] for account in load_accounts()] or ["data"]
+    success = True
+    for data_dir in data_dirs:
+        try:
+            compact(data_dir)
+        except Exception as e:
+            logger.error(f"Compaction of {data_dir} failed: {str(e)}")
+            success = False
+    
+    metrics = get_metrics()
+    metrics.inc("devin_credit_scheduler_jobs_total", {"job": "compact", "result": "success" if success else "failure"})
+    metrics.flush()
 
 def main():
     """Set up and run the scheduler."""
     # Get the scrape interval from environment variables (default to 24 hours)
-    interval_hours = int(os.getenv("SCRAPE_INTERVAL_HOURS", "24"))
+    interval_hours = float(os.getenv("SCRAPE_INTERVAL_HOURS", "24"))
     
-    logger.info(f"Setting up scheduler to run every {interval_hours} hours")
+    logger.info(f"Setting up scheduler to run every {interval_hours:g} hours")
     
-    # Create scheduler
-    scheduler = BlockingScheduler()
+    # Create scheduler. A job never runs twice at once, and runs missed while
+    # it was busy (or the process was suspended) are coalesced into one
+    scheduler = BlockingScheduler(job_defaults={
+        'coalesce': True,
+        'max_instances': 1,
+        'misfire_grace_time': None
+    })
     
-    # Add job to run at the specified interval
+    # Add job to run now and then at the interval; after every run the job
+    # reschedules itself (see ScrapeCadence)
     scheduler.add_job(
-        scrape_job,
+        adaptive_scrape_job,
+        args=[scheduler],
         trigger=IntervalTrigger(hours=interval_hours),
+        next_run_time=datetime.now(),
         id='scrape_job',
         name='Scrape Devin credit usage',
         replace_existing=True
     )
     
-    # Add job to run immediately on startup
-    scheduler.add_job(
-        scrape_job,
-        trigger='date',
-        run_date=datetime.now(),
-        id='initial_scrape_job',
-        name='Initial scrape job'
-    )
+    # Thin out old snapshots, see RETENTION_* in .env.example
+    if os.getenv("COMPACTION_ENABLED", "true").lower() == "true":
+        compaction_hours = int(os.getenv("COMPACTION_INTERVAL_HOURS", "24"))
+        logger.info(f"Compacting the stores every {compaction_hours} hours")
+        scheduler.add_job(
+            compact_job,
+            trigger=IntervalTrigger(hours=compaction_hours),
+            id='compact_job',
+            name='Compact stored snapshots',
+            replace_existing=True
+        )
     
     try:
         logger.info("Starting scheduler")
         scheduler.start()
     except (KeyboardInterrupt, SystemExit):
         logger.info("Scheduler stopped")
+    finally:
+        if driver_pool:
+            driver_pool.close()
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,8 @@
 import os
+import re
 import json
-import logging
 import time
+import logging
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -10,38 +11,181 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
-from webdriver_manager.chrome import ChromeDriverManager
 from dotenv import load_dotenv
+from src.storage.store import open_store
+from src.storage.normalize import history_key, normalize_snapshot, content_hash, NUMBER_PATTERN
+from src.storage.rollups import Rollups
+from src.storage.segments import write_json_atomic
+from src.storage.metrics import get_metrics
+from src.scraper.browser import resolve_chromedriver_path, BrowserSessionStore
+from src.scraper.timing import PhaseTimer
+from src.scraper.http_client import DevinApiClient, AuthenticationExpired
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("scraper.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
+# Serializes the history table (or the div-based fallback layout) in one
+# WebDriver round trip instead of one call per row and per cell.
+EXTRACT_HISTORY_SCRIPT = """
+const tables = Array.from(document.querySelectorAll('table'));
+const table = tables.find(t => {
+    const text = t.innerText;
+    return text.includes('Session') || text.includes('Created At');
+});
+if (table) {
+    const rows = Array.from(table.querySelectorAll('tr')).slice(1);
+    return {
+        layout: 'table',
+        rows: rows
+            .map(row => Array.from(row.querySelectorAll('td'), cell => cell.innerText.trim()))
+            .filter(cells => cells.length >= 3)
+    };
+}
+const items = document.querySelectorAll(
+    'div[class*="row"], div[class*="item"], div[class*="list-item"]'
+);
+return {
+    layout: 'divs',
+    texts: Array.from(items, item => item.innerText)
+        .filter(text => text && (text.includes('Session') || text.includes('ACUs')))
+};
+"""
+
+# Resolves once the "Available ACUs" label has rendered; how its value is
+# laid out is left to the extraction fallbacks.
+USAGE_READY_SCRIPT = """
+const label = document.evaluate(
+    "//*[contains(text(), 'Available ACUs')]", document, null,
+    XPathResult.FIRST_ORDERED_NODE_TYPE, null
+).singleNodeValue;
+return label !== null && label.textContent.trim() !== '';
+"""
+
+# Resolves as soon as any of the history column labels is on the page.
+HISTORY_READY_SCRIPT = """
+return document.evaluate(
+    "//*[contains(text(), 'Session') or contains(text(), 'Created At') or contains(text(), 'ACUs Used')]",
+    document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+).singleNodeValue !== null;
+"""
+
+# Selector strategies are combined so they are all tried in every poll.
+EMAIL_FIELD_SELECTOR = "#email, input[name='email'], input[type='email']"
+CODE_FIELD_XPATH = (
+    "//input[contains(@placeholder, 'code') or contains(@aria-label, 'code')] | "
+    "//input[contains(@id, 'code') or contains(@name, 'code')]"
+)
+
+WAIT_POLL_SECONDS = 0.2
+
+# Scrolls the page and every scrollable container to the bottom so that
+# infinite-scroll lists load their next batch of rows.
+SCROLL_TO_BOTTOM_SCRIPT = """
+window.scrollTo(0, document.body.scrollHeight);
+document.querySelectorAll('*').forEach(el => {
+    if (el.scrollHeight > el.clientHeight + 1) {
+        el.scrollTop = el.scrollHeight;
+    }
+});
+"""
+
+NEXT_PAGE_XPATH = (
+    "//button[not(@disabled) and not(@aria-disabled='true') and "
+    "(contains(@aria-label, 'Next') or contains(@aria-label, 'next') or "
+    "normalize-space()='Next' or normalize-space()='>' or normalize-space()='\u203a')]"
+    " | //a[@rel='next']"
+)
+
+def parse_history_row_text(row_text):
+    """Parse one history entry from the text of a div-based row."""
+    session_match = re.search(r'Session[:\s]+([^\n]+)', row_text)
+    created_match = re.search(r'Created At[:\s]+([^\n]+)', row_text)
+    acus_match = re.search(r'ACUs Used[:\s]+([^\n]+)', row_text)
+    
+    return {
+        "session_name": session_match.group(1) if session_match else "Unknown",
+        "created_at": created_match.group(1) if created_match else "Unknown",
+        "acus_used": acus_match.group(1) if acus_match else "Unknown"
+    }
+
+def configure_logging(log_file="scraper.log"):
+    """
+    Log to ``log_file`` and the console.
+    
+    Called by the command-line entry points only: importing this module
+    does not touch the logging configuration of the importing process.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
+
 class DevinCreditScraper:
     """
     Scraper for Devin credit usage and limits.
     """
     
-    def __init__(self):
+    def __init__(self, username=None, confirmation_code=None, progress_callback=None, data_dir=None):
+        """
+        Create a scraper.
+        
+        Credentials default to DEVIN_USERNAME and DEVIN_CONFIRMATION_CODE from
+        the environment. ``progress_callback``, if given, is called with the
+        name of each phase of ``run`` as it starts. ``data_dir`` selects the
+        storage partition (default: ``data``); the saved browser session is
+        kept there too.
+        """
         self.login_url = os.getenv("DEVIN_LOGIN_URL", "https://app.devin.ai/login")
         self.usage_url = os.getenv("DEVIN_USAGE_URL", "https://app.devin.ai/settings/usage")
         self.history_url = os.getenv("DEVIN_HISTORY_URL", "https://app.devin.ai/settings/usage?tab=history")
         
+        # JSON endpoints used by the "http" fetch mode
+        self.usage_api_url = os.getenv("DEVIN_USAGE_API_URL", "https://app.devin.ai/api/usage")
+        self.history_api_url = os.getenv("DEVIN_HISTORY_API_URL", "https://app.devin.ai/api/usage/history")
+        self.api_token_storage_key = os.getenv("DEVIN_API_TOKEN_STORAGE_KEY")
+        
+        # "browser" renders the usage pages in Chrome; "http" only uses Chrome
+        # to log in and fetches the data from the JSON endpoints
+        self.fetch_mode = os.getenv("SCRAPER_FETCH_MODE", "browser").lower()
+        
         # Authentication credentials
-        self.username = os.getenv("DEVIN_USERNAME")
+        self.username = username or os.getenv("DEVIN_USERNAME")
         self.password = os.getenv("DEVIN_PASSWORD")
+        self.confirmation_code = confirmation_code or os.getenv("DEVIN_CONFIRMATION_CODE")
+        
+        self.progress_callback = progress_callback
+        
+        # Seconds spent in each phase of the most recent run
+        self.last_timings = {}
+        
+        # Do not store a snapshot that only repeats the latest one; whether
+        # the most recent run stored one is kept in last_saved
+        self.skip_unchanged = os.getenv("SCRAPER_SKIP_UNCHANGED", "true").lower() == "true"
+        self.last_saved = None
+        
+        # "bulk" reads the history table with a single script call; "element"
+        # walks it one WebDriver call per row and cell
+        self.history_extraction = os.getenv("SCRAPER_HISTORY_EXTRACTION", "bulk").lower()
         
-        self.data_file = os.path.join("data", "credit_data.json")
+        # "incremental" stops paging at the first session already stored;
+        # "backfill" always crawls the whole history. Incremental runs keep
+        # stored sessions that were deleted upstream, so every
+        # SCRAPER_BACKFILL_EVERY_RUNS-th run crawls everything (0 = never)
+        self.history_mode = os.getenv("SCRAPER_HISTORY_MODE", "incremental").lower()
+        self.history_max_pages = int(os.getenv("SCRAPER_HISTORY_MAX_PAGES", "200"))
+        self.backfill_every_runs = int(os.getenv("SCRAPER_BACKFILL_EVERY_RUNS", "24"))
+        
+        # Reuse a saved login session instead of logging in on every run
+        self.reuse_session = os.getenv("SCRAPER_REUSE_SESSION", "true").lower() == "true"
+        self.data_dir = data_dir or "data"
+        self.history_crawl_file = os.path.join(self.data_dir, "history_crawl.json")
+        self.session_store = BrowserSessionStore(os.path.join(self.data_dir, "browser", "session.json"))
         
     def setup_driver(self):
         """Set up the Chrome WebDriver with headless options."""
@@ -51,7 +195,7 @@ class DevinCreditScraper:
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--window-size=1920,1080")  # Set window size for better element visibility
         
-        service = Service(ChromeDriverManager().install())
+        service = Service(resolve_chromedriver_path())
         driver = webdriver.Chrome(service=service, options=chrome_options)
         return driver
     
@@ -74,24 +218,10 @@ class DevinCreditScraper:
             # Navigate to login page
             driver.get(self.login_url)
             
-            # Wait for login form to load - try different possible selectors
-            try:
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.ID, "email"))
-                )
-                email_field = driver.find_element(By.ID, "email")
-            except (NoSuchElementException, TimeoutException):
-                # Try alternative selectors
-                try:
-                    WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.NAME, "email"))
-                    )
-                    email_field = driver.find_element(By.NAME, "email")
-                except (NoSuchElementException, TimeoutException):
-                    WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.XPATH, "//input[@type='email']"))
-                    )
-                    email_field = driver.find_element(By.XPATH, "//input[@type='email']")
+            # Wait for login form to load - all known selectors at once
+            email_field = WebDriverWait(driver, 10, poll_frequency=WAIT_POLL_SECONDS).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, EMAIL_FIELD_SELECTOR))
+            )
             
             # Fill in email address
             email_field.send_keys(self.username)
@@ -113,21 +243,14 @@ class DevinCreditScraper:
             
             # Wait for confirmation code input field to appear
             try:
-                WebDriverWait(driver, 10).until(
-                    lambda d: len(d.find_elements(By.XPATH, "//input[contains(@placeholder, 'code') or contains(@aria-label, 'code')]")) > 0 or
-                             len(d.find_elements(By.XPATH, "//input[contains(@id, 'code') or contains(@name, 'code')]")) > 0
+                code_field = WebDriverWait(driver, 10, poll_frequency=WAIT_POLL_SECONDS).until(
+                    EC.presence_of_element_located((By.XPATH, CODE_FIELD_XPATH))
                 )
                 
-                code_field = None
-                try:
-                    code_field = driver.find_element(By.XPATH, "//input[contains(@placeholder, 'code') or contains(@aria-label, 'code')]")
-                except NoSuchElementException:
-                    code_field = driver.find_element(By.XPATH, "//input[contains(@id, 'code') or contains(@name, 'code')]")
-                
-                confirmation_code = os.getenv("DEVIN_CONFIRMATION_CODE")
+                confirmation_code = self.confirmation_code
                 
                 if not confirmation_code:
-                    logger.error("No confirmation code provided in environment variables")
+                    logger.error("No confirmation code provided")
                     driver.save_screenshot("confirmation_code_needed.png")
                     logger.info("Screenshot saved as 'confirmation_code_needed.png'")
                     return False
@@ -148,7 +271,7 @@ class DevinCreditScraper:
                 verify_button.click()
                 
                 # Wait for successful login - check for redirect to dashboard or settings
-                WebDriverWait(driver, 15).until(
+                WebDriverWait(driver, 15, poll_frequency=WAIT_POLL_SECONDS).until(
                     lambda d: "login" not in d.current_url
                 )
                 
@@ -165,24 +288,62 @@ class DevinCreditScraper:
             driver.save_screenshot("login_error.png")
             return False
     
+    def session_is_valid(self, driver):
+        """Check whether the browser is logged in by opening the usage page."""
+        try:
+            driver.get(self.usage_url)
+            WebDriverWait(driver, 10, poll_frequency=WAIT_POLL_SECONDS).until(
+                lambda d: "login" in d.current_url or d.execute_script(USAGE_READY_SCRIPT)
+            )
+        except TimeoutException:
+            pass
+        return "login" not in driver.current_url
+    
+    def authenticate(self, driver):
+        """
+        Make sure the browser is logged in.
+        
+        A saved session is restored first and kept if it is still valid;
+        only when it has expired (or there is none) does this fall back to
+        the full ``login`` flow, saving the new session on success.
+        """
+        if self.reuse_session:
+            try:
+                if self.session_store.restore(driver, self.login_url) and self.session_is_valid(driver):
+                    logger.info("Reusing saved browser session, skipping login")
+                    return True
+                logger.info("No valid saved browser session, logging in")
+            except Exception as e:
+                logger.warning(f"Could not restore browser session: {str(e)}")
+        
+        if not self.login(driver):
+            self.session_store.clear()
+            return False
+        
+        if self.reuse_session:
+            self.session_store.save(driver)
+        return True
+    
     def extract_current_usage(self, driver):
         """
         Extract current credit usage from the usage page.
         """
         try:
-            logger.info("Navigating to usage page...")
-            driver.get(self.usage_url)
+            # A restored session was just checked on the usage page; do not load it again
+            if driver.current_url.rstrip("/") != self.usage_url.rstrip("/"):
+                logger.info("Navigating to usage page...")
+                driver.get(self.usage_url)
             
-            # Wait for page to load
-            time.sleep(2)
+            # Wait until the "Available ACUs" label has rendered
+            try:
+                WebDriverWait(driver, 15, poll_frequency=WAIT_POLL_SECONDS).until(
+                    lambda d: d.execute_script(USAGE_READY_SCRIPT)
+                )
+            except TimeoutException:
+                logger.warning("'Available ACUs' did not appear, trying the fallbacks")
             
             logger.info("Extracting current credit usage data...")
             
-            # Wait for the credit information to load - look for "Available ACUs"
-            WebDriverWait(driver, 10).until(
-                lambda d: len(d.find_elements(By.XPATH, "//*[contains(text(), 'Available ACUs')]")) > 0
-            )
-            
             available_acus = None
             
             try:
@@ -195,12 +356,11 @@ class DevinCreditScraper:
                     available_acus_element = driver.find_element(
                         By.XPATH, "//*[contains(text(), 'Available ACUs')]/.."
                     )
-                    # Extract the number from the text
+                    # Extract the number (with separators and decimals) from the text
                     text = available_acus_element.text
-                    import re
-                    match = re.search(r'(\d+)', text)
+                    match = NUMBER_PATTERN.search(text)
                     if match:
-                        available_acus = match.group(1)
+                        available_acus = match.group(0)
                     else:
                         available_acus = text.replace("Available ACUs", "").strip()
                 except NoSuchElementException:
@@ -210,8 +370,7 @@ class DevinCreditScraper:
                     page_text = driver.find_element(By.TAG_NAME, "body").text
                     logger.info(f"Page text: {page_text}")
                     
-                    import re
-                    match = re.search(r'Available ACUs[:\s]+(\d+)', page_text)
+                    match = re.search(r'Available ACUs[:\s]+(' + NUMBER_PATTERN.pattern + ')', page_text)
                     if match:
                         available_acus = match.group(1)
                     else:
@@ -231,84 +390,62 @@ class DevinCreditScraper:
             driver.save_screenshot("error_usage_page.png")
             return None
     
-    def extract_usage_history(self, driver):
+    def extract_usage_history(self, driver, known_rows=None):
         """
-        Extract usage history from the history tab.
+        Extract usage history from the history tab, following pagination.
+        
+        Pages (or infinite-scroll batches) are read newest first. When
+        ``known_rows`` (the history stored by an earlier run) is given, paging
+        stops after the first page that contains an already stored session;
+        the stored rows below that point are then appended unchanged. The
+        first page is always read in full so that recent sessions whose ACUs
+        are still growing are refreshed. Without ``known_rows`` the whole
+        history is crawled.
         """
         try:
             logger.info("Navigating to usage history page...")
             driver.get(self.history_url)
             
-            # Wait for page to load
-            time.sleep(2)
-            
-            logger.info("Extracting usage history data...")
-            
             # Wait for the history table to load - look for "Session", "Created At", or "ACUs Used"
-            WebDriverWait(driver, 10).until(
-                lambda d: (
-                    len(d.find_elements(By.XPATH, "//*[contains(text(), 'Session')]")) > 0 or
-                    len(d.find_elements(By.XPATH, "//*[contains(text(), 'Created At')]")) > 0 or
-                    len(d.find_elements(By.XPATH, "//*[contains(text(), 'ACUs Used')]")) > 0
-                )
+            WebDriverWait(driver, 15, poll_frequency=WAIT_POLL_SECONDS).until(
+                lambda d: d.execute_script(HISTORY_READY_SCRIPT)
             )
             
+            logger.info("Extracting usage history data...")
+            
+            known_keys = {history_key(row) for row in known_rows or []}
             history_rows = []
+            visible_rows = self.extract_history_page_rows(driver)
+            page_rows = visible_rows
+            pages = 1
             
-            try:
-                table = None
-                for potential_table in driver.find_elements(By.TAG_NAME, "table"):
-                    if "Session" in potential_table.text or "Created At" in potential_table.text:
-                        table = potential_table
-                        break
+            while True:
+                history_rows.extend(page_rows)
                 
-                if table:
-                    rows = table.find_elements(By.TAG_NAME, "tr")[1:]  # Skip header row
-                    
-                    for row in rows:
-                        cells = row.find_elements(By.TAG_NAME, "td")
-                        if len(cells) >= 3:  # Ensure we have enough cells
-                            session_name = cells[0].text.strip()
-                            created_at = cells[1].text.strip()
-                            acus_used = cells[2].text.strip()
-                            
-                            history_rows.append({
-                                "session_name": session_name,
-                                "created_at": created_at,
-                                "acus_used": acus_used
-                            })
-            except Exception as e:
-                logger.warning(f"Could not extract history using table approach: {str(e)}")
+                if known_keys and any(history_key(row) in known_keys for row in page_rows):
+                    logger.info(f"Reached previously stored sessions on page {pages}")
+                    break
+                if pages >= self.history_max_pages:
+                    logger.warning(f"Stopped after {pages} history pages (SCRAPER_HISTORY_MAX_PAGES)")
+                    break
                 
-                try:
-                    row_elements = driver.find_elements(
-                        By.XPATH, "//div[contains(@class, 'row') or contains(@class, 'item') or contains(@class, 'list-item')]"
-                    )
-                    
-                    for row_element in row_elements:
-                        row_text = row_element.text
-                        if row_text and ("Session" in row_text or "ACUs" in row_text):
-                            import re
-                            session_match = re.search(r'Session[:\s]+([^\n]+)', row_text)
-                            created_match = re.search(r'Created At[:\s]+([^\n]+)', row_text)
-                            acus_match = re.search(r'ACUs Used[:\s]+([^\n]+)', row_text)
-                            
-                            session_name = session_match.group(1) if session_match else "Unknown"
-                            created_at = created_match.group(1) if created_match else "Unknown"
-                            acus_used = acus_match.group(1) if acus_match else "Unknown"
-                            
-                            history_rows.append({
-                                "session_name": session_name,
-                                "created_at": created_at,
-                                "acus_used": acus_used
-                            })
-                except Exception as e:
-                    logger.warning(f"Could not extract history using div approach: {str(e)}")
-                    
-                    driver.save_screenshot("debug_history_page.png")
-                    logger.info(f"Page content: {driver.find_element(By.TAG_NAME, 'body').text}")
+                next_rows = self.next_history_page(driver, visible_rows)
+                if next_rows is None:
+                    break
+                
+                # Infinite scroll keeps earlier rows on the page; pagination replaces them
+                if next_rows[:len(visible_rows)] == visible_rows:
+                    page_rows = next_rows[len(visible_rows):]
+                else:
+                    page_rows = next_rows
+                visible_rows = next_rows
+                pages += 1
             
-            logger.info(f"Extracted {len(history_rows)} history rows")
+            if known_rows:
+                scraped_keys = {history_key(row) for row in history_rows}
+                history_rows.extend(row for row in known_rows if history_key(row) not in scraped_keys)
+            
+            logger.info(f"Extracted {len(history_rows)} history rows from {pages} page(s)")
             
             return history_rows
         except Exception as e:
@@ -316,76 +453,391 @@ class DevinCreditScraper:
             driver.save_screenshot("error_history_page.png")
             return []
     
-    def save_data(self, data):
-        """Save the scraped data to a JSON file."""
+    def extract_history_page_rows(self, driver):
+        """Extract the history rows currently shown on the page."""
+        history_rows = None
+        if self.history_extraction == "bulk":
+            history_rows = self.extract_history_rows_bulk(driver)
+        if history_rows is None:
+            history_rows = self.extract_history_rows_by_element(driver)
+        return history_rows
+    
+    def next_history_page(self, driver, visible_rows):
+        """
+        Load the next page of history.
+        
+        Clicks a "next page" control if there is one, otherwise scrolls to
+        the bottom to trigger infinite scrolling. Returns the rows shown
+        afterwards, or None when there is nothing more to load.
+        """
+        next_buttons = driver.find_elements(By.XPATH, NEXT_PAGE_XPATH)
+        if next_buttons:
+            next_buttons[0].click()
+        else:
+            driver.execute_script(SCROLL_TO_BOTTOM_SCRIPT)
+        
+        rows = []
+        
+        def page_changed(d):
+            rows[:] = self.extract_history_page_rows(d)
+            return rows != visible_rows
+        
         try:
-            # Create data directory if it doesn't exist
-            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-            
-            # Load existing data if available
-            existing_data = []
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    existing_data = json.load(f)
-            
-            # Append new data
-            existing_data.append(data)
-            
-            # Save updated data
-            with open(self.data_file, 'w') as f:
-                json.dump(existing_data, f, indent=2)
+            WebDriverWait(driver, 5, poll_frequency=WAIT_POLL_SECONDS).until(page_changed)
+            return rows
+        except TimeoutException:
+            return None
+    
+    def incremental_runs(self):
+        """Return the number of incremental history crawls since the last full one."""
+        try:
+            with open(self.history_crawl_file, 'r') as f:
+                return int(json.load(f).get("incremental_runs", 0))
+        except (FileNotFoundError, ValueError, TypeError, AttributeError):
+            return 0
+    
+    def known_history(self):
+        """
+        Return the stored history to stop paging at, or None to crawl everything.
+        
+        Everything is crawled with SCRAPER_HISTORY_MODE=backfill, and after
+        SCRAPER_BACKFILL_EVERY_RUNS - 1 incremental runs in a row, so that
+        sessions deleted or re-keyed upstream eventually leave the snapshots.
+        """
+        if self.history_mode == "backfill":
+            return None
+        if self.backfill_every_runs and self.incremental_runs() >= self.backfill_every_runs - 1:
+            logger.info("Crawling the full history (SCRAPER_BACKFILL_EVERY_RUNS)")
+            return None
+        return self.load_known_history()
+    
+    def record_history_crawl(self, full):
+        """Count a saved incremental crawl, or reset the count after a full one."""
+        try:
+            write_json_atomic(self.history_crawl_file, {
+                "incremental_runs": 0 if full else self.incremental_runs() + 1,
+                "updated_at": datetime.now().isoformat()
+            })
+        except OSError as e:
+            logger.warning(f"Could not update {self.history_crawl_file}: {str(e)}")
+    
+    def load_known_history(self):
+        """Return the usage history stored by the latest run, used as the high-water mark."""
+        try:
+            latest = open_store(self.data_dir).latest()
+        except Exception as e:
+            logger.warning(f"Could not load stored history, crawling everything: {str(e)}")
+            return None
+        return (latest or {}).get("usage_history") or None
+    
+    def extract_history_rows_bulk(self, driver):
+        """
+        Extract the history rows of the loaded page in a single script call.
+        
+        Returns None if the script fails, so the caller can fall back to
+        ``extract_history_rows_by_element``.
+        """
+        try:
+            result = driver.execute_script(EXTRACT_HISTORY_SCRIPT)
+        except Exception as e:
+            logger.warning(f"Could not extract history with a single script call: {str(e)}")
+            return None
+        
+        if result.get("layout") == "table":
+            return [
+                {
+                    "session_name": cells[0],
+                    "created_at": cells[1],
+                    "acus_used": cells[2]
+                }
+                for cells in result.get("rows", [])
+            ]
+        return [parse_history_row_text(text) for text in result.get("texts", [])]
+    
+    def extract_history_rows_by_element(self, driver):
+        """Extract the history rows of the loaded page one element at a time."""
+        history_rows = []
+        
+        try:
+            table = None
+            for potential_table in driver.find_elements(By.TAG_NAME, "table"):
+                if "Session" in potential_table.text or "Created At" in potential_table.text:
+                    table = potential_table
+                    break
+            
+            if table:
+                rows = table.find_elements(By.TAG_NAME, "tr")[1:]  # Skip header row
+                
+                for row in rows:
+                    cells = row.find_elements(By.TAG_NAME, "td")
+                    if len(cells) >= 3:  # Ensure we have enough cells
+                        session_name = cells[0].text.strip()
+                        created_at = cells[1].text.strip()
+                        acus_used = cells[2].text.strip()
+                        
+                        history_rows.append({
+                            "session_name": session_name,
+                            "created_at": created_at,
+                            "acus_used": acus_used
+                        })
+        except Exception as e:
+            logger.warning(f"Could not extract history using table approach: {str(e)}")
             
-            logger.info(f"Data saved to {self.data_file}")
+            try:
+                row_elements = driver.find_elements(
+                    By.XPATH, "//div[contains(@class, 'row') or contains(@class, 'item') or contains(@class, 'list-item')]"
+                )
+                
+                for row_element in row_elements:
+                    row_text = row_element.text
+                    if row_text and ("Session" in row_text or "ACUs" in row_text):
+                        history_rows.append(parse_history_row_text(row_text))
+            except Exception as e:
+                logger.warning(f"Could not extract history using div approach: {str(e)}")
+                
+                driver.save_screenshot("debug_history_page.png")
+                logger.info(f"Page content: {driver.find_element(By.TAG_NAME, 'body').text}")
+        
+        return history_rows
+    
+    def save_data(self, data):
+        """
+        Append the scraped data to the snapshot store and update the rollups.
+        
+        With SCRAPER_SKIP_UNCHANGED (the default) nothing is written when the
+        data has the same content hash as the latest stored snapshot.
+        """
+        self.last_saved = False
+        try:
+            store = open_store(self.data_dir)
+            # Hold the write lock across the append and the rollup update, so
+            # that a concurrent scrape (scheduler or web) cannot interleave
+            with store.lock():
+                if self.skip_unchanged:
+                    latest = store.latest()
+                    if latest and content_hash(latest) == content_hash(data):
+                        logger.info(f"Data unchanged since the snapshot of {latest.get('timestamp')}, not saving it")
+                        return True
+                
+                previous_version = store.version()
+                store.append(data)
+                self.last_saved = True
+                
+                logger.info(f"Data saved to {store.data_dir}")
+                
+                try:
+                    Rollups(store.data_dir).update(data, previous_version, store.version())
+                except Exception as e:
+                    logger.warning(f"Could not update rollups, they will be rebuilt on read: {str(e)}")
             return True
         except Exception as e:
             logger.error(f"Failed to save data: {str(e)}")
             return False
     
-    def run(self):
-        """Run the scraper to extract and save credit data."""
+    def report_progress(self, phase):
+        """Notify the progress callback, if any, that a phase has started."""
+        if self.progress_callback:
+            try:
+                self.progress_callback(phase)
+            except Exception as e:
+                logger.warning(f"Progress callback failed: {str(e)}")
+    
+    def save_snapshot(self, timer, current_usage, usage_history):
+        """Combine the extracted data with the phase timings, normalize it and save it."""
+        data = normalize_snapshot({
+            "timestamp": datetime.now().isoformat(),
+            "current_usage": current_usage,
+            "usage_history": usage_history,
+            "timings": dict(timer.timings)
+        })
+        
+        with timer.phase("save"):
+            saved = self.save_data(data)
+        if not saved:
+            logger.error("Scraper run failed due to data saving failure")
+        return saved
+    
+    def run(self, driver_pool=None):
+        """
+        Run the scraper to extract and save credit data.
+        
+        With a ``driver_pool`` (see WarmDriverPool) the browser is borrowed
+        from the pool and kept running afterwards instead of being started
+        and quit for this run only. SCRAPER_FETCH_MODE=http runs
+        ``run_http``, otherwise ``run_browser``. The outcome and the phase
+        timings are published as metrics.
+        """
+        self.last_saved = None
+        success = False
+        start = time.perf_counter()
+        try:
+            if self.fetch_mode == "http":
+                success = self.run_http(driver_pool=driver_pool)
+            else:
+                success = self.run_browser(driver_pool=driver_pool)
+            return success
+        finally:
+            self.record_metrics(success, time.perf_counter() - start)
+    
+    def record_metrics(self, success, seconds):
+        """Publish the outcome, duration and phase timings of a run."""
+        if not success:
+            result = "failure"
+        elif self.last_saved is False:
+            result = "unchanged"
+        else:
+            result = "success"
+        
+        metrics = get_metrics()
+        metrics.inc("devin_credit_scrapes_total", {"mode": self.fetch_mode, "result": result})
+        metrics.observe("devin_credit_scrape_duration_seconds", seconds, {"mode": self.fetch_mode})
+        for phase, phase_seconds in self.last_timings.items():
+            metrics.observe("devin_credit_scrape_phase_duration_seconds", phase_seconds, {"phase": phase})
+        metrics.set("devin_credit_last_scrape_timestamp_seconds", time.time(),
+                    {"result": "failure" if result == "failure" else "success"})
+        metrics.flush()
+    
+    def run_browser(self, driver_pool=None):
+        """Run the scraper with the usage pages rendered in Chrome."""
         driver = None
+        healthy = False
+        timer = PhaseTimer(on_start=self.report_progress)
+        self.last_timings = timer.timings
         try:
             logger.info("Starting scraper run...")
             
             # Set up the WebDriver
-            driver = self.setup_driver()
+            with timer.phase("driver_setup"):
+                driver = driver_pool.acquire() if driver_pool else self.setup_driver()
             
             # Log in to the platform
-            if not self.login(driver):
+            with timer.phase("login"):
+                logged_in = self.authenticate(driver)
+            if not logged_in:
                 logger.error("Scraper run failed due to login failure")
                 return False
             
             # Extract current usage data
-            current_usage = self.extract_current_usage(driver)
+            with timer.phase("usage"):
+                current_usage = self.extract_current_usage(driver)
             if not current_usage:
                 logger.error("Failed to extract current usage data")
                 return False
             
             # Extract usage history data
-            usage_history = self.extract_usage_history(driver)
-            
-            # Combine the data
-            data = {
-                "timestamp": datetime.now().isoformat(),
-                "current_usage": current_usage,
-                "usage_history": usage_history
-            }
+            with timer.phase("history"):
+                known_rows = self.known_history()
+                usage_history = self.extract_usage_history(driver, known_rows=known_rows)
             
             # Save the data
-            if not self.save_data(data):
-                logger.error("Scraper run failed due to data saving failure")
+            if not self.save_snapshot(timer, current_usage, usage_history):
                 return False
+            self.record_history_crawl(full=known_rows is None)
             
-            logger.info("Scraper run completed successfully")
+            # Keep the saved session fresh for the next run
+            if self.reuse_session:
+                self.session_store.save(driver)
+            
+            healthy = True
+            logger.info(f"Scraper run completed successfully in {timer.total()}s (phases: {timer.timings})")
             return True
         except Exception as e:
             logger.error(f"Scraper run failed: {str(e)}")
             return False
         finally:
             # Clean up
-            if driver:
+            if driver_pool and driver:
+                driver_pool.release(driver, healthy=healthy)
+            elif driver:
+                driver.quit()
+    
+    def apply_session(self, client, session_data):
+        """Hand a captured browser session's cookies (and bearer token, if configured) to the API client."""
+        client.load_cookies(session_data.get("cookies", []))
+        if self.api_token_storage_key:
+            token = session_data.get("local_storage", {}).get(self.api_token_storage_key)
+            if token:
+                client.set_bearer_token(token)
+    
+    def browser_login(self, client, timer, driver_pool=None):
+        """Log in with Chrome and pass the resulting session to ``client``; the browser is released afterwards."""
+        driver = None
+        healthy = False
+        try:
+            with timer.phase("driver_setup"):
+                driver = driver_pool.acquire() if driver_pool else self.setup_driver()
+            with timer.phase("login"):
+                if not self.login(driver):
+                    self.session_store.clear()
+                    return False
+                if self.reuse_session:
+                    self.session_store.save(driver)
+                self.apply_session(client, self.session_store.capture(driver))
+            healthy = True
+            return True
+        finally:
+            if driver_pool and driver:
+                driver_pool.release(driver, healthy=healthy)
+            elif driver:
                 driver.quit()
+    
+    def run_http(self, driver_pool=None):
+        """
+        Run the scraper in HTTP mode.
+        
+        The usage data is fetched from the JSON endpoints with a pooled HTTP
+        client. Chrome is started only when there is no saved session or the
+        API rejects it, and then only to log in.
+        """
+        timer = PhaseTimer(on_start=self.report_progress)
+        self.last_timings = timer.timings
+        client = DevinApiClient(self.usage_api_url, self.history_api_url)
+        try:
+            logger.info("Starting scraper run (HTTP mode)...")
+            
+            saved_session = self.session_store.load() if self.reuse_session else None
+            if saved_session:
+                self.apply_session(client, saved_session)
+            authenticated = bool(saved_session)
+            logged_in_now = False
+            
+            known_rows = self.known_history()
+            
+            while True:
+                if not authenticated:
+                    if not self.browser_login(client, timer, driver_pool=driver_pool):
+                        logger.error("Scraper run failed due to login failure")
+                        return False
+                    authenticated = logged_in_now = True
+                
+                try:
+                    with timer.phase("usage"):
+                        current_usage = client.fetch_current_usage()
+                    with timer.phase("history"):
+                        usage_history = client.fetch_usage_history(
+                            known_rows=known_rows, max_pages=self.history_max_pages
+                        )
+                    break
+                except AuthenticationExpired as e:
+                    if logged_in_now:
+                        logger.error(f"API rejected a fresh login: {str(e)}")
+                        return False
+                    logger.info("Saved session was rejected by the API, logging in")
+                    authenticated = False
+            
+            if not self.save_snapshot(timer, current_usage, usage_history):
+                return False
+            self.record_history_crawl(full=known_rows is None)
+            
+            logger.info(f"Scraper run completed successfully in {timer.total()}s (phases: {timer.timings})")
+            return True
+        except Exception as e:
+            logger.error(f"Scraper run failed: {str(e)}")
+            return False
+        finally:
+            client.close()
 
 if __name__ == "__main__":
+    configure_logging()
     scraper = DevinCreditScraper()
     scraper.run()
@@ -0,0 +1,35 @@
+"""
+Per-phase timing of scraper runs.
+"""
+
+import time
+from contextlib import contextmanager
+
+
+class PhaseTimer:
+    """
+    Record how long each phase of a scraper run takes.
+
+    ``on_start``, if given, is called with the phase name as each phase
+    begins. Durations are wall-clock seconds rounded to milliseconds.
+    """
+
+    def __init__(self, on_start=None):
+        self.on_start = on_start
+        self.timings = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as phase ``name``."""
+        if self.on_start:
+            self.on_start(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(time.perf_counter() - start, 3)
+
+    def total(self):
+        """Return the seconds elapsed since the timer was created."""
+        return round(time.perf_counter() - self._started, 3)
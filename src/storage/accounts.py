@@ -0,0 +1,58 @@
+"""
+Configured Devin accounts and their storage partitions.
+"""
+
+import os
+import re
+import json
+
+ORG_ID_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]*$")
+
+
+def partition_dir(org_id, root="data"):
+    """Return the data directory that holds one organization's snapshots."""
+    return os.path.join(root, "orgs", org_id)
+
+
+def load_accounts(path=None):
+    """
+    Load the accounts listed in DEVIN_ACCOUNTS_FILE.
+
+    The file is a JSON list of objects with an ``id`` (lower-case slug, used
+    for the storage partition and the API paths), a display ``name``, the
+    Devin ``username`` and optionally a ``confirmation_code``. Returns an
+    empty list when no accounts file is configured, which means the single
+    account from DEVIN_USERNAME is scraped into ``data/``.
+    """
+    path = path or os.getenv("DEVIN_ACCOUNTS_FILE")
+    if not path:
+        return []
+
+    with open(path, 'r') as f:
+        entries = json.load(f)
+
+    accounts = []
+    seen = set()
+    for entry in entries:
+        org_id = entry.get("id", "")
+        if not ORG_ID_PATTERN.match(org_id):
+            raise ValueError(f"Invalid account id in {path}: {org_id!r}")
+        if org_id in seen:
+            raise ValueError(f"Duplicate account id in {path}: {org_id}")
+        seen.add(org_id)
+        accounts.append({
+            "id": org_id,
+            "name": entry.get("name", org_id),
+            "username": entry.get("username"),
+            "confirmation_code": entry.get("confirmation_code"),
+            "data_dir": partition_dir(org_id),
+        })
+    return accounts
+
+
+def get_account(org_id):
+    """Return the configured account with ``org_id``, or None."""
+    for account in load_accounts():
+        if account["id"] == org_id:
+            return account
+    return None
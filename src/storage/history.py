@@ -0,0 +1,271 @@
+"""
+Deduplicated, versioned storage of usage history rows.
+"""
+
+import os
+import json
+import logging
+from src.storage.segments import SegmentedLog, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = "checkpoint.json"
+
+
+def row_keys(rows):
+    """
+    Return the identity key of each row.
+
+    A row is identified by its session name and creation time. Rows that
+    share both within one scrape get an occurrence counter so they stay
+    distinct.
+    """
+    seen = {}
+    keys = []
+    for row in rows:
+        base = (row.get("session_name"), row.get("created_at"))
+        occurrence = seen.get(base, 0)
+        seen[base] = occurrence + 1
+        keys.append(base + (occurrence,))
+    return keys
+
+
+def assign_ranks(keys, state):
+    """
+    Return a rank for every key so that sorting by rank gives the scraped order.
+
+    Rows already in ``state`` keep their rank; new rows get ranks between
+    their neighbours. None is returned when the stored order no longer
+    matches the scrape (or there is no room left between two ranks) and the
+    caller has to rank every row again.
+    """
+    ranks = [state[key]["rank"] if key in state else None for key in keys]
+
+    known = [rank for rank in ranks if rank is not None]
+    if any(a >= b for a, b in zip(known, known[1:])):
+        return None
+
+    i = 0
+    while i < len(ranks):
+        if ranks[i] is not None:
+            i += 1
+            continue
+        j = i
+        while j < len(ranks) and ranks[j] is None:
+            j += 1
+        lo = ranks[i - 1] if i > 0 else None
+        hi = ranks[j] if j < len(ranks) else None
+        count = j - i
+        for n in range(count):
+            if lo is None and hi is None:
+                ranks[i + n] = float(n)
+            elif lo is None:
+                ranks[i + n] = hi - count + n
+            elif hi is None:
+                ranks[i + n] = lo + 1 + n
+            else:
+                ranks[i + n] = lo + (hi - lo) * (n + 1) / (count + 1)
+        run = ([lo] if lo is not None else []) + ranks[i:j] + ([hi] if hi is not None else [])
+        if any(a >= b for a, b in zip(run, run[1:])):
+            return None
+        i = j
+
+    return ranks
+
+
+def diff_history(state, rows, ref):
+    """
+    Return the history entries that turn ``state`` into the scraped ``rows``.
+
+    ``state`` maps row keys to their current entry. New rows get version 1,
+    changed rows a bumped version, and rows missing from the scrape a
+    tombstone. All entries are stamped with reference ``ref``.
+    """
+    keys = row_keys(rows)
+    ranks = assign_ranks(keys, state)
+    rerank = ranks is None
+    if rerank:
+        ranks = [float(n) for n in range(len(keys))]
+
+    entries = []
+    for key, rank, row in zip(keys, ranks, rows):
+        previous = state.get(key)
+        if previous is None:
+            entries.append({"ref": ref, "key": list(key), "version": 1, "rank": rank, "row": row})
+        elif previous["row"] != row:
+            entries.append({"ref": ref, "key": list(key), "version": previous["version"] + 1,
+                            "rank": rank, "row": row})
+        elif rerank and previous["rank"] != rank:
+            entries.append({"ref": ref, "key": list(key), "version": previous["version"],
+                            "rank": rank, "row": row})
+
+    scraped = set(keys)
+    for key in state:
+        if key not in scraped:
+            entries.append({"ref": ref, "key": list(key), "removed": True})
+
+    return entries
+
+
+class HistoryLog:
+    """
+    Append-only log of history row versions.
+
+    Every row is stored once, keyed by (session_name, created_at). A row is
+    written again only when its contents change (with a bumped version) or
+    it disappears from the scraped table (as a tombstone). Each scrape that
+    changes anything gets a new history reference number; the history state
+    for reference N is every entry with ``ref <= N`` replayed in order,
+    sorted by rank.
+
+    Every write also saves the newest state with the log position it
+    reflects to ``checkpoint.json``, so reading the newest state only
+    replays the entries written after it. A checkpoint whose segment was
+    replaced by compaction is ignored until the next write.
+    """
+
+    def __init__(self, directory):
+        self.log = SegmentedLog(
+            directory,
+            prefix="history",
+            max_records=int(os.getenv("HISTORY_SEGMENT_MAX_RECORDS", "50000")),
+            max_bytes=int(os.getenv("HISTORY_SEGMENT_MAX_BYTES", str(8 * 1024 * 1024))),
+        )
+        self.checkpoint_path = os.path.join(directory, CHECKPOINT_NAME)
+
+    @staticmethod
+    def _apply(state, entry):
+        key = tuple(entry["key"])
+        if entry.get("removed"):
+            state.pop(key, None)
+        else:
+            state[key] = entry
+
+    @staticmethod
+    def _ordered_rows(state):
+        return [entry["row"] for entry in sorted(state.values(), key=lambda e: e["rank"])]
+
+    def current_ref(self):
+        """
+        Return the newest history reference number, or 0 for an empty log.
+
+        Compaction writes no entries for a kept reference whose state equals
+        the one before it, so the highest reference it kept is stored in the
+        manifest as well.
+        """
+        last = self.log.last_record()
+        return max(last["ref"] if last else 0, self.log.attributes().get("ref", 0))
+
+    def _load_checkpoint(self, ref=None):
+        """
+        Return the state saved in the checkpoint and an iterator over the entries written after it.
+
+        Falls back to an empty state and the whole log when there is no
+        usable checkpoint, or when it is newer than reference ``ref``.
+        """
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+            if ref is None or checkpoint["ref"] <= ref:
+                entries = self.log.records_after(checkpoint["position"])
+                if entries is not None:
+                    return {tuple(entry["key"]): entry for entry in checkpoint["entries"]}, entries
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError, IndexError) as e:
+            logger.warning(f"Ignoring unreadable history checkpoint {self.checkpoint_path}: {str(e)}")
+        return {}, self.log.iter_records()
+
+    def _save_checkpoint(self, state, ref):
+        """Save ``state``, the state as of reference ``ref`` at the end of the log, as the checkpoint."""
+        try:
+            write_json_atomic(self.checkpoint_path, {
+                "ref": ref,
+                "position": self.log.end_position(),
+                "entries": list(state.values()),
+            })
+        except OSError as e:
+            logger.warning(f"Could not write the history checkpoint {self.checkpoint_path}: {str(e)}")
+
+    def load_state(self, ref=None):
+        """Return the state (key -> entry) as of reference ``ref`` (default: newest)."""
+        state, entries = self._load_checkpoint(ref)
+        for entry in entries:
+            if ref is not None and entry["ref"] > ref:
+                break
+            self._apply(state, entry)
+        return state
+
+    def rows_at(self, ref):
+        """Return the history rows, in scraped order, as of reference ``ref``."""
+        return self._ordered_rows(self.load_state(ref))
+
+    def iter_rows_at(self, refs):
+        """
+        Yield the history rows for each reference in ``refs``.
+
+        References are expected in non-decreasing order, as snapshots store
+        them, so the log is replayed only once.
+        """
+        entries = self.log.iter_records()
+        pending = next(entries, None)
+        state = {}
+        applied = 0
+        rows = []
+        for ref in refs:
+            if ref < applied:
+                yield self.rows_at(ref)
+                continue
+            changed = False
+            while pending is not None and pending["ref"] <= ref:
+                self._apply(state, pending)
+                changed = True
+                pending = next(entries, None)
+            if changed:
+                rows = self._ordered_rows(state)
+            applied = ref
+            yield list(rows)
+
+    def compact(self, refs, compress=True):
+        """
+        Rewrite the log with only what the history states of ``refs`` need.
+
+        Reference numbers are kept, so snapshots pointing at one of ``refs``
+        stay valid; all changes between two kept references are collapsed
+        into one set of entries. The highest reference ever issued is kept
+        too, so references issued later are still above every stored one.
+        """
+        newest = max([self.current_ref()] + list(refs))
+        refs = sorted(set(refs))
+        entries = []
+        state = {}
+        for ref, rows in zip(refs, self.iter_rows_at(refs)):
+            changes = diff_history(state, rows, ref)
+            for entry in changes:
+                self._apply(state, entry)
+            entries.extend(changes)
+        self.log.rewrite(entries, compress=compress, attributes={"ref": newest})
+        if entries:
+            self._save_checkpoint(state, newest)
+
+    def record(self, rows, after=0):
+        """
+        Record the rows of one scrape and return the history reference that describes them.
+
+        Only new, changed and removed rows are written. If nothing changed,
+        the current reference is returned and nothing is written. A new
+        reference is always above ``after``, the newest reference already in
+        use by the caller.
+        """
+        current = max(self.current_ref(), after)
+        state = self.load_state()
+        entries = diff_history(state, rows, current + 1)
+        if not entries:
+            return current
+
+        self.log.append_many(entries)
+        for entry in entries:
+            self._apply(state, entry)
+        self._save_checkpoint(state, current + 1)
+        logger.info(f"Recorded {len(entries)} history changes as reference {current + 1}")
+        return current + 1
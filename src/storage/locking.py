@@ -0,0 +1,59 @@
+"""
+Advisory file locks that serialize writers across processes and containers.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, writers are not serialized across processes
+    fcntl = None
+
+LOCK_NAME = ".write.lock"
+
+_held = threading.local()
+
+
+@contextmanager
+def write_lock(directory):
+    """
+    Hold the exclusive write lock of ``directory``.
+
+    The lock is an flock on ``<directory>/.write.lock``, so it is shared by
+    every process that mounts the directory, including the web and
+    scheduler containers. Only writers take it; readers rely on atomic
+    commits and never block. The lock is reentrant within a thread.
+    """
+    path = os.path.abspath(os.path.join(directory, LOCK_NAME))
+    held = getattr(_held, "paths", None)
+    if held is None:
+        held = _held.paths = set()
+    if path in held:
+        yield
+        return
+
+    os.makedirs(directory, exist_ok=True)
+    with file_lock(path):
+        held.add(path)
+        try:
+            yield
+        finally:
+            held.discard(path)
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive flock on ``path``, creating the file if needed. Not reentrant."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
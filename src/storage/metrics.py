@@ -0,0 +1,255 @@
+"""
+Metrics shared by the web, scheduler and scraper processes, and a profiling hook.
+
+Every process keeps its counters, gauges and histograms in memory and
+regularly adds them to one JSON file in the data directory, under a file
+lock. The web app renders that file in the Prometheus text format, so one
+scrape of ``/metrics`` covers every process and container sharing the
+directory.
+"""
+
+import os
+import json
+import time
+import atexit
+import cProfile
+import logging
+import threading
+from contextlib import contextmanager
+from src.storage.locking import file_lock
+from src.storage.segments import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SCRAPE_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# Name: (type, help, histogram buckets)
+METRICS = {
+    "devin_credit_http_request_duration_seconds": (
+        "histogram", "Time to handle an HTTP request, by route.", SECONDS_BUCKETS),
+    "devin_credit_store_load_duration_seconds": (
+        "histogram", "Time to read and parse stored snapshots or rollups.", SECONDS_BUCKETS),
+    "devin_credit_store_bytes": (
+        "gauge", "Bytes the stored snapshots and their history take on disk.", None),
+    "devin_credit_response_cache_lookups_total": (
+        "counter", "Response cache lookups: hit (process memory), shared (built by another worker) or miss.", None),
+    "devin_credit_scrapes_total": (
+        "counter", "Scraper runs by fetch mode and result (success, unchanged or failure).", None),
+    "devin_credit_scrape_duration_seconds": (
+        "histogram", "Duration of scraper runs.", SCRAPE_BUCKETS),
+    "devin_credit_scrape_phase_duration_seconds": (
+        "histogram", "Duration of each phase of scraper runs.", SCRAPE_BUCKETS),
+    "devin_credit_last_scrape_timestamp_seconds": (
+        "gauge", "Unix time of the last scraper run, by result.", None),
+    "devin_credit_scheduler_jobs_total": (
+        "counter", "Scheduler job runs by job and result.", None),
+    "devin_credit_scheduler_next_scrape_delay_seconds": (
+        "gauge", "Delay the scheduler planned until the next scrape.", None),
+}
+
+
+def _key(labels):
+    return json.dumps(sorted((labels or {}).items()))
+
+
+class Metrics:
+    """
+    Metrics of one process, published to the shared file at ``path``.
+
+    ``inc``, ``set`` and ``observe`` only touch memory. ``flush`` adds the
+    counts gathered since the previous flush to the file (and overwrites
+    gauges) under ``<path>.lock``; ``maybe_flush`` does so at most every
+    ``flush_interval`` seconds. Counts pending in a process that forks
+    stay with the parent, so they are never published twice.
+    """
+
+    def __init__(self, path, flush_interval=5.0, enabled=True):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._pending = {}
+        self._flushed_at = time.monotonic()
+
+    def _samples(self, name):
+        if os.getpid() != self._pid:
+            self._reset()
+        return self._pending.setdefault(name, {})
+
+    def inc(self, name, labels=None, value=1):
+        """Add ``value`` to a counter."""
+        if not self.enabled:
+            return
+        with self._lock:
+            samples = self._samples(name)
+            key = _key(labels)
+            samples[key] = samples.get(key, 0) + value
+
+    def set(self, name, value, labels=None):
+        """Set a gauge."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._samples(name)[_key(labels)] = value
+
+    def observe(self, name, value, labels=None):
+        """Record one observation in a histogram."""
+        if not self.enabled:
+            return
+        buckets = METRICS[name][2]
+        with self._lock:
+            samples = self._samples(name)
+            key = _key(labels)
+            histogram = samples.get(key)
+            if histogram is None:
+                histogram = samples[key] = {"buckets": [0] * len(buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+                    break
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def flush(self):
+        """Publish everything recorded since the previous flush."""
+        with self._lock:
+            if os.getpid() != self._pid:
+                self._reset()
+            pending = self._pending
+            self._pending = {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with file_lock(self.path + ".lock"):
+                state = load_state(self.path)
+                for name, samples in pending.items():
+                    kind = METRICS[name][0]
+                    stored = state.setdefault(name, {})
+                    for key, value in samples.items():
+                        if kind == "gauge" or key not in stored:
+                            stored[key] = value
+                        elif kind == "counter":
+                            stored[key] += value
+                        elif len(stored[key]["buckets"]) != len(value["buckets"]):
+                            # The buckets changed between versions; start over
+                            stored[key] = value
+                        else:
+                            stored[key]["buckets"] = [a + b for a, b in zip(stored[key]["buckets"], value["buckets"])]
+                            stored[key]["sum"] += value["sum"]
+                            stored[key]["count"] += value["count"]
+                write_json_atomic(self.path, state)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Could not publish metrics to {self.path}: {str(e)}")
+
+    def maybe_flush(self):
+        """Flush if the last flush is at least ``flush_interval`` seconds ago."""
+        if self.enabled and time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+
+def load_state(path):
+    """Return the published metrics in ``path``, or an empty dict if there are none yet."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(state):
+    """Render published metrics (as returned by ``load_state``) in the Prometheus text format."""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        samples = state.get(name)
+        if not samples:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for key, value in sorted(samples.items()):
+            labels = [tuple(pair) for pair in json.loads(key)]
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, value["buckets"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {value['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """
+    Return this process's metrics.
+
+    They are published to METRICS_FILE (default ``data/metrics.json``)
+    every METRICS_FLUSH_SECONDS and when the process exits.
+    METRICS_ENABLED=false turns recording off.
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics(
+                os.getenv("METRICS_FILE", os.path.join("data", "metrics.json")),
+                flush_interval=float(os.getenv("METRICS_FLUSH_SECONDS", "5")),
+                enabled=os.getenv("METRICS_ENABLED", "true").lower() == "true"
+            )
+            atexit.register(_metrics.flush)
+        return _metrics
+
+
+def dump_profile(profiler, path):
+    """Write the stats of a cProfile profiler to ``path``; returns whether that worked."""
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        profiler.dump_stats(path)
+    except OSError as e:
+        logger.warning(f"Could not write the profile to {path}: {str(e)}")
+        return False
+    logger.info(f"Profile written to {path}")
+    return True
+
+
+@contextmanager
+def profile(path):
+    """
+    Run the enclosed block under cProfile and dump the stats to ``path``.
+
+    Read them with ``python -m pstats <path>`` or a viewer such as snakeviz.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        dump_profile(profiler, path)
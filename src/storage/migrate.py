@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+One-shot migration of existing credit data into the SQLite storage engine.
+
+Usage:
+    python -m src.storage.migrate [SOURCE] [--db PATH]
+
+SOURCE is either a legacy credit_data.json file or a data directory that
+holds the segmented snapshot store (default: data). Snapshots are
+normalized on the way in, as the scraper does before saving, so ACU amounts
+are stored as numbers.
+"""
+
+import os
+import json
+import logging
+import argparse
+from src.storage.store import SnapshotStore, SQLITE_DATA_FILE
+from src.storage.sqlite_store import SqliteSnapshotStore
+from src.storage.normalize import normalize_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def load_source(source):
+    """Load all snapshots from a credit_data.json file or a snapshot store directory."""
+    if os.path.isfile(source):
+        with open(source, 'r') as f:
+            return json.load(f)
+    return SnapshotStore(source).load_all()
+
+
+def migrate(source, db_path):
+    """Import every snapshot from ``source`` into the SQLite database at ``db_path``."""
+    target = SqliteSnapshotStore(db_path)
+    if target.latest() is not None:
+        raise RuntimeError(f"{db_path} already contains snapshots; refusing to import twice")
+
+    snapshots = [normalize_snapshot(snapshot) for snapshot in load_source(source)]
+    target.append_many(snapshots)
+    logger.info(f"Imported {len(snapshots)} snapshots from {source} into {db_path}")
+    return len(snapshots)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import existing credit data into SQLite.")
+    parser.add_argument("source", nargs="?", default="data",
+                        help="credit_data.json file or data directory (default: data)")
+    parser.add_argument("--db", default=os.path.join("data", SQLITE_DATA_FILE),
+                        help="SQLite database to create (default: data/credit_data.db)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    migrate(args.source, args.db)
+
+
+if __name__ == "__main__":
+    main()
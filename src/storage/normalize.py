@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Normalization of scraped credit data into typed values.
+
+The scraper extracts display strings ("1,234.5 ACUs", "Jan 5, 2025, 10:30
+AM"). Before a snapshot is saved they are turned into numbers and ISO-8601
+UTC timestamps, and the usage history is sorted newest first, so readers
+never have to parse or sort anything. Normalized snapshots carry
+``schema_version``.
+
+Existing data can be rewritten once with:
+    python -m src.storage.normalize [DATA_DIR]
+"""
+
+import os
+import re
+import json
+import shutil
+import hashlib
+import logging
+import argparse
+from datetime import datetime, timezone
+from src.storage.segments import fsync_directory
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+NUMBER_PATTERN = re.compile(r"-?\d[\d,]*(?:\.\d+)?")
+
+# Display formats seen in the usage history, tried after ISO-8601
+TIMESTAMP_FORMATS = (
+    "%Y-%m-%d %H:%M",
+    "%Y/%m/%d %H:%M:%S",
+    "%Y/%m/%d %H:%M",
+    "%m/%d/%Y, %I:%M:%S %p",
+    "%m/%d/%Y, %I:%M %p",
+    "%m/%d/%Y %I:%M:%S %p",
+    "%m/%d/%Y %I:%M %p",
+    "%m/%d/%Y %H:%M",
+    "%b %d, %Y, %I:%M %p",
+    "%b %d, %Y %I:%M %p",
+    "%B %d, %Y, %I:%M %p",
+    "%B %d, %Y %I:%M %p",
+    "%b %d, %Y",
+    "%B %d, %Y",
+    "%m/%d/%Y",
+)
+
+
+def parse_acus(value):
+    """Return an ACU amount such as "1,234.5 ACUs" as a number, or None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    match = NUMBER_PATTERN.search(str(value or ""))
+    if not match:
+        return None
+    number = float(match.group(0).replace(",", ""))
+    return int(number) if number.is_integer() else number
+
+
+def parse_timestamp(value):
+    """
+    Return a timestamp as an ISO-8601 UTC string ("2025-01-05T10:30:00Z"), or None.
+
+    Values without a time zone are taken as local time of the scraper host,
+    which is where both ``datetime.now()`` and the browser render them.
+    """
+    text = str(value or "").strip()
+    if not text:
+        return None
+
+    parsed = None
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        for fmt in TIMESTAMP_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+    if parsed is None:
+        return None
+
+    return parsed.astimezone(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+def _typed(target, name, value, parse):
+    """Store ``parse(value)`` under ``name``, keeping the original text if it could not be parsed."""
+    if f"{name}_text" in target:
+        value = target[f"{name}_text"]
+    parsed = parse(value)
+    target[name] = parsed
+    if parsed is None and value not in (None, ""):
+        target[f"{name}_text"] = str(value)
+    else:
+        target.pop(f"{name}_text", None)
+
+
+def normalize_row(row):
+    """Return a usage history row with a UTC ``created_at`` and numeric ``acus_used``."""
+    normalized = dict(row)
+    normalized["session_name"] = str(row.get("session_name") or "Unknown").strip()
+    _typed(normalized, "created_at", row.get("created_at"), parse_timestamp)
+    _typed(normalized, "acus_used", row.get("acus_used"), parse_acus)
+    return normalized
+
+
+def history_key(row):
+    """Identity of a history row, the same for raw and normalized rows."""
+    created_at = parse_timestamp(row.get("created_at")) or row.get("created_at_text") or row.get("created_at")
+    return (row.get("session_name"), created_at)
+
+
+def sort_history(rows):
+    """Sort normalized rows newest first; rows without a creation time keep their order at the end."""
+    return sorted(rows, key=lambda row: row.get("created_at") or "", reverse=True)
+
+
+def normalize_snapshot(snapshot):
+    """
+    Return ``snapshot`` with typed values and its history sorted newest first.
+
+    Snapshots that already have the current ``schema_version`` are returned
+    unchanged, so this is cheap to call on data of mixed age.
+    """
+    if snapshot.get("schema_version") == SCHEMA_VERSION:
+        return snapshot
+
+    normalized = dict(snapshot)
+    normalized["schema_version"] = SCHEMA_VERSION
+    normalized["timestamp"] = parse_timestamp(snapshot.get("timestamp")) or snapshot.get("timestamp")
+
+    current_usage = dict(snapshot.get("current_usage") or {})
+    if "timestamp" in current_usage:
+        current_usage["timestamp"] = parse_timestamp(current_usage["timestamp"]) or current_usage["timestamp"]
+    _typed(current_usage, "available_acus", current_usage.get("available_acus"), parse_acus)
+    normalized["current_usage"] = current_usage
+
+    if "usage_history" in snapshot:
+        normalized["usage_history"] = sort_history(
+            normalize_row(row) for row in snapshot.get("usage_history") or []
+        )
+    return normalized
+
+
+def content_hash(snapshot):
+    """
+    Return a hash of what a scrape observed: the current usage and the usage history.
+
+    Timestamps of the snapshot and of its current usage, and the scrape
+    timings, are left out, so two snapshots with the same hash differ only
+    in when they were taken. The order of the history rows does not matter.
+    """
+    snapshot = normalize_snapshot(snapshot)
+    current_usage = {
+        key: value for key, value in (snapshot.get("current_usage") or {}).items() if key != "timestamp"
+    }
+    rows = sorted(
+        json.dumps(row, sort_keys=True, separators=(',', ':')) for row in snapshot.get("usage_history") or []
+    )
+    content = json.dumps([current_usage, rows], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def backfill(data_dir="data"):
+    """
+    Rewrite the store in ``data_dir`` with every snapshot normalized.
+
+    The store is rebuilt next to the original and swapped in; the original
+    files are kept with a ``.pre-normalize`` suffix. Writers are locked out
+    while it runs, but readers keep the old files open, so stop the
+    scheduler and web server first. Returns the number of snapshots rewritten, or 0
+    when everything is already normalized.
+    """
+    from src.storage.store import open_store
+
+    store = open_store(data_dir)
+    with store.lock():
+        return _rewrite(store, data_dir)
+
+
+def _rewrite(store, data_dir):
+    from src.storage.store import SnapshotStore
+    from src.storage.sqlite_store import SqliteSnapshotStore
+
+    snapshots = store.load_all()
+    if all(snapshot.get("schema_version") == SCHEMA_VERSION for snapshot in snapshots):
+        logger.info(f"All {len(snapshots)} snapshots in {data_dir} are already normalized")
+        return 0
+    normalized = [normalize_snapshot(snapshot) for snapshot in snapshots]
+
+    if isinstance(store, SqliteSnapshotStore):
+        paths = [store.db_path]
+        staging = store.db_path + ".normalize"
+        targets = [staging]
+        SqliteSnapshotStore(staging).append_many(normalized)
+        # Carry the WAL sidecar files of the old database along with it
+        paths += [store.db_path + suffix for suffix in ("-wal", "-shm") if os.path.exists(store.db_path + suffix)]
+    else:
+        staging = os.path.join(data_dir, ".normalize")
+        shutil.rmtree(staging, ignore_errors=True)
+        SnapshotStore(staging).append_many(normalized)
+        paths = [os.path.join(data_dir, name) for name in ("snapshots", "history")]
+        targets = [os.path.join(staging, name) for name in ("snapshots", "history")]
+
+    for path in paths:
+        if os.path.exists(path + ".pre-normalize"):
+            raise RuntimeError(f"{path}.pre-normalize already exists; remove it before normalizing again")
+    for path in paths:
+        if os.path.exists(path):
+            os.replace(path, path + ".pre-normalize")
+    for target, path in zip(targets, paths):
+        os.replace(target, path)
+    if not isinstance(store, SqliteSnapshotStore):
+        # Only the lock file of the staging store is left in it
+        shutil.rmtree(staging)
+        if os.path.exists(store.legacy_file):
+            os.replace(store.legacy_file, store.legacy_file + ".migrated")
+    fsync_directory(data_dir)
+
+    logger.info(f"Normalized {len(normalized)} snapshots in {data_dir}")
+    return len(normalized)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalize stored credit data into typed values.")
+    parser.add_argument("data_dir", nargs="?", default="data",
+                        help="data directory of the store to rewrite (default: data)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    backfill(args.data_dir)
+
+
+if __name__ == "__main__":
+    main()
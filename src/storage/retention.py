@@ -0,0 +1,127 @@
+"""
+Retention policy and compaction of stored snapshots.
+
+Recent snapshots are kept at full resolution; older ones are thinned out
+to one per day and then one per week, so the size of the store and the
+time to load it stay bounded while it keeps growing.
+"""
+
+import os
+import time
+import logging
+import argparse
+from datetime import datetime, timezone, timedelta
+from src.storage.normalize import parse_timestamp
+from src.storage.rollups import Rollups
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionPolicy:
+    """
+    Which snapshots to keep, by age.
+
+    Every snapshot younger than ``full_days`` is kept. Up to ``daily_days``
+    the newest snapshot of each day is kept, and beyond that the newest of
+    each ISO week. Snapshots older than ``max_days`` are dropped (0 keeps
+    them at weekly resolution forever). The newest snapshot is always
+    kept, and so are snapshots whose timestamp cannot be parsed.
+    """
+
+    def __init__(self, full_days=30, daily_days=365, max_days=0):
+        self.full_days = full_days
+        self.daily_days = max(daily_days, full_days)
+        self.max_days = max_days
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            full_days=int(os.getenv("RETENTION_FULL_DAYS", "30")),
+            daily_days=int(os.getenv("RETENTION_DAILY_DAYS", "365")),
+            max_days=int(os.getenv("RETENTION_MAX_DAYS", "0")),
+        )
+
+    def select(self, timestamps, now=None):
+        """Return the indexes of the snapshots to keep, given their timestamps oldest first."""
+        now = now or datetime.now(timezone.utc)
+        keep = set()
+        buckets = {}
+        for i, timestamp in enumerate(timestamps):
+            parsed = parse_timestamp(timestamp) if timestamp else None
+            if parsed is None:
+                keep.add(i)
+                continue
+            taken_at = datetime.fromisoformat(parsed.replace("Z", "+00:00"))
+            age = now - taken_at
+            if age <= timedelta(days=self.full_days):
+                keep.add(i)
+            elif age <= timedelta(days=self.daily_days):
+                buckets[("day", taken_at.date())] = i
+            elif not self.max_days or age <= timedelta(days=self.max_days):
+                buckets[("week", taken_at.isocalendar()[:2])] = i
+        # Snapshots are oldest first, so each bucket ends up with its newest snapshot
+        keep.update(buckets.values())
+        if timestamps:
+            keep.add(len(timestamps) - 1)
+        return keep
+
+
+def compact(data_dir="data", policy=None, compress=None, now=None):
+    """
+    Apply the retention policy to the store in ``data_dir`` and rebuild its rollups.
+
+    Runs under the store's write lock, so it is safe while the web server
+    reads and the scheduler scrapes. Sealed segments of the JSON Lines
+    store are gzip-compressed unless SNAPSHOT_COMPRESS_SEGMENTS=false.
+    Returns a summary of what was done.
+    """
+    from src.storage.store import open_store
+
+    policy = policy or RetentionPolicy.from_env()
+    if compress is None:
+        compress = os.getenv("SNAPSHOT_COMPRESS_SEGMENTS", "true").lower() == "true"
+
+    store = open_store(data_dir)
+    start = time.perf_counter()
+    with store.lock():
+        if store.version() is None:
+            return {"data_dir": data_dir, "before": 0, "after": 0}
+        size_before = store.size()
+        counts = {}
+
+        def select(timestamps):
+            counts["before"] = len(timestamps)
+            return policy.select(timestamps, now=now)
+
+        kept = store.compact(select, compress=compress)
+        rollups = Rollups(store.data_dir)
+        rollups.save(rollups.rebuild(store))
+        size_after = store.size()
+
+    summary = {
+        "data_dir": data_dir,
+        "before": counts.get("before", 0),
+        "after": kept,
+        "bytes_before": size_before,
+        "bytes_after": size_after,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    logger.info(
+        f"Compacted {data_dir}: kept {kept} of {summary['before']} snapshots, "
+        f"{size_before} -> {size_after} bytes in {summary['seconds']}s"
+    )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the snapshot retention policy and compact the store.")
+    parser.add_argument("data_dir", nargs="?", default="data",
+                        help="data directory of the store to compact (default: data)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    compact(args.data_dir)
+
+
+if __name__ == "__main__":
+    main()
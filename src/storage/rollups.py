@@ -0,0 +1,185 @@
+"""
+Materialized usage rollups: ACUs used per day, week, month and session, and
+the available ACUs trend.
+"""
+
+import os
+import json
+import logging
+from datetime import date, timedelta
+from src.storage.segments import write_json_atomic
+from src.storage.history import row_keys
+from src.storage.normalize import normalize_snapshot
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS_FILE = "rollups.json"
+PERIODS = ("day", "week", "month")
+
+
+def period_start(created_at, period):
+    """Return the first day of the ``period`` that an ISO-8601 ``created_at`` falls in, or None."""
+    if not created_at:
+        return None
+    if period == "month":
+        return created_at[:7] + "-01"
+    day = created_at[:10]
+    if period == "week":
+        start = date.fromisoformat(day)
+        return (start - timedelta(days=start.weekday())).isoformat()
+    return day
+
+
+def _jsonable(version):
+    """Return the store version as it reads back from JSON, so the two compare equal."""
+    return json.loads(json.dumps(version))
+
+
+class Rollups:
+    """
+    Rollups of one data directory, kept in ``rollups.json``.
+
+    The file holds each history row's contribution together with the
+    per-period and per-session totals, and the store version it reflects.
+    ``update`` applies one new snapshot by adjusting the totals for the rows
+    that changed since the previous one. When the file does not match the
+    store (written by an older version, or the store was migrated or
+    rewritten), ``current`` rebuilds it from all snapshots once.
+    """
+
+    def __init__(self, data_dir="data"):
+        self.path = os.path.join(data_dir, ROLLUPS_FILE)
+
+    @staticmethod
+    def empty():
+        return {
+            "format": 1,
+            "version": None,
+            "rows": {},
+            "periods": {period: {} for period in PERIODS},
+            "sessions": {},
+            "available_acus": [],
+        }
+
+    def load(self):
+        """Return the stored rollups, or empty rollups if there are none."""
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+            if state.get("format") == 1:
+                return state
+        except (FileNotFoundError, ValueError):
+            pass
+        return self.empty()
+
+    @staticmethod
+    def _add(state, row, sign):
+        acus = row["acus_used"] * sign
+        totals = [state["sessions"].setdefault(row["session_name"], {"acus_used": 0, "count": 0})]
+        for period in PERIODS:
+            start = period_start(row["created_at"], period)
+            if start:
+                totals.append(state["periods"][period].setdefault(start, {"acus_used": 0, "count": 0}))
+        for total in totals:
+            total["acus_used"] = round(total["acus_used"] + acus, 6)
+            total["count"] += sign
+
+        if state["sessions"][row["session_name"]]["count"] == 0:
+            del state["sessions"][row["session_name"]]
+        for period in PERIODS:
+            start = period_start(row["created_at"], period)
+            if start and state["periods"][period][start]["count"] == 0:
+                del state["periods"][period][start]
+
+    @classmethod
+    def apply(cls, state, snapshot):
+        """Apply one normalized snapshot to ``state`` in place."""
+        rows = snapshot.get("usage_history") or []
+        contributions = {}
+        for key, row in zip(row_keys(rows), rows):
+            contributions[json.dumps(key)] = {
+                "session_name": row.get("session_name"),
+                "created_at": row.get("created_at"),
+                "acus_used": row.get("acus_used") or 0,
+            }
+
+        previous = state["rows"]
+        for key, row in previous.items():
+            if contributions.get(key) != row:
+                cls._add(state, row, -1)
+        for key, row in contributions.items():
+            if previous.get(key) != row:
+                cls._add(state, row, 1)
+        state["rows"] = contributions
+
+        state["available_acus"].append({
+            "timestamp": snapshot.get("timestamp"),
+            "available_acus": (snapshot.get("current_usage") or {}).get("available_acus"),
+        })
+        return state
+
+    def rebuild(self, store):
+        """Compute the rollups of every snapshot in ``store``."""
+        version = store.version()
+        state = self.empty()
+        for snapshot in store.iter_snapshots():
+            self.apply(state, normalize_snapshot(snapshot))
+        state["version"] = _jsonable(version)
+        return state
+
+    def save(self, state):
+        write_json_atomic(self.path, state)
+
+    def update(self, snapshot, previous_version, version):
+        """
+        Apply a snapshot that has just been appended to the store.
+
+        ``previous_version`` and ``version`` are the store versions before
+        and after the append. If the stored rollups are not at
+        ``previous_version`` nothing is written; ``current`` rebuilds them
+        on the next read.
+        """
+        state = self.load()
+        if state["version"] != _jsonable(previous_version):
+            logger.info("Rollups are out of date, leaving them to be rebuilt")
+            return False
+        self.apply(state, normalize_snapshot(snapshot))
+        state["version"] = _jsonable(version)
+        self.save(state)
+        return True
+
+    def current(self, store):
+        """Return rollups matching the current contents of ``store``, rebuilding them if needed."""
+        state = self.load()
+        if state["version"] == _jsonable(store.version()):
+            return state
+
+        logger.info(f"Rebuilding rollups in {self.path}")
+        state = self.rebuild(store)
+        try:
+            self.save(state)
+        except OSError as e:
+            logger.warning(f"Could not save rollups: {str(e)}")
+        return state
+
+
+def usage_by_period(state, period):
+    """Return ACUs used and session count per ``period``, oldest first."""
+    return [
+        {"period_start": start, "acus_used": total["acus_used"], "sessions": total["count"]}
+        for start, total in sorted(state["periods"][period].items())
+    ]
+
+
+def usage_by_session(state):
+    """Return ACUs used per session name, highest first."""
+    sessions = [
+        {"session_name": name, "acus_used": total["acus_used"], "runs": total["count"]}
+        for name, total in state["sessions"].items()
+    ]
+    return sorted(sessions, key=lambda session: session["acus_used"], reverse=True)
+
+
+def available_acus_trend(state):
+    """Return the available ACUs of every snapshot, oldest first."""
+    return state["available_acus"]
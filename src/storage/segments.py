@@ -0,0 +1,272 @@
+"""
+Append-only, segmented JSON Lines log used to store credit snapshots.
+"""
+
+import os
+import gzip
+import json
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = 1
+
+
+def fsync_directory(path):
+    """Flush a directory entry so that renames inside it survive a crash."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_json_atomic(path, data):
+    """
+    Write JSON to a temporary file and rename it over the target.
+
+    The temporary name is unique per call: process IDs alone can collide
+    between containers that share the directory.
+    """
+    tmp_path = f"{path}.tmp.{uuid.uuid4().hex}"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    fsync_directory(os.path.dirname(path) or ".")
+
+
+class SegmentedLog:
+    """
+    Append-only log of JSON records split across rotating segment files.
+
+    Each segment is a JSON Lines file. The manifest records, for every
+    segment, how many records and bytes have been committed; it is rewritten
+    atomically after each append and is the only commit point. Bytes past a
+    segment's committed size belong to an interrupted append: readers never
+    look at them and the next writer truncates them away. There must be one
+    writer at a time; SnapshotStore serializes them with ``write_lock``.
+
+    ``rewrite`` replaces the whole log, e.g. for compaction, writing sealed
+    segments gzip-compressed. Segments it replaces stay on disk, listed as
+    ``retired`` in the manifest, until the next rewrite, so that readers
+    still using the previous manifest can finish. ``attributes`` are kept
+    in the manifest for the owner of the log and survive rewrites.
+    """
+
+    def __init__(self, directory, prefix="segment", max_records=1000, max_bytes=8 * 1024 * 1024):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.manifest_path = os.path.join(directory, MANIFEST_NAME)
+
+    def read_manifest(self):
+        """Return the current manifest, or an empty one if the log is new."""
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"format": MANIFEST_FORMAT, "next_segment": 1, "segments": []}
+
+    def version(self):
+        """
+        Return a token that changes whenever a new record is committed.
+
+        The manifest is replaced by rename on every commit, so its
+        (inode, mtime, size) triple identifies the committed state.
+        """
+        try:
+            st = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def attributes(self):
+        """Return the attributes stored in the manifest by ``rewrite``."""
+        return self.read_manifest().get("attributes", {})
+
+    def count(self):
+        """Return the number of committed records."""
+        return sum(segment["records"] for segment in self.read_manifest()["segments"])
+
+    def append(self, record):
+        """Durably append a single record."""
+        self.append_many([record])
+
+    def append_many(self, records):
+        """Durably append records, rotating to a new segment when the active one is full."""
+        if not records:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        manifest = self.read_manifest()
+
+        for record in records:
+            line = (json.dumps(record, separators=(',', ':')) + "\n").encode("utf-8")
+            segment = manifest["segments"][-1] if manifest["segments"] else None
+
+            if (segment is None or segment.get("compression") or segment["records"] >= self.max_records
+                    or segment["bytes"] >= self.max_bytes):
+                segment = {
+                    "name": f"{self.prefix}-{manifest['next_segment']:06d}.jsonl",
+                    "records": 0,
+                    "bytes": 0,
+                }
+                manifest["next_segment"] += 1
+                manifest["segments"].append(segment)
+
+            self._append_line(segment, line)
+            segment["records"] += 1
+            segment["bytes"] += len(line)
+
+        write_json_atomic(self.manifest_path, manifest)
+
+    def _append_line(self, segment, line):
+        """Append one encoded line to a segment, dropping any uncommitted tail first."""
+        path = os.path.join(self.directory, segment["name"])
+        with open(path, 'ab') as f:
+            if f.tell() != segment["bytes"]:
+                logger.warning(f"Discarding uncommitted bytes at the end of {segment['name']}")
+                f.truncate(segment["bytes"])
+                f.seek(segment["bytes"])
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def rewrite(self, records, compress=True, attributes=None):
+        """
+        Replace the whole log with ``records``.
+
+        The records are written to new segments and committed with a single
+        manifest replace. With ``compress``, every segment but the last one,
+        which takes the next appends, is gzip-compressed. ``attributes``
+        replace the attributes of the manifest in the same commit.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        manifest = self.read_manifest()
+
+        # Nobody has read these since the previous rewrite committed
+        for name in manifest.get("retired", []):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+        chunks = []
+        for record in records:
+            if not chunks or len(chunks[-1]) >= self.max_records:
+                chunks.append([])
+            chunks[-1].append((json.dumps(record, separators=(',', ':')) + "\n").encode("utf-8"))
+
+        segments = []
+        next_segment = manifest["next_segment"]
+        for i, lines in enumerate(chunks):
+            data = b"".join(lines)
+            name = f"{self.prefix}-{next_segment:06d}.jsonl"
+            segment = {"name": name, "records": len(lines)}
+            if compress and i < len(chunks) - 1:
+                data = gzip.compress(data, compresslevel=6, mtime=0)
+                segment["name"] = name + ".gz"
+                segment["compression"] = "gzip"
+            segment["bytes"] = len(data)
+            next_segment += 1
+
+            with open(os.path.join(self.directory, segment["name"]), 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            segments.append(segment)
+
+        write_json_atomic(self.manifest_path, {
+            "format": MANIFEST_FORMAT,
+            "next_segment": next_segment,
+            "segments": segments,
+            "retired": [segment["name"] for segment in manifest["segments"]],
+            "attributes": manifest.get("attributes", {}) if attributes is None else attributes,
+        })
+
+    def size(self):
+        """Return the number of bytes committed in all segments."""
+        return sum(segment["bytes"] for segment in self.read_manifest()["segments"])
+
+    def _read_segment(self, segment):
+        """Yield the committed records of one segment."""
+        path = os.path.join(self.directory, segment["name"])
+        with open(path, 'rb') as f:
+            data = f.read(segment["bytes"])
+        if segment.get("compression") == "gzip":
+            data = gzip.decompress(data)
+        for line in data.splitlines():
+            if line:
+                yield json.loads(line)
+
+    def iter_records(self):
+        """Yield all committed records, oldest first."""
+        for segment in self.read_manifest()["segments"]:
+            yield from self._read_segment(segment)
+
+    def end_position(self):
+        """
+        Return the position after the newest committed record, or None for an empty log.
+
+        A position is a segment name and the number of records before it in
+        that segment. Segment names are never reused, so a position stays
+        valid until a rewrite replaces the segment.
+        """
+        segments = self.read_manifest()["segments"]
+        if not segments:
+            return None
+        return [segments[-1]["name"], segments[-1]["records"]]
+
+    def records_after(self, position):
+        """
+        Return an iterator over the committed records after ``position``.
+
+        Returns None if the segment of ``position`` is no longer part of the
+        log, because a rewrite replaced it.
+        """
+        segments = self.read_manifest()["segments"]
+        names = [segment["name"] for segment in segments]
+        try:
+            index = names.index(position[0])
+        except ValueError:
+            return None
+        if position[1] > segments[index]["records"]:
+            return None
+
+        def records():
+            for i, segment in enumerate(segments[index:]):
+                skip = position[1] if i == 0 else 0
+                if skip == segment["records"]:
+                    continue
+                for n, record in enumerate(self._read_segment(segment)):
+                    if n >= skip:
+                        yield record
+
+        return records()
+
+    def last_record(self):
+        """Return the newest committed record, reading only the newest segment."""
+        segments = [s for s in self.read_manifest()["segments"] if s["records"] > 0]
+        if not segments:
+            return None
+        last = None
+        for last in self._read_segment(segments[-1]):
+            pass
+        return last
@@ -0,0 +1,274 @@
+"""
+SQLite storage engine for credit snapshots and session history.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+from src.storage.history import diff_history
+from src.storage.locking import write_lock
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    available_acus REAL,
+    history_ref INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp ON snapshots (timestamp);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_name TEXT,
+    created_at TEXT,
+    occurrence INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    rank REAL NOT NULL,
+    valid_from INTEGER NOT NULL,
+    valid_to INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_created_at ON sessions (created_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_session_name ON sessions (session_name);
+CREATE INDEX IF NOT EXISTS idx_sessions_validity ON sessions (valid_to, valid_from);
+"""
+
+
+class SqliteSnapshotStore:
+    """
+    Snapshot store backed by a single SQLite database in WAL mode.
+
+    It has the same interface as SnapshotStore. Snapshots are rows in
+    ``snapshots``. Each version of a history row is a row in ``sessions``,
+    valid from the history reference that introduced it up to (excluding)
+    the one that replaced or removed it. WAL mode lets the scheduler commit
+    while the web application keeps reading.
+    """
+
+    def __init__(self, db_path=os.path.join("data", "credit_data.db")):
+        self.db_path = db_path
+        self.data_dir = os.path.dirname(db_path) or "."
+        self._initialized = False
+
+    def _connect(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._initialized:
+            conn.executescript(SCHEMA)
+            self._initialized = True
+        return conn
+
+    @staticmethod
+    def _meta(conn, key):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _set_meta(conn, key, value):
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    @staticmethod
+    def _current_state(conn):
+        state = {}
+        for session_name, created_at, occurrence, version, rank, data in conn.execute(
+            "SELECT session_name, created_at, occurrence, version, rank, data "
+            "FROM sessions WHERE valid_to IS NULL"
+        ):
+            state[(session_name, created_at, occurrence)] = {
+                "version": version, "rank": rank, "row": json.loads(data)
+            }
+        return state
+
+    def _record_history(self, conn, rows):
+        """Apply the rows of one scrape to ``sessions`` and return the history reference."""
+        current = self._meta(conn, "history_ref")
+        ref = current + 1
+        entries = diff_history(self._current_state(conn), rows, ref)
+        if not entries:
+            return current
+
+        for entry in entries:
+            session_name, created_at, occurrence = entry["key"]
+            conn.execute(
+                "UPDATE sessions SET valid_to = ? WHERE valid_to IS NULL "
+                "AND session_name IS ? AND created_at IS ? AND occurrence = ?",
+                (ref, session_name, created_at, occurrence)
+            )
+            if not entry.get("removed"):
+                conn.execute(
+                    "INSERT INTO sessions (session_name, created_at, occurrence, version, rank, valid_from, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (session_name, created_at, occurrence, entry["version"], entry["rank"], ref,
+                     json.dumps(entry["row"]))
+                )
+        self._set_meta(conn, "history_ref", ref)
+        return ref
+
+    def _insert_snapshot(self, conn, snapshot):
+        start = time.perf_counter()
+        record = {key: value for key, value in snapshot.items() if key != "usage_history"}
+        history_ref = self._record_history(conn, snapshot.get("usage_history") or [])
+        if isinstance(record.get("timings"), dict) and "save" not in record["timings"]:
+            record["timings"] = dict(record["timings"], save=round(time.perf_counter() - start, 3))
+        conn.execute(
+            "INSERT INTO snapshots (timestamp, available_acus, history_ref, data) VALUES (?, ?, ?, ?)",
+            (record.get("timestamp", ""), (record.get("current_usage") or {}).get("available_acus"),
+             history_ref, json.dumps(record))
+        )
+        self._set_meta(conn, "generation", self._meta(conn, "generation") + 1)
+
+    def append(self, snapshot):
+        """
+        Durably append one snapshot.
+
+        As with SnapshotStore, a ``timings`` dict gets the time spent storing
+        the snapshot as ``save``.
+        """
+        self.append_many([snapshot])
+
+    def lock(self):
+        """
+        Return the cross-process write lock of the data directory.
+
+        SQLite serializes the database writes itself; the lock lets callers
+        keep files next to the database (such as the rollups) in step with it.
+        """
+        return write_lock(self.data_dir)
+
+    def append_many(self, snapshots):
+        """Append several snapshots in a single transaction."""
+        conn = self._connect()
+        try:
+            with conn:
+                # Take the write lock up front: the history diff reads the current state before writing
+                conn.execute("BEGIN IMMEDIATE")
+                for snapshot in snapshots:
+                    self._insert_snapshot(conn, snapshot)
+        finally:
+            conn.close()
+
+    def compact(self, select, compress=True):
+        """
+        Delete the snapshots not chosen by ``select``, and the session versions only they used.
+
+        ``select`` gets the timestamps of all snapshots, oldest first, and
+        returns the set of indexes to keep. The database is vacuumed
+        afterwards to give the space back; ``compress`` does not apply.
+        Returns the number of snapshots kept.
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                rows = conn.execute("SELECT id, timestamp, history_ref FROM snapshots ORDER BY id").fetchall()
+                keep = select([timestamp for _, timestamp, _ in rows])
+                conn.executemany(
+                    "DELETE FROM snapshots WHERE id = ?",
+                    [(snapshot_id,) for i, (snapshot_id, _, _) in enumerate(rows) if i not in keep]
+                )
+                conn.execute("CREATE TEMP TABLE kept_refs (ref INTEGER PRIMARY KEY)")
+                conn.executemany(
+                    "INSERT OR IGNORE INTO kept_refs (ref) VALUES (?)",
+                    [(history_ref,) for i, (_, _, history_ref) in enumerate(rows) if i in keep]
+                )
+                # Current rows stay: the next scrape is diffed against them
+                conn.execute(
+                    "DELETE FROM sessions WHERE valid_to IS NOT NULL AND NOT EXISTS ("
+                    "SELECT 1 FROM kept_refs WHERE ref >= sessions.valid_from AND ref < sessions.valid_to)"
+                )
+                conn.execute("DROP TABLE kept_refs")
+                self._set_meta(conn, "generation", self._meta(conn, "generation") + 1)
+            conn.execute("VACUUM")
+            return len(keep)
+        finally:
+            conn.close()
+
+    def size(self):
+        """Return the number of bytes the database takes on disk."""
+        return sum(
+            os.path.getsize(self.db_path + suffix)
+            for suffix in ("", "-wal") if os.path.exists(self.db_path + suffix)
+        )
+
+    def version(self):
+        """
+        Return a token that changes whenever a snapshot is committed.
+
+        An empty database has no version, like a missing one: a reader can
+        create the database before the first snapshot is written.
+        """
+        if not os.path.exists(self.db_path):
+            return None
+        conn = self._connect()
+        try:
+            generation = self._meta(conn, "generation")
+        finally:
+            conn.close()
+        return ("sqlite", generation) if generation else None
+
+    @staticmethod
+    def _rows_at(conn, ref):
+        return [
+            json.loads(data) for (data,) in conn.execute(
+                "SELECT data FROM sessions WHERE valid_from <= ? AND (valid_to IS NULL OR valid_to > ?) "
+                "ORDER BY rank",
+                (ref, ref)
+            )
+        ]
+
+    @staticmethod
+    def _expand(data, rows):
+        snapshot = json.loads(data)
+        snapshot["usage_history"] = rows
+        return snapshot
+
+    def iter_snapshots(self):
+        """
+        Yield all snapshots, oldest first.
+
+        Snapshots are read from the cursor as they are yielded, inside one
+        read transaction, so the whole table is never held in memory and a
+        concurrent write does not show up halfway through.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            rows_ref, rows = None, []
+            for history_ref, data in conn.execute("SELECT history_ref, data FROM snapshots ORDER BY id"):
+                if history_ref != rows_ref:
+                    rows_ref, rows = history_ref, self._rows_at(conn, history_ref)
+                yield self._expand(data, list(rows))
+        finally:
+            conn.close()
+
+    def load_all(self):
+        """Return all snapshots as a list, oldest first."""
+        return list(self.iter_snapshots())
+
+    def latest(self):
+        """Return the newest snapshot, or None if nothing has been stored yet."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT history_ref, data FROM snapshots ORDER BY id DESC LIMIT 1").fetchone()
+            if row is None:
+                return None
+            history_ref, data = row
+            return self._expand(data, self._rows_at(conn, history_ref))
+        finally:
+            conn.close()
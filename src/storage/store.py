@@ -0,0 +1,199 @@
+"""
+Snapshot storage shared by the scraper and the web application.
+"""
+
+import os
+import json
+import time
+import logging
+import itertools
+from src.storage.segments import SegmentedLog
+from src.storage.history import HistoryLog
+from src.storage.locking import write_lock
+
+logger = logging.getLogger(__name__)
+
+LEGACY_DATA_FILE = "credit_data.json"
+SQLITE_DATA_FILE = "credit_data.db"
+
+
+def open_store(data_dir="data"):
+    """
+    Open the snapshot store configured by STORAGE_BACKEND.
+
+    ``jsonl`` (the default) uses the segmented log in SnapshotStore;
+    ``sqlite`` uses SqliteSnapshotStore with ``credit_data.db`` in the same
+    data directory.
+    """
+    backend = os.getenv("STORAGE_BACKEND", "jsonl").lower()
+    if backend == "sqlite":
+        from src.storage.sqlite_store import SqliteSnapshotStore
+        return SqliteSnapshotStore(os.path.join(data_dir, SQLITE_DATA_FILE))
+    if backend != "jsonl":
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+    return SnapshotStore(data_dir)
+
+
+class SnapshotStore:
+    """
+    Durable, append-only store of scraped credit snapshots.
+
+    Snapshots live in a SegmentedLog under ``<data_dir>/snapshots`` and keep
+    only their own fields plus a ``history_ref``; the usage history rows they
+    were scraped with are stored once in a HistoryLog under
+    ``<data_dir>/history`` and rebuilt on read, so callers always see the
+    original ``usage_history`` list. A legacy ``credit_data.json`` found in the
+    data directory is imported on the first write and read directly until then.
+
+    Writers, in any process, are serialized by an advisory lock on the data
+    directory. Readers take no lock: they only ever see committed data.
+    """
+
+    def __init__(self, data_dir="data"):
+        self.data_dir = data_dir
+        self.legacy_file = os.path.join(data_dir, LEGACY_DATA_FILE)
+        self.log = SegmentedLog(
+            os.path.join(data_dir, "snapshots"),
+            prefix="snapshots",
+            max_records=int(os.getenv("SNAPSHOT_SEGMENT_MAX_RECORDS", "500")),
+            max_bytes=int(os.getenv("SNAPSHOT_SEGMENT_MAX_BYTES", str(8 * 1024 * 1024))),
+        )
+        self.history = HistoryLog(os.path.join(data_dir, "history"))
+
+    def _load_legacy(self):
+        """Load snapshots from a legacy credit_data.json, if one is present."""
+        if os.path.exists(self.legacy_file):
+            with open(self.legacy_file, 'r') as f:
+                return json.load(f)
+        return []
+
+    def _has_snapshots(self):
+        return self.log.version() is not None
+
+    def lock(self):
+        """Return the cross-process write lock of this store (a reentrant context manager)."""
+        return write_lock(self.data_dir)
+
+    def import_legacy(self):
+        """Move snapshots from a legacy credit_data.json into the log."""
+        with self.lock():
+            if self._has_snapshots() or not os.path.exists(self.legacy_file):
+                return 0
+
+            snapshots = self._load_legacy()
+            self.log.append_many([self._to_record(snapshot) for snapshot in snapshots])
+            os.replace(self.legacy_file, self.legacy_file + ".migrated")
+            logger.info(f"Imported {len(snapshots)} snapshots from {self.legacy_file}")
+            return len(snapshots)
+
+    def _to_record(self, snapshot):
+        """Move a snapshot's usage_history into the history log and return the record to store."""
+        if "usage_history" not in snapshot:
+            return snapshot
+        record = {key: value for key, value in snapshot.items() if key != "usage_history"}
+        last = self.log.last_record() or {}
+        record["history_ref"] = self.history.record(snapshot["usage_history"] or [],
+                                                    after=last.get("history_ref", 0))
+        return record
+
+    def _expand(self, record, rows):
+        """Turn a stored record back into a snapshot with its usage_history."""
+        snapshot = {key: value for key, value in record.items() if key != "history_ref"}
+        snapshot["usage_history"] = rows
+        return snapshot
+
+    def append(self, snapshot):
+        """
+        Durably append one snapshot.
+
+        If the snapshot carries a ``timings`` dict without a ``save`` entry,
+        the time spent storing it is recorded there as ``save`` just before
+        the snapshot is committed.
+        """
+        start = time.perf_counter()
+        with self.lock():
+            self.import_legacy()
+            record = self._to_record(snapshot)
+            if isinstance(record.get("timings"), dict) and "save" not in record["timings"]:
+                record["timings"] = dict(record["timings"], save=round(time.perf_counter() - start, 3))
+            self.log.append(record)
+
+    def append_many(self, snapshots):
+        """Durably append several snapshots, committing them together."""
+        with self.lock():
+            self.import_legacy()
+            self.log.append_many([self._to_record(snapshot) for snapshot in snapshots])
+
+    def compact(self, select, compress=True):
+        """
+        Keep only the snapshots chosen by ``select`` and compress sealed segments.
+
+        ``select`` gets the timestamps of all snapshots, oldest first, and
+        returns the set of indexes to keep. The history log is then
+        rewritten to what the kept snapshots reference. The snapshots are
+        committed first: until the history follows, readers see the kept
+        snapshots with the complete history, which is still correct.
+        Returns the number of snapshots kept.
+        """
+        with self.lock():
+            self.import_legacy()
+            records = list(self.log.iter_records())
+            keep = select([record.get("timestamp") for record in records])
+            kept = [record for i, record in enumerate(records) if i in keep]
+            self.log.rewrite(kept, compress=compress)
+            self.history.compact([record["history_ref"] for record in kept if "history_ref" in record],
+                                 compress=compress)
+            return len(kept)
+
+    def size(self):
+        """Return the number of bytes the snapshots and their history take on disk."""
+        if not self._has_snapshots():
+            return os.path.getsize(self.legacy_file) if os.path.exists(self.legacy_file) else 0
+        return self.log.size() + self.history.log.size()
+
+    def version(self):
+        """Return a token that changes whenever a snapshot is committed."""
+        version = self.log.version()
+        if version is None and os.path.exists(self.legacy_file):
+            st = os.stat(self.legacy_file)
+            return ("legacy", st.st_ino, st.st_mtime_ns, st.st_size)
+        return version
+
+    def iter_snapshots(self):
+        """
+        Yield all snapshots, oldest first.
+
+        Records are read one segment at a time as they are yielded, and the
+        history log is replayed alongside them, so memory use does not grow
+        with the number of snapshots.
+        """
+        if not self._has_snapshots():
+            yield from self._load_legacy()
+            return
+
+        records, with_refs = itertools.tee(self.log.iter_records())
+        # iter_rows_at asks for the next reference only when its rows are
+        # needed, so both copies of the records advance together
+        rows_by_ref = self.history.iter_rows_at(
+            record["history_ref"] for record in with_refs if "history_ref" in record
+        )
+        for record in records:
+            if "history_ref" in record:
+                yield self._expand(record, next(rows_by_ref))
+            else:
+                yield record
+
+    def load_all(self):
+        """Return all snapshots as a list, oldest first."""
+        return list(self.iter_snapshots())
+
+    def latest(self):
+        """Return the newest snapshot, or None if nothing has been stored yet."""
+        if not self._has_snapshots():
+            legacy = self._load_legacy()
+            return legacy[-1] if legacy else None
+
+        record = self.log.last_record()
+        if record is not None and "history_ref" in record:
+            return self._expand(record, self.history.rows_at(record["history_ref"]))
+        return record
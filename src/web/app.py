@@ -4,12 +4,36 @@ Web application for displaying Devin credit usage data.
 """
 
 import os
-import json
+import time
+import uuid
+import cProfile
+import logging
 import secrets
+import hashlib
+import importlib.util
+import threading
 from datetime import datetime
-from flask import Flask, render_template, jsonify, request, session, redirect, url_for, flash
+from flask import Flask, Response, render_template, jsonify, request, session, redirect, url_for, flash, abort, g
+from markupsafe import Markup
 from dotenv import load_dotenv
-from src.scraper.scraper import DevinCreditScraper
+from src.storage.store import open_store
+from src.storage.accounts import load_accounts, get_account, partition_dir
+from src.storage.normalize import normalize_snapshot, sort_history
+from src.storage.rollups import Rollups, PERIODS, usage_by_period, usage_by_session, available_acus_trend
+from src.storage.metrics import get_metrics, load_state, render, dump_profile
+from src.web.cache import ResponseCache, SharedResponses, CachedResponse, conditional_json_response
+from src.web.pagination import parse_limit, parse_filters, page_history, page_snapshots, DEFAULT_LIMIT
+from src.web import exports
+from src.web.downsample import chart_points, usage_series, downsample_series
+from src.web.jobs import ScrapeJobRunner
+from src.web.vendor import VENDOR_ASSETS
+from src.web.events import ChangeWatcher, event_stream
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
@@ -20,23 +44,104 @@ app = Flask(__name__,
 
 app.secret_key = os.getenv("FLASK_SECRET_KEY", secrets.token_hex(16))
 
-def load_credit_data():
-    """Load the credit data from the JSON file."""
-    data_file = os.path.join("data", "credit_data.json")
-    if os.path.exists(data_file):
-        with open(data_file, 'r') as f:
-            return json.load(f)
-    return []
+# Request, cache and storage metrics, served at /metrics together with the scheduler's
+metrics = get_metrics()
+
+def get_store(org_id=None):
+    """Return the snapshot store shared with the scraper, or one organization's partition."""
+    return open_store(partition_dir(org_id) if org_id else "data")
+
+def serialize_json(value):
+    """Serialize a value exactly as jsonify would."""
+    return (app.json.dumps(value) + "\n").encode("utf-8")
+
+CACHE_CHECK_INTERVAL = float(os.getenv("CACHE_CHECK_INTERVAL_SECONDS", "2"))
+
+# Share serialized responses between worker processes through memory-mapped files
+SHARED_RESPONSE_CACHE = os.getenv("SHARED_RESPONSE_CACHE", "true").lower() == "true"
+SHARED_CACHE_DIR = ".response-cache"
+
+def shared_responses(directory):
+    """Return the shared response files kept in ``directory``, or None if sharing is disabled."""
+    return SharedResponses(directory) if SHARED_RESPONSE_CACHE else None
+
+def count_cache_lookups(cache_name):
+    """Return an ``on_lookup`` callback counting the lookups of one response cache."""
+    return lambda result: metrics.inc(
+        "devin_credit_response_cache_lookups_total", {"cache": cache_name, "result": result}
+    )
+
+def timed_load(operation, org_id, load):
+    """Call ``load()`` and record how long it took to read and parse the stored data."""
+    start = time.perf_counter()
+    try:
+        return load()
+    finally:
+        metrics.observe(
+            "devin_credit_store_load_duration_seconds",
+            time.perf_counter() - start,
+            {"operation": operation, "org": org_id or "default"}
+        )
+
+response_caches = {}
+response_caches_lock = threading.Lock()
+
+def get_response_cache(org_id=None):
+    """Return the response cache for the default store or one organization's partition."""
+    with response_caches_lock:
+        if org_id not in response_caches:
+            response_caches[org_id] = ResponseCache(
+                lambda: get_store(org_id).version(),
+                serialize_json,
+                check_interval=CACHE_CHECK_INTERVAL,
+                shared=shared_responses(os.path.join(get_store(org_id).data_dir, SHARED_CACHE_DIR)),
+                on_lookup=count_cache_lookups(org_id or "default")
+            )
+        return response_caches[org_id]
+
+response_cache = get_response_cache()
+
+combined_cache = ResponseCache(
+    lambda: tuple((account["id"], get_store(account["id"]).version()) for account in load_accounts()),
+    serialize_json,
+    check_interval=CACHE_CHECK_INTERVAL,
+    shared=shared_responses(os.path.join("data", f"{SHARED_CACHE_DIR}-combined")),
+    on_lookup=count_cache_lookups("combined")
+)
+
+def load_credit_data(org_id=None):
+    """
+    Load all credit snapshots from the snapshot store, normalized.
+    
+    Not cached: only the serialized response is kept, so a worker does not
+    hold a parsed copy of the whole history.
+    """
+    return timed_load(
+        "all", org_id,
+        lambda: [normalize_snapshot(snapshot) for snapshot in get_store(org_id).iter_snapshots()]
+    )
+
+def load_latest_credit_data(org_id=None):
+    """Load only the newest credit snapshot, normalized, or None if there is none."""
+    def build():
+        latest = timed_load("latest", org_id, get_store(org_id).latest)
+        return normalize_snapshot(latest) if latest else None
+    return get_response_cache(org_id).value("latest-credit-data", build)
 
 def process_credit_data(data):
-    """Process the raw credit data into a format suitable for the UI."""
+    """
+    Process the normalized credit data into a format suitable for the UI.
+    
+    ``available_acus`` is a number (None if unknown), timestamps are ISO-8601
+    UTC and the usage history is sorted newest first.
+    """
     processed_data = []
     
     for entry in data:
         timestamp = entry.get("timestamp", "")
         
         current_usage = entry.get("current_usage", {})
-        available_acus = current_usage.get("available_acus", "Unknown")
+        available_acus = current_usage.get("available_acus")
         
         usage_history = entry.get("usage_history", [])
         
@@ -54,11 +159,111 @@ def is_admin():
     """Check if the current session user is an admin."""
     return session.get('is_admin', False)
 
-@app.route('/')
-def index():
-    """Render the main page."""
-    organization = os.getenv("ORGANIZATION_NAME", "Organization")
-    return render_template('index.html', organization=organization)
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+asset_versions = {}
+
+@app.template_global()
+def asset_url(filename):
+    """
+    Return the URL of a static file with a content hash, so it can be cached for a long time.
+    
+    Third-party assets are only ever served from static/vendor (see
+    ``src.web.vendor``); None is returned while one has not been downloaded.
+    """
+    version = asset_versions.get(filename)
+    if version is None:
+        try:
+            with open(os.path.join(app.static_folder, filename), 'rb') as f:
+                version = hashlib.sha256(f.read()).hexdigest()[:12]
+        except FileNotFoundError:
+            if filename in VENDOR_ASSETS:
+                logger.warning(f"{filename} is missing, run python -m src.web.vendor")
+                return None
+            raise
+        asset_versions[filename] = version
+    return url_for('static', filename=filename, v=version)
+
+@app.after_request
+def cache_versioned_assets(response):
+    """Let browsers keep content-hashed static files until their hash changes."""
+    if request.endpoint == 'static' and request.args.get('v') and response.status_code == 200:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+# Opt-in profiling: requests carrying this token in X-Profile-Token are run under cProfile
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join("data", "profiles"))
+
+@app.before_request
+def start_request_metrics():
+    """Time the request and start the profiler if it asks for a profile."""
+    g.request_started = time.perf_counter()
+    token = request.headers.get("X-Profile-Token")
+    if PROFILE_TOKEN and token and secrets.compare_digest(token.encode(), PROFILE_TOKEN.encode()):
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+@app.after_request
+def record_request_metrics(response):
+    """Record the request latency per route and write the profile, if one was taken."""
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        name = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{request.endpoint or 'unmatched'}-{uuid.uuid4().hex[:8]}.prof"
+        if dump_profile(profiler, os.path.join(PROFILE_DIR, name)):
+            response.headers["X-Profile"] = name
+    
+    started = g.pop("request_started", None)
+    if started is not None:
+        metrics.observe(
+            "devin_credit_http_request_duration_seconds",
+            time.perf_counter() - started,
+            {
+                "route": request.url_rule.rule if request.url_rule else "unmatched",
+                "method": request.method,
+                "status": str(response.status_code)
+            }
+        )
+    metrics.maybe_flush()
+    return response
+
+def embed_json(body):
+    """Mark serialized JSON safe to embed in a <script> element."""
+    text = bytes(body).decode("utf-8").rstrip("\n")
+    for char, escaped in (("<", "\\u003c"), (">", "\\u003e"), ("&", "\\u0026"), ("'", "\\u0027")):
+        text = text.replace(char, escaped)
+    return Markup(text)
+
+@app.route('/', defaults={'org_id': None})
+@app.route('/orgs/<org_id>')
+def index(org_id):
+    """
+    Render the main page with the dashboard data embedded, so it needs no API calls to show.
+    
+    With multiple accounts configured each organization has its own
+    dashboard at ``/orgs/<id>``, and ``/`` redirects to the first one.
+    """
+    accounts = load_accounts()
+    if org_id is None and accounts:
+        return redirect(url_for('index', org_id=accounts[0]["id"]))
+    if org_id:
+        require_org(org_id)
+        organization = get_account(org_id)["name"]
+    else:
+        organization = os.getenv("ORGANIZATION_NAME", "Organization")
+    bootstrap = get_response_cache(org_id).response("bootstrap", lambda: build_bootstrap(org_id))
+    return render_template(
+        'index.html',
+        organization=organization,
+        org_id=org_id,
+        organizations=[{"id": account["id"], "name": account["name"]} for account in accounts],
+        api_base=f"/api/orgs/{org_id}" if org_id else "/api",
+        bootstrap=embed_json(bootstrap.body)
+    )
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -98,56 +303,417 @@ def logout():
     session.clear()
     return redirect(url_for('index'))
 
-@app.route('/api/run-scrape', methods=['POST'])
-def run_scrape():
-    """API endpoint to manually run the scraper (admin only)."""
+def run_scraper(username, confirmation_code, progress, org_id=None):
+    """
+    Run one scrape with the given credentials; used by the background job runner.
+    
+    With ``org_id`` the scrape goes into that organization's partition.
+    The scraper (and Selenium with it) is imported here rather than at the
+    top of the module, so serving the dashboard and the API never loads it.
+    """
+    from src.scraper.scraper import DevinCreditScraper
+    
+    scraper = DevinCreditScraper(
+        username=username,
+        confirmation_code=confirmation_code,
+        progress_callback=progress,
+        data_dir=get_store(org_id).data_dir
+    )
+    success = scraper.run()
+    get_response_cache(org_id).invalidate()
+    if org_id:
+        combined_cache.invalidate()
+    return success
+
+scrape_jobs = ScrapeJobRunner(
+    os.path.join("data", "jobs"), run_scraper,
+    stale_seconds=int(os.getenv("SCRAPE_JOB_STALE_SECONDS", "300"))
+)
+
+def watched_versions():
+    """Return the version of every snapshot store served by this app, keyed by organization ID (None for the default)."""
+    versions = {None: get_store().version()}
+    for account in load_accounts():
+        versions[account["id"]] = get_store(account["id"]).version()
+    return versions
+
+change_watcher = ChangeWatcher(
+    watched_versions,
+    scrape_jobs.jobs_dir,
+    interval=float(os.getenv("EVENTS_POLL_INTERVAL_SECONDS", "2"))
+)
+
+@app.route('/api/run-scrape', methods=['POST'], defaults={'org_id': None})
+@app.route('/api/orgs/<org_id>/run-scrape', methods=['POST'])
+def run_scrape(org_id):
+    """
+    API endpoint to start a manual scrape in the background (admin only).
+    
+    The default store is scraped with the logged-in admin's credentials; an
+    organization with the credentials of its configured account.
+    """
     if not is_admin():
         return jsonify({"success": False, "error": "Admin access required"})
     
     if not session.get('logged_in'):
         return jsonify({"success": False, "error": "Authentication required"})
     
+    username = session.get('user_id')
+    confirmation_code = session.get('confirmation_code')
+    if org_id:
+        require_org(org_id)
+        account = get_account(org_id)
+        username = account["username"]
+        confirmation_code = account["confirmation_code"] or confirmation_code
+    
     try:
-        scraper = DevinCreditScraper()
-        
-        scraper.username = session.get('user_id')
-        os.environ["DEVIN_CONFIRMATION_CODE"] = session.get('confirmation_code')
-        
-        success = scraper.run()
-        
-        if success:
-            return jsonify({"success": True})
-        else:
-            return jsonify({"success": False, "error": "Scraper failed to run"})
+        job = scrape_jobs.submit(
+            username,
+            confirmation_code,
+            requested_by=session.get('user_id'),
+            org_id=org_id
+        )
+        return jsonify({"success": True, "job_id": job["id"], "job": job}), 202
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
+@app.route('/api/scrape-jobs/<job_id>')
+def get_scrape_job(job_id):
+    """API endpoint to get the status and per-phase progress of a scrape job (admin only)."""
+    if not is_admin():
+        return jsonify({"success": False, "error": "Admin access required"})
+    
+    job = scrape_jobs.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Unknown job"}), 404
+    return jsonify({"success": True, "job": job})
+
+def load_rollups(org_id=None):
+    """Load the usage rollups, rebuilding them if they lag behind the store."""
+    def build():
+        store = get_store(org_id)
+        return timed_load("rollups", org_id, lambda: Rollups(store.data_dir).current(store))
+    return get_response_cache(org_id).value("rollups", build)
+
+def build_credit_data(org_id=None):
+    """Build the processed list of all credit data."""
+    return process_credit_data(load_credit_data(org_id))
+
+def build_latest_credit_data(org_id=None):
+    """Build the processed latest credit data."""
+    latest_data = load_latest_credit_data(org_id)
+    if latest_data:
+        return process_credit_data([latest_data])[0]
+    return {}
+
+def build_usage_history(org_id=None):
+    """Build the usage history from the latest data."""
+    latest_data = load_latest_credit_data(org_id)
+    if latest_data:
+        return latest_data.get("usage_history", [])
+    return []
+
+def build_bootstrap(org_id=None):
+    """
+    Build everything the dashboard shows first, from one read of the latest snapshot.
+    
+    ``latest`` is the current usage, ``history`` the first page of
+    ``/api/history`` and ``chart`` the default-resolution series of
+    ``/api/chart/usage``.
+    """
+    latest = build_latest_credit_data(org_id)
+    rows = latest.get("usage_history") or []
+    page, next_cursor = page_history(rows, {}, limit=DEFAULT_LIMIT)
+    return {
+        "latest": {"timestamp": latest["timestamp"], "available_acus": latest["available_acus"]} if latest else {},
+        "history": {"items": page, "next_cursor": next_cursor, "limit": DEFAULT_LIMIT},
+        "chart": build_usage_chart(org_id, chart_points(None)),
+    }
+
+def load_chart_series(org_id=None):
+    """Load the chart series of the latest usage history as arrays."""
+    return get_response_cache(org_id).value("chart-series", lambda: usage_series(build_usage_history(org_id)))
+
+def build_usage_chart(org_id=None, points=None):
+    """Build the ACUs-used chart series, downsampled to ``points`` points with LTTB."""
+    return downsample_series(load_chart_series(org_id), points or chart_points(None))
+
+def build_combined_latest_credit_data():
+    """Build the latest credit data of every configured organization, with the total available ACUs."""
+    organizations = []
+    total = 0
+    for account in load_accounts():
+        latest = build_latest_credit_data(account["id"])
+        if latest.get("available_acus") is not None:
+            total += latest["available_acus"]
+        organizations.append({"id": account["id"], "name": account["name"], **latest})
+    return {"organizations": organizations, "total_available_acus": total}
+
+def build_combined_usage_history():
+    """Build the latest usage history of every configured organization, newest first, each row tagged with its organization."""
+    rows = []
+    for account in load_accounts():
+        for row in build_usage_history(account["id"]):
+            rows.append({"organization": account["id"], **row})
+    return sort_history(rows)
+
+def require_org(org_id):
+    """Abort with 404 unless ``org_id`` is a configured organization."""
+    if get_account(org_id) is None:
+        abort(404)
+
 @app.route('/api/credit-data')
 def get_credit_data():
     """API endpoint to get all credit data."""
-    data = load_credit_data()
-    processed_data = process_credit_data(data)
-    return jsonify(processed_data)
+    return conditional_json_response(response_cache.response("credit-data", build_credit_data))
 
 @app.route('/api/latest-credit-data')
 def get_latest_credit_data():
     """API endpoint to get the latest credit data."""
-    data = load_credit_data()
-    if data:
-        processed_data = process_credit_data([data[-1]])
-        return jsonify(processed_data[0])
-    return jsonify({})
+    return conditional_json_response(response_cache.response("latest-credit-data", build_latest_credit_data))
 
 @app.route('/api/usage-history')
 def get_usage_history():
     """API endpoint to get the usage history from the latest data."""
-    data = load_credit_data()
-    if data and len(data) > 0:
-        latest_data = data[-1]
-        usage_history = latest_data.get("usage_history", [])
-        return jsonify(usage_history)
-    return jsonify([])
+    return conditional_json_response(response_cache.response("usage-history", build_usage_history))
+
+@app.route('/api/orgs')
+def get_orgs():
+    """API endpoint to list the configured organizations."""
+    return jsonify([{"id": account["id"], "name": account["name"]} for account in load_accounts()])
+
+@app.route('/api/orgs/<org_id>/credit-data')
+def get_org_credit_data(org_id):
+    """API endpoint to get all credit data of one organization."""
+    require_org(org_id)
+    cache = get_response_cache(org_id)
+    return conditional_json_response(cache.response("credit-data", lambda: build_credit_data(org_id)))
+
+@app.route('/api/orgs/<org_id>/latest-credit-data')
+def get_org_latest_credit_data(org_id):
+    """API endpoint to get the latest credit data of one organization."""
+    require_org(org_id)
+    cache = get_response_cache(org_id)
+    return conditional_json_response(cache.response("latest-credit-data", lambda: build_latest_credit_data(org_id)))
+
+@app.route('/api/orgs/<org_id>/usage-history')
+def get_org_usage_history(org_id):
+    """API endpoint to get the latest usage history of one organization."""
+    require_org(org_id)
+    cache = get_response_cache(org_id)
+    return conditional_json_response(cache.response("usage-history", lambda: build_usage_history(org_id)))
+
+def paged_json_response(page, next_cursor, limit):
+    """Build a conditional JSON response for one page of results."""
+    value = {"items": page, "next_cursor": next_cursor, "limit": limit}
+    return conditional_json_response(CachedResponse(value, serialize_json(value)))
+
+@app.route('/api/bootstrap', defaults={'org_id': None})
+@app.route('/api/orgs/<org_id>/bootstrap')
+def get_bootstrap(org_id):
+    """API endpoint to get the latest usage, the first history page and the chart series in one response."""
+    if org_id:
+        require_org(org_id)
+    cache = get_response_cache(org_id)
+    return conditional_json_response(cache.response("bootstrap", lambda: build_bootstrap(org_id)))
+
+@app.route('/api/chart/usage', defaults={'org_id': None})
+@app.route('/api/orgs/<org_id>/chart/usage')
+def get_usage_chart(org_id):
+    """
+    API endpoint to get the ACUs used per session as chart columns, oldest first.
+    
+    Long histories are downsampled with Largest-Triangle-Three-Buckets to
+    about ``points`` points (rounded up to a multiple of 50, default 1000).
+    """
+    if org_id:
+        require_org(org_id)
+    try:
+        points = chart_points(request.args.get('points'))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    cache = get_response_cache(org_id)
+    return conditional_json_response(
+        cache.response(f"chart-{points}", lambda: build_usage_chart(org_id, points))
+    )
+
+@app.route('/api/history', defaults={'org_id': None})
+@app.route('/api/orgs/<org_id>/history')
+def get_history_page(org_id):
+    """
+    API endpoint to page through the latest usage history, newest first.
+    
+    Query parameters: ``limit``, ``cursor`` (the ``next_cursor`` of the
+    previous page), ``since``, ``until``, ``session`` (name prefix) and
+    ``min_acus``.
+    """
+    if org_id:
+        require_org(org_id)
+    try:
+        limit = parse_limit(request.args)
+        filters = parse_filters(request.args)
+        page, next_cursor = page_history(
+            build_usage_history(org_id), filters, request.args.get('cursor'), limit
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return paged_json_response(page, next_cursor, limit)
+
+@app.route('/api/snapshots', defaults={'org_id': None})
+@app.route('/api/orgs/<org_id>/snapshots')
+def get_snapshots_page(org_id):
+    """
+    API endpoint to page through the snapshots (timestamp and available ACUs), newest first.
+    
+    Query parameters: ``limit``, ``cursor``, ``since`` and ``until``.
+    """
+    if org_id:
+        require_org(org_id)
+    try:
+        limit = parse_limit(request.args)
+        filters = parse_filters(request.args)
+        page, next_cursor = page_snapshots(
+            available_acus_trend(load_rollups(org_id)), filters, request.args.get('cursor'), limit
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return paged_json_response(page, next_cursor, limit)
+
+@app.route('/api/events')
+def events():
+    """
+    Server-Sent Events stream: a ``snapshot`` event when new data is committed
+    and a ``job`` event when a scrape job changes state.
+    """
+    response = Response(
+        event_stream(change_watcher, heartbeat=float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))),
+        mimetype="text/event-stream"
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+@app.route('/api/export/<dataset>.<fmt>', defaults={'org_id': None})
+@app.route('/api/orgs/<org_id>/export/<dataset>.<fmt>')
+def export_data(dataset, fmt, org_id):
+    """
+    API endpoint to download ``snapshots`` or ``sessions`` as csv, ndjson or parquet.
+    
+    The output is streamed, so memory use does not grow with the export
+    size. Query parameters: ``since`` and ``until``; session exports also
+    accept ``session`` and ``min_acus``.
+    """
+    if org_id:
+        require_org(org_id)
+    if dataset not in exports.DATASETS or fmt not in exports.FORMATS:
+        abort(404)
+    try:
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    if fmt == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        return jsonify({"success": False, "error": "Parquet export requires pyarrow"}), 501
+    
+    if dataset == "snapshots":
+        records = exports.iter_snapshot_records(get_store(org_id), filters)
+    else:
+        records = exports.iter_session_records(build_usage_history(org_id), filters)
+    
+    columns = exports.DATASETS[dataset]
+    if fmt == "csv":
+        body = exports.stream_csv(records, columns)
+    elif fmt == "ndjson":
+        body = exports.stream_ndjson(records)
+    else:
+        body = exports.stream_parquet(records, columns)
+    
+    response = Response(body, mimetype=exports.FORMATS[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename={org_id or 'devin'}-{dataset}.{fmt}"
+    return response
+
+@app.route('/api/rollups/usage', defaults={'org_id': None})
+@app.route('/api/orgs/<org_id>/rollups/usage')
+def get_usage_rollup(org_id):
+    """API endpoint to get the ACUs used per day, week or month (``?period=``, default day)."""
+    if org_id:
+        require_org(org_id)
+    period = request.args.get('period', 'day')
+    if period not in PERIODS:
+        return jsonify({"success": False, "error": f"period must be one of {', '.join(PERIODS)}"}), 400
+    cache = get_response_cache(org_id)
+    return conditional_json_response(
+        cache.response(f"rollup-{period}", lambda: usage_by_period(load_rollups(org_id), period))
+    )
+
+@app.route('/api/rollups/sessions', defaults={'org_id': None})
+@app.route('/api/orgs/<org_id>/rollups/sessions')
+def get_session_rollup(org_id):
+    """API endpoint to get the ACUs used per session name, highest first."""
+    if org_id:
+        require_org(org_id)
+    cache = get_response_cache(org_id)
+    return conditional_json_response(
+        cache.response("rollup-sessions", lambda: usage_by_session(load_rollups(org_id)))
+    )
+
+@app.route('/api/rollups/available-acus', defaults={'org_id': None})
+@app.route('/api/orgs/<org_id>/rollups/available-acus')
+def get_available_acus_trend(org_id):
+    """API endpoint to get the available ACUs of every snapshot, oldest first."""
+    if org_id:
+        require_org(org_id)
+    cache = get_response_cache(org_id)
+    return conditional_json_response(
+        cache.response("rollup-available-acus", lambda: available_acus_trend(load_rollups(org_id)))
+    )
+
+@app.route('/api/combined/latest-credit-data')
+def get_combined_latest_credit_data():
+    """API endpoint to get the latest credit data across all organizations."""
+    return conditional_json_response(
+        combined_cache.response("latest-credit-data", build_combined_latest_credit_data)
+    )
+
+@app.route('/api/combined/usage-history')
+def get_combined_usage_history():
+    """API endpoint to get the latest usage history across all organizations."""
+    return conditional_json_response(combined_cache.response("usage-history", build_combined_usage_history))
+
+@app.route('/metrics')
+def get_metrics_text():
+    """
+    Metrics of every web worker and of the scheduler, in the Prometheus text format.
+    
+    With METRICS_TOKEN set, the scraper has to send it as a bearer token.
+    """
+    token = os.getenv("METRICS_TOKEN")
+    if token and not secrets.compare_digest(request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()):
+        return Response("Unauthorized\n", status=401, mimetype="text/plain")
+    
+    for org_id in [None] + [account["id"] for account in load_accounts()]:
+        try:
+            metrics.set("devin_credit_store_bytes", get_store(org_id).size(), {"org": org_id or "default"})
+        except OSError as e:
+            logger.warning(f"Could not measure the store of {org_id or 'default'}: {str(e)}")
+    metrics.flush()
+    return Response(render(load_state(metrics.path)), mimetype="text/plain; version=0.0.4")
+
+def warm_caches():
+    """
+    Build the responses of the dashboard's first page load.
+    
+    Called by the production server before it forks its workers, so they
+    start with these responses (and NumPy) already loaded.
+    """
+    with app.app_context():
+        for org_id in [None] + [account["id"] for account in load_accounts()]:
+            cache = get_response_cache(org_id)
+            cache.response("bootstrap", lambda: build_bootstrap(org_id))
+            cache.response("latest-credit-data", lambda: build_latest_credit_data(org_id))
+    # Publish what warming recorded before the workers fork; they start empty
+    metrics.flush()
 
 if __name__ == '__main__':
+    # Development server; production runs under gunicorn (see gunicorn.conf.py)
     port = int(os.getenv("PORT", "5000"))
-    app.run(host='0.0.0.0', port=port, debug=True)
+    app.run(host='0.0.0.0', port=port, debug=os.getenv("FLASK_DEBUG", "false").lower() == "true")
@@ -0,0 +1,267 @@
+"""
+Caches of parsed credit data and serialized API responses.
+
+``ResponseCache`` keeps them in process memory; ``SharedResponses`` lets
+the worker processes of one server share the serialized responses through
+memory-mapped files.
+"""
+
+import os
+import gzip
+import json
+import mmap
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import threading
+from flask import Response, request
+from src.storage.locking import file_lock
+
+logger = logging.getLogger(__name__)
+
+# Bytes per chunk when a memory-mapped body is sent
+BODY_CHUNK_SIZE = 256 * 1024
+
+
+class CachedResponse:
+    """
+    A processed view together with its serialized and gzip-compressed bodies.
+
+    The bodies are bytes, or read-only memory maps for responses loaded
+    from SharedResponses (whose ``value`` is then None).
+    """
+
+    def __init__(self, value, body, gzip_body=None, digest=None):
+        self.value = value
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=6, mtime=0) if gzip_body is None else gzip_body
+        digest = digest or hashlib.sha256(body).hexdigest()[:32]
+        self.etag = digest
+        self.gzip_etag = f"{digest}-gzip"
+
+
+def _write_file(path, data):
+    tmp_path = f"{path}.tmp.{uuid.uuid4().hex}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class SharedResponses:
+    """
+    Serialized responses shared by the worker processes of a server through files.
+
+    Each response is written once per store version, as
+    ``<directory>/<version>/<name>.<etag>.json`` with a gzip-compressed
+    ``.json.gz`` next to it, and every worker serves it from a read-only
+    memory map, so a body is held once in the page cache rather than once
+    per worker. A lock file per response lets one worker build it while
+    the others wait and then map the result. Directories of older versions
+    are removed once they have not been touched for ``stale_seconds``.
+    """
+
+    def __init__(self, directory, stale_seconds=60):
+        self.directory = directory
+        self.stale_seconds = stale_seconds
+
+    def _version_dir(self, version):
+        key = hashlib.sha256(json.dumps(version, default=str).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, key)
+
+    @staticmethod
+    def _map(path):
+        with open(path, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def load(self, version, name):
+        """Return the shared response ``name`` of ``version``, or None if no worker has built it."""
+        version_dir = self._version_dir(version)
+        try:
+            entries = os.listdir(version_dir)
+        except FileNotFoundError:
+            return None
+        for entry in entries:
+            base, _, digest = entry[:-len(".json")].rpartition(".")
+            if entry.endswith(".json") and base == name:
+                path = os.path.join(version_dir, entry)
+                try:
+                    return CachedResponse(None, self._map(path), self._map(path + ".gz"), digest)
+                except FileNotFoundError:
+                    return None
+        return None
+
+    def _remove_stale(self, current_dir):
+        cutoff = time.time() - self.stale_seconds
+        for entry in os.scandir(self.directory):
+            if entry.is_dir() and entry.path != current_dir and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def response(self, version, name, build):
+        """Return the shared response ``name`` of ``version``, building it with ``build()`` if needed."""
+        version_dir = self._version_dir(version)
+        if not os.path.isdir(version_dir):
+            os.makedirs(version_dir, exist_ok=True)
+            self._remove_stale(version_dir)
+
+        with file_lock(os.path.join(version_dir, f"{name}.lock")):
+            entry = self.load(version, name)
+            if entry is None:
+                built = build()
+                path = os.path.join(version_dir, f"{name}.{built.etag}.json")
+                # The .json file is the commit point, so the .gz goes first
+                _write_file(path + ".gz", built.gzip_body)
+                _write_file(path, built.body)
+                entry = self.load(version, name) or built
+        return entry
+
+    def clear(self):
+        """Remove every shared response."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class ResponseCache:
+    """
+    Cache keyed on the version of the snapshot store.
+
+    ``get_version()`` returns the store version, e.g. the (inode, mtime,
+    size) of the file that commits new data, so any write invalidates
+    everything cached. It is checked at most once every ``check_interval``
+    seconds; polls in between are served from memory without touching the
+    disk. With ``shared`` (a SharedResponses), serialized responses are
+    also shared with the other worker processes. ``on_lookup``, if given,
+    is called with ``"hit"``, ``"shared"`` (built by another worker) or
+    ``"miss"`` for every lookup, e.g. to count the hit rate.
+    """
+
+    def __init__(self, get_version, serialize, check_interval=2.0, shared=None, on_lookup=None):
+        self.get_version = get_version
+        self.serialize = serialize
+        self.check_interval = check_interval
+        self.shared = shared
+        self.on_lookup = on_lookup
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._values = {}
+        self._responses = {}
+
+    def version(self):
+        """Return the current store version, invalidating the cache if it changed."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < self.check_interval and self._checked_at:
+                return self._version
+            version = self.get_version()
+            self._checked_at = now
+            if version != self._version:
+                self._version = version
+                self._values = {}
+                self._responses = {}
+            return version
+
+    def invalidate(self):
+        """Force the next access to re-check the store version."""
+        with self._lock:
+            self._checked_at = 0.0
+
+    def clear(self):
+        """Drop everything cached, including shared responses, so the next access rebuilds from the store."""
+        with self._lock:
+            self._version = None
+            self._checked_at = 0.0
+            self._values = {}
+            self._responses = {}
+        if self.shared is not None:
+            self.shared.clear()
+
+    def _record(self, result):
+        if self.on_lookup:
+            self.on_lookup(result)
+
+    def value(self, name, build):
+        """Return a cached value, building it with ``build()`` if needed."""
+        version = self.version()
+        with self._lock:
+            if name in self._values and self._version == version:
+                self._record("hit")
+                return self._values[name]
+        self._record("miss")
+        value = build()
+        with self._lock:
+            if self._version == version:
+                self._values[name] = value
+        return value
+
+    def response(self, name, build):
+        """Return a CachedResponse for ``build()``'s result, serializing it only once per version."""
+        version = self.version()
+        with self._lock:
+            if name in self._responses and self._version == version:
+                self._record("hit")
+                return self._responses[name]
+        built = []
+        def build_response():
+            value = build()
+            built.append(True)
+            return CachedResponse(value, self.serialize(value))
+
+        entry = None
+        if self.shared is not None:
+            try:
+                entry = self.shared.response(version, name, build_response)
+            except OSError as e:
+                logger.warning(f"Could not use the shared response cache: {str(e)}")
+        if entry is None:
+            entry = build_response()
+        self._record("miss" if built else "shared")
+        with self._lock:
+            if self._version == version:
+                self._responses[name] = entry
+        return entry
+
+
+def body_response(body, **kwargs):
+    """Return a Response for a body that is either bytes or a memory map."""
+    if isinstance(body, bytes):
+        return Response(body, **kwargs)
+
+    def chunks():
+        for start in range(0, len(body), BODY_CHUNK_SIZE):
+            yield body[start:start + BODY_CHUNK_SIZE]
+
+    response = Response(chunks(), **kwargs)
+    response.content_length = len(body)
+    return response
+
+
+def conditional_json_response(entry):
+    """
+    Build the response for a CachedResponse, honouring If-None-Match and Accept-Encoding.
+
+    The identity and gzip bodies carry different strong ETags, as required
+    for byte-different representations.
+    """
+    use_gzip = request.accept_encodings["gzip"] > 0
+    etag = entry.gzip_etag if use_gzip else entry.etag
+
+    if request.if_none_match.contains(entry.etag) or request.if_none_match.contains(entry.gzip_etag):
+        response = Response(status=304)
+    elif use_gzip:
+        response = body_response(entry.gzip_body, mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = body_response(entry.body, mimetype="application/json")
+
+    response.set_etag(etag)
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "no-cache"
+    return response
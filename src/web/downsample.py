@@ -0,0 +1,91 @@
+"""
+Downsampling of the usage chart series with Largest-Triangle-Three-Buckets.
+"""
+
+import numpy as np
+
+MIN_POINTS = 50
+MAX_POINTS = 5000
+# Requested resolutions are rounded up to a multiple of this, so only a few variants are cached
+POINTS_STEP = 50
+
+
+def chart_points(requested, default=1000):
+    """Return the number of chart points to serve for a requested resolution."""
+    try:
+        points = int(requested) if requested else default
+    except ValueError:
+        raise ValueError("points must be an integer")
+    points = min(max(points, MIN_POINTS), MAX_POINTS)
+    return -(-points // POINTS_STEP) * POINTS_STEP
+
+
+def lttb(x, y, threshold):
+    """
+    Return the indices of the points that Largest-Triangle-Three-Buckets keeps.
+
+    ``x`` must be sorted. The first and last points are always kept; the
+    points in between are split into ``threshold - 2`` buckets and from
+    each bucket the point forming the largest triangle with the point kept
+    from the previous bucket and the average of the next bucket is kept.
+    Bucket averages come from prefix sums and each bucket's triangle areas
+    are computed in one NumPy operation.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    every = (n - 2) / (threshold - 2)
+    edges = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+    starts, ends = edges[:-1], edges[1:]
+
+    sum_x = np.concatenate(([0.0], np.cumsum(x)))
+    sum_y = np.concatenate(([0.0], np.cumsum(y)))
+    counts = ends - starts
+    avg_x = (sum_x[ends] - sum_x[starts]) / counts
+    avg_y = (sum_y[ends] - sum_y[starts]) / counts
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = starts[i], ends[i]
+        areas = np.abs(
+            (x[a] - next_x[i]) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (next_y[i] - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+def usage_series(rows):
+    """
+    Return the chart series of normalized history ``rows`` (newest first) as arrays, oldest first.
+
+    Rows without a creation time cannot be placed on the time axis and are left out.
+    """
+    dated = [row for row in reversed(rows) if row.get("created_at")]
+    created_at = np.array([row["created_at"] for row in dated], dtype=object)
+    seconds = np.array([value.rstrip("Z") for value in created_at], dtype="datetime64[s]").astype(np.int64)
+    acus_used = np.array([row.get("acus_used") or 0 for row in dated], dtype=np.float64)
+    return created_at, seconds, acus_used
+
+
+def downsample_series(series, points):
+    """Return the ``usage_series`` arrays reduced to at most ``points`` points, as chart columns."""
+    created_at, seconds, acus_used = series
+    keep = lttb(seconds, acus_used, points)
+    return {
+        "created_at": created_at[keep].tolist(),
+        "acus_used": acus_used[keep].tolist(),
+        "total_points": len(created_at),
+        "points": points,
+    }
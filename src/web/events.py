@@ -0,0 +1,157 @@
+"""
+Server-Sent Events for new snapshots and scrape job progress.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Fields of a job that are pushed to every client; details stay behind the admin-only job endpoint
+PUBLIC_JOB_FIELDS = ("id", "status", "phase")
+
+
+class ChangeWatcher:
+    """
+    Watch the snapshot stores and the scrape job files for changes.
+
+    One background thread per process polls ``get_versions()`` (a dict of
+    store name to store version) and the job files in ``jobs_dir`` every
+    ``interval`` seconds, and only while at least one client is subscribed.
+    Because it watches the shared data directory, it also sees snapshots
+    written by a scheduler running in another container.
+    """
+
+    def __init__(self, get_versions, jobs_dir, interval=2.0):
+        self.get_versions = get_versions
+        self.jobs_dir = jobs_dir
+        self.interval = interval
+        self._condition = threading.Condition()
+        self._events = []
+        self._sequence = 0
+        self._subscribers = 0
+        self._thread = None
+        self._versions = None
+        self._job_mtimes = None
+        self.closed = False
+
+    def _job_files(self):
+        try:
+            return {
+                entry.name: entry.stat().st_mtime_ns
+                for entry in os.scandir(self.jobs_dir) if entry.name.endswith(".json")
+            }
+        except FileNotFoundError:
+            return {}
+
+    def _read_job(self, name):
+        try:
+            with open(os.path.join(self.jobs_dir, name), 'r') as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return {field: job.get(field) for field in PUBLIC_JOB_FIELDS}
+
+    def poll(self):
+        """Check for changes once and return the events they produce."""
+        events = []
+
+        versions = self.get_versions()
+        if self._versions is not None:
+            for name, version in versions.items():
+                if self._versions.get(name) != version:
+                    events.append(("snapshot", {"org_id": name}))
+        self._versions = versions
+
+        job_mtimes = self._job_files()
+        if self._job_mtimes is not None:
+            for name, mtime in job_mtimes.items():
+                if self._job_mtimes.get(name) != mtime:
+                    job = self._read_job(name)
+                    if job:
+                        events.append(("job", job))
+        self._job_mtimes = job_mtimes
+
+        return events
+
+    def _run(self):
+        while True:
+            try:
+                events = self.poll()
+            except Exception as e:
+                logger.warning(f"Could not check for changes: {str(e)}")
+                events = []
+            with self._condition:
+                if events:
+                    self._sequence += len(events)
+                    self._events = (self._events + events)[-100:]
+                    self._condition.notify_all()
+                if self._subscribers == 0:
+                    self._thread = None
+                    self._versions = None
+                    self._job_mtimes = None
+                    return
+            time.sleep(self.interval)
+
+    def subscribe(self):
+        """Register a client; returns the sequence number to pass to ``wait``."""
+        with self._condition:
+            self._subscribers += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="change-watcher", daemon=True)
+                self._thread.start()
+            return self._sequence
+
+    def unsubscribe(self):
+        with self._condition:
+            self._subscribers -= 1
+
+    def close(self):
+        """End every open stream, e.g. when the server shuts down, so it need not wait for them."""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def wait(self, sequence, timeout):
+        """
+        Wait up to ``timeout`` seconds for events after ``sequence``.
+
+        Returns the new sequence number and the events; a client that fell
+        too far behind gets a single catch-all snapshot event.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._sequence > sequence or self.closed, timeout=timeout)
+            missed = self._sequence - sequence
+            if missed > len(self._events):
+                return self._sequence, [("snapshot", {"org_id": None})]
+            return self._sequence, self._events[len(self._events) - missed:] if missed else []
+
+
+def format_event(event, data):
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def event_stream(watcher, heartbeat=15.0, retry_ms=5000):
+    """
+    Yield the Server-Sent Events stream for one client.
+
+    A comment line is sent every ``heartbeat`` seconds without events, so
+    proxies keep the connection open and dead clients are noticed. The
+    stream ends when the watcher is closed; clients then reconnect after
+    ``retry_ms``.
+    """
+    sequence = watcher.subscribe()
+    try:
+        yield f"retry: {retry_ms}\n\n"
+        while not watcher.closed:
+            sequence, events = watcher.wait(sequence, heartbeat)
+            if events:
+                yield "".join(format_event(event, data) for event, data in events)
+            elif not watcher.closed:
+                yield ": heartbeat\n\n"
+    finally:
+        watcher.unsubscribe()
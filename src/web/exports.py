@@ -0,0 +1,119 @@
+"""
+Streaming exports of snapshots and session rows as CSV, NDJSON and Parquet.
+"""
+
+import io
+import csv
+import json
+import tempfile
+from src.storage.normalize import normalize_snapshot
+from src.web.pagination import row_matches
+
+SNAPSHOT_COLUMNS = ("timestamp", "available_acus", "sessions")
+SESSION_COLUMNS = ("session_name", "created_at", "acus_used")
+DATASETS = {"snapshots": SNAPSHOT_COLUMNS, "sessions": SESSION_COLUMNS}
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Rows serialized before a chunk is handed to the response
+CHUNK_ROWS = 500
+# Rows per Parquet row group
+ROW_GROUP_ROWS = 10000
+
+
+def iter_snapshot_records(store, filters):
+    """Yield one record per snapshot in ``store``, oldest first, within the date range of ``filters``."""
+    since = filters.get("since")
+    until = filters.get("until")
+    for snapshot in store.iter_snapshots():
+        snapshot = normalize_snapshot(snapshot)
+        timestamp = snapshot.get("timestamp") or ""
+        if since and timestamp < since:
+            continue
+        if until and timestamp > until:
+            break
+        yield {
+            "timestamp": snapshot.get("timestamp"),
+            "available_acus": (snapshot.get("current_usage") or {}).get("available_acus"),
+            "sessions": len(snapshot.get("usage_history") or []),
+        }
+
+
+def iter_session_records(rows, filters):
+    """Yield the normalized history ``rows`` that pass ``filters``, newest first."""
+    for row in rows:
+        if row_matches(row, filters):
+            yield {column: row.get(column) for column in SESSION_COLUMNS}
+
+
+def _batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_csv(records, columns):
+    """Yield CSV text in chunks, starting with a header row."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    for batch in _batches(records, CHUNK_ROWS):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_ndjson(records):
+    """Yield newline-delimited JSON in chunks."""
+    for batch in _batches(records, CHUNK_ROWS):
+        yield "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch)
+
+
+def stream_parquet(records, columns, chunk_size=64 * 1024):
+    """
+    Write ``records`` to a Parquet file one row group at a time and yield its bytes.
+
+    Each row group goes through a pandas DataFrame with typed columns, so
+    memory is bounded by ROW_GROUP_ROWS rather than the number of records.
+    The file is spooled to disk because the Parquet footer is only known at
+    the end. Requires pyarrow.
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    fields = {
+        "timestamp": pa.timestamp("s", tz="UTC"),
+        "created_at": pa.timestamp("s", tz="UTC"),
+        "available_acus": pa.float64(),
+        "acus_used": pa.float64(),
+        "sessions": pa.int64(),
+        "session_name": pa.string(),
+    }
+    schema = pa.schema([(column, fields[column]) for column in columns])
+
+    with tempfile.TemporaryFile() as f:
+        with pq.ParquetWriter(f, schema) as writer:
+            for batch in _batches(records, ROW_GROUP_ROWS):
+                df = pd.DataFrame.from_records(batch, columns=columns)
+                for column in columns:
+                    if pa.types.is_timestamp(fields[column]):
+                        df[column] = pd.to_datetime(df[column], utc=True).astype("datetime64[s, UTC]")
+                writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+        f.seek(0)
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
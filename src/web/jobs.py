@@ -0,0 +1,262 @@
+"""
+Background runner for manually triggered scrape jobs.
+"""
+
+import os
+import copy
+import json
+import uuid
+import atexit
+import socket
+import logging
+import threading
+from datetime import datetime
+from src.storage.locking import file_lock
+from src.storage.segments import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# ID of the job in flight across all web workers, next to the job files;
+# not a .json file, so it is never taken for a job
+ACTIVE_FILE = ".active"
+
+
+class ScrapeJobRunner:
+    """
+    Run scrapes in a background thread and track their progress.
+
+    ``scrape(username, confirmation_code, progress, org_id)`` performs one
+    scrape of the organization ``org_id`` (None for the default store) and
+    returns True on success; ``progress(phase)`` is called as each phase
+    starts. Only one job runs at a time, across all worker processes: a
+    trigger for the same organization that arrives while a job is queued or
+    running is merged into it and gets the same job ID, and a trigger for
+    another organization is refused until it finishes. The ID of that job is kept in ``.active``
+    under ``jobs_dir``, guarded by a file lock. Credentials are handed to
+    that job only and never written anywhere. Job state is persisted as
+    JSON under ``jobs_dir`` so any web worker can report it.
+
+    Job threads do not keep a stopping worker alive. A job whose process
+    exits is marked failed on the way out, or, if the process was killed,
+    by ``recover`` the next time a worker starts or looks at it. A running
+    job's ``updated_at`` is refreshed at least every fifth of
+    ``stale_seconds``; a job not updated for ``stale_seconds`` counts as
+    interrupted, since its process may have been on another host (e.g. a
+    container that was killed and recreated under a new hostname).
+    """
+
+    def __init__(self, jobs_dir, scrape, keep_jobs=50, stale_seconds=300):
+        self.jobs_dir = jobs_dir
+        self.scrape = scrape
+        self.keep_jobs = keep_jobs
+        self.stale_seconds = stale_seconds
+        self.host = socket.gethostname()
+        self._lock = threading.Lock()
+        self._active = None
+        atexit.register(self.interrupt)
+        self.recover()
+
+    def _job_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _active_path(self):
+        return os.path.join(self.jobs_dir, ACTIVE_FILE)
+
+    def _save(self, job):
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        write_json_atomic(self._job_path(job["id"]), job)
+
+    def _load(self, job_id):
+        if not isinstance(job_id, str) or not job_id.isalnum():
+            return None
+        try:
+            with open(self._job_path(job_id), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _stale(self, job):
+        """Whether ``job`` has not been updated for ``stale_seconds``."""
+        try:
+            updated_at = datetime.fromisoformat(job.get("updated_at") or job["created_at"])
+        except (KeyError, TypeError, ValueError):
+            return True
+        return (datetime.now() - updated_at).total_seconds() > self.stale_seconds
+
+    def _owner_alive(self, job):
+        """
+        Whether the process running ``job`` still exists.
+
+        Jobs of other hosts are assumed alive until they go stale.
+        """
+        pid = job.get("pid")
+        if job.get("host") == self.host and pid == os.getpid():
+            return self._active is not None and self._active["id"] == job["id"]
+        if self._stale(job):
+            return False
+        if job.get("host") != self.host:
+            return job.get("host") is not None
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except (PermissionError, TypeError):
+            return pid is not None
+        return True
+
+    def _fail_orphan(self, job):
+        """Mark ``job`` failed if it is still active but its process is gone; returns the job."""
+        if job is not None and job["status"] in ACTIVE_STATUSES and not self._owner_alive(job):
+            logger.warning(f"Scrape job {job['id']} was interrupted, marking it failed")
+            job.update(
+                status="failed",
+                finished_at=datetime.now().isoformat(),
+                error="Interrupted: the web worker running it stopped"
+            )
+            self._save(job)
+        return job
+
+    def recover(self):
+        """Mark jobs left queued or running by processes that no longer exist as failed."""
+        try:
+            names = [name for name in os.listdir(self.jobs_dir) if name.endswith(".json")]
+        except FileNotFoundError:
+            return
+        with self._lock:
+            for name in names:
+                self._fail_orphan(self._load(name[:-len(".json")]))
+
+    def interrupt(self):
+        """Mark this process's job failed when the process exits while it runs."""
+        with self._lock:
+            job = self._active
+            if job is None or job["status"] not in ACTIVE_STATUSES:
+                return
+            job.update(
+                status="failed",
+                finished_at=datetime.now().isoformat(),
+                error="Interrupted: the web worker running it stopped"
+            )
+            try:
+                self._save(job)
+            except OSError as e:
+                logger.warning(f"Could not save interrupted scrape job {job['id']}: {str(e)}")
+
+    def _prune(self):
+        """Delete the oldest job files beyond ``keep_jobs``."""
+        try:
+            names = sorted(
+                (name for name in os.listdir(self.jobs_dir) if name.endswith(".json")),
+                key=lambda name: os.path.getmtime(os.path.join(self.jobs_dir, name))
+            )
+        except FileNotFoundError:
+            return
+        for name in names[:-self.keep_jobs]:
+            try:
+                os.remove(os.path.join(self.jobs_dir, name))
+            except OSError:
+                pass
+
+    def submit(self, username, confirmation_code, requested_by=None, org_id=None):
+        """
+        Start a scrape job, or return the one already in flight in any worker.
+
+        Raises RuntimeError if the job in flight scrapes another organization.
+        """
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        with self._lock, file_lock(self._active_path() + ".lock"):
+            try:
+                with open(self._active_path(), 'r') as f:
+                    active = self._fail_orphan(self._load(json.load(f)))
+            except (FileNotFoundError, ValueError):
+                active = None
+            if active is not None and active["status"] in ACTIVE_STATUSES:
+                if active.get("org_id") != org_id:
+                    raise RuntimeError(
+                        f"A scrape of {active.get('org_id') or 'the default account'} is already in progress"
+                    )
+                logger.info(f"Merging scrape request into in-flight job {active['id']}")
+                return active
+
+            now = datetime.now().isoformat()
+            job = {
+                "id": uuid.uuid4().hex,
+                "status": "queued",
+                "requested_by": requested_by,
+                "org_id": org_id,
+                "created_at": now,
+                "updated_at": now,
+                "started_at": None,
+                "finished_at": None,
+                "phase": None,
+                "phases": [],
+                "error": None,
+                "host": self.host,
+                "pid": os.getpid(),
+            }
+            self._active = job
+            self._save(job)
+            write_json_atomic(self._active_path(), job["id"])
+
+        thread = threading.Thread(
+            target=self._run, args=(job, username, confirmation_code, org_id),
+            name=f"scrape-job-{job['id']}", daemon=True
+        )
+        thread.start()
+        return copy.deepcopy(job)
+
+    def _update(self, job, **changes):
+        with self._lock:
+            job.update(changes, updated_at=datetime.now().isoformat())
+            self._save(job)
+
+    def _heartbeat(self, job, done):
+        """Refresh ``updated_at`` of ``job`` until ``done`` is set, so other workers see it is alive."""
+        while not done.wait(self.stale_seconds / 5):
+            try:
+                self._update(job)
+            except OSError as e:
+                logger.warning(f"Could not update scrape job {job['id']}: {str(e)}")
+
+    def _progress(self, job, phase):
+        now = datetime.now().isoformat()
+        with self._lock:
+            job["updated_at"] = now
+            if job["phases"]:
+                job["phases"][-1]["finished_at"] = now
+            job["phases"].append({"name": phase, "started_at": now, "finished_at": None})
+            job["phase"] = phase
+            self._save(job)
+
+    def _run(self, job, username, confirmation_code, org_id=None):
+        self._update(job, status="running", started_at=datetime.now().isoformat())
+        done = threading.Event()
+        threading.Thread(
+            target=self._heartbeat, args=(job, done), name=f"scrape-job-heartbeat-{job['id']}", daemon=True
+        ).start()
+        try:
+            success = self.scrape(username, confirmation_code, lambda phase: self._progress(job, phase), org_id)
+            error = None if success else "Scraper failed to run"
+        except Exception as e:
+            logger.error(f"Scrape job {job['id']} failed: {str(e)}")
+            success, error = False, str(e)
+        finally:
+            done.set()
+
+        now = datetime.now().isoformat()
+        with self._lock:
+            if job["phases"] and job["phases"][-1]["finished_at"] is None:
+                job["phases"][-1]["finished_at"] = now
+            job.update(status="succeeded" if success else "failed", finished_at=now, updated_at=now,
+                       error=error)
+            self._save(job)
+        self._prune()
+
+    def get(self, job_id):
+        """Return the state of a job, or None if it is unknown."""
+        with self._lock:
+            if self._active is not None and self._active["id"] == job_id:
+                return copy.deepcopy(self._active)
+            return self._fail_orphan(self._load(job_id))
@@ -0,0 +1,177 @@
+"""
+Cursor pagination and filtering of the usage history and snapshot lists.
+"""
+
+import json
+import base64
+from src.storage.history import row_keys
+from src.storage.normalize import parse_acus, parse_timestamp
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def encode_cursor(value):
+    """Encode a position as an opaque, URL-safe cursor."""
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decode a cursor made by ``encode_cursor``; raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+def parse_limit(args):
+    """Return the ``limit`` query parameter, between 1 and MAX_LIMIT."""
+    try:
+        limit = int(args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_LIMIT)
+
+
+def parse_filters(args):
+    """
+    Return the filters given as query parameters.
+
+    ``since`` and ``until`` are dates or timestamps (inclusive; a bare
+    ``until`` date covers that whole day), ``session`` is a session-name
+    prefix and ``min_acus`` a minimum number of ACUs used. Raises ValueError
+    for values that cannot be parsed.
+    """
+    filters = {}
+    for name in ("since", "until"):
+        value = args.get(name)
+        if not value:
+            continue
+        if name == "until" and len(value) == 10:
+            value += "T23:59:59"
+        parsed = parse_timestamp(value)
+        if parsed is None:
+            raise ValueError(f"{name} must be an ISO-8601 date or timestamp")
+        filters[name] = parsed
+    if args.get("session"):
+        filters["session"] = args["session"]
+    if args.get("min_acus"):
+        min_acus = parse_acus(args["min_acus"])
+        if min_acus is None:
+            raise ValueError("min_acus must be a number")
+        filters["min_acus"] = min_acus
+    return filters
+
+
+def row_matches(row, filters):
+    """Return whether a normalized history row passes ``filters``."""
+    created_at = row.get("created_at")
+    if filters.get("since") and (not created_at or created_at < filters["since"]):
+        return False
+    if filters.get("until") and (not created_at or created_at > filters["until"]):
+        return False
+    if filters.get("session") and not (row.get("session_name") or "").startswith(filters["session"]):
+        return False
+    min_acus = filters.get("min_acus")
+    if min_acus is not None and (row.get("acus_used") is None or row["acus_used"] < min_acus):
+        return False
+    return True
+
+
+def page_history(rows, filters, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Return one page of the normalized history ``rows`` (sorted newest first) and the next cursor.
+
+    The cursor names the last row returned, so pages do not shift when new
+    sessions are added in between. Because the rows are sorted by
+    ``created_at``, a ``since`` filter ends the scan early.
+    """
+    keys = row_keys(rows)
+    start = 0
+    if cursor is not None:
+        after = decode_cursor(cursor)
+        if not isinstance(after, list) or len(after) != 3:
+            raise ValueError("invalid cursor")
+        after = tuple(after)
+        positions = {key: i for i, key in enumerate(keys)}
+        if after in positions:
+            start = positions[after] + 1
+        else:
+            # The row has gone; continue with the first row older than it
+            start = next(
+                (i for i, row in enumerate(rows) if row.get("created_at") and after[1] and row["created_at"] < after[1]),
+                len(rows)
+            )
+
+    since = filters.get("since")
+
+    page = []
+    next_cursor = None
+    last_key = None
+    for i in range(start, len(rows)):
+        row = rows[i]
+        if since and row.get("created_at") and row["created_at"] < since:
+            break
+        if not row_matches(row, filters):
+            continue
+        if len(page) == limit:
+            next_cursor = encode_cursor(list(last_key))
+            break
+        page.append(row)
+        last_key = keys[i]
+
+    return page, next_cursor
+
+
+def page_snapshots(snapshots, filters, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Return one page of ``snapshots`` (oldest first, as stored), newest first, and the next cursor.
+
+    The cursor names the timestamp of the last snapshot returned and how
+    many snapshots with that timestamp have been returned so far, so pages
+    neither skip nor repeat snapshots when new ones are appended or when
+    compaction drops old ones in between.
+    """
+    after = None
+    if cursor is not None:
+        after = decode_cursor(cursor)
+        if not (isinstance(after, list) and len(after) == 2
+                and isinstance(after[0], str) and isinstance(after[1], int)):
+            raise ValueError("invalid cursor")
+
+    since = filters.get("since")
+    until = filters.get("until")
+
+    page = []
+    next_cursor = None
+    last_timestamp = None
+    same_timestamp = 0
+    skipped = 0
+    for i in range(len(snapshots) - 1, -1, -1):
+        timestamp = snapshots[i].get("timestamp") or ""
+        if after is not None:
+            if timestamp > after[0]:
+                continue
+            if timestamp == after[0] and skipped < after[1]:
+                skipped += 1
+                continue
+        if since and timestamp < since:
+            break
+        if until and timestamp > until:
+            continue
+        if len(page) == limit:
+            next_cursor = encode_cursor([last_timestamp, same_timestamp])
+            break
+        page.append(snapshots[i])
+        if timestamp == last_timestamp:
+            same_timestamp += 1
+        elif after is not None and timestamp == after[0]:
+            same_timestamp = after[1] + 1
+        else:
+            same_timestamp = 1
+        last_timestamp = timestamp
+
+    return page, next_cursor
@@ -0,0 +1,111 @@
+"""
+Download the third-party static assets served from ``static/vendor``.
+
+Every file is checked against its SHA-256 in ``static/vendor/SHA256SUMS``
+(``sha256sum`` format), so a changed or tampered download is never served.
+The files and the checksums are meant to be committed; the Docker build
+runs this module to verify them and to download any that are missing.
+
+Usage:
+    python -m src.web.vendor [--static-dir static] [--pin]
+
+``--pin`` records the checksum of assets that are not pinned yet, after
+downloading them (review the file before committing the new checksum).
+"""
+
+import os
+import sys
+import hashlib
+import logging
+import argparse
+
+logger = logging.getLogger(__name__)
+
+# Path under the static folder: pinned release it is downloaded from
+VENDOR_ASSETS = {
+    "vendor/chart.umd.js": "https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.js",
+}
+CHECKSUMS_FILE = os.path.join("vendor", "SHA256SUMS")
+
+
+def read_checksums(static_dir):
+    """Return the pinned checksums, keyed by path under the static folder."""
+    checksums = {}
+    try:
+        with open(os.path.join(static_dir, CHECKSUMS_FILE), 'r') as f:
+            for line in f:
+                if line.strip():
+                    digest, name = line.split(maxsplit=1)
+                    checksums[os.path.join("vendor", name.strip().lstrip("*"))] = digest
+    except FileNotFoundError:
+        pass
+    return checksums
+
+
+def write_checksums(static_dir, checksums):
+    path = os.path.join(static_dir, CHECKSUMS_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        for filename, digest in sorted(checksums.items()):
+            f.write(f"{digest}  {os.path.relpath(filename, 'vendor')}\n")
+
+
+def sha256_file(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def vendor_assets(static_dir="static", pin=False):
+    """
+    Make sure every vendored asset is present and matches its pinned checksum.
+
+    Missing files are downloaded. Returns False if a file does not match, or
+    is not pinned and ``pin`` is not set; such downloads are removed again.
+    """
+    checksums = read_checksums(static_dir)
+    ok = True
+    for filename, url in VENDOR_ASSETS.items():
+        path = os.path.join(static_dir, filename)
+        downloaded = False
+        if not os.path.exists(path):
+            import requests
+
+            logger.info(f"Downloading {url}")
+            response = requests.get(url, timeout=60)
+            response.raise_for_status()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(response.content)
+            downloaded = True
+
+        digest = sha256_file(path)
+        expected = checksums.get(filename)
+        if expected is None and pin:
+            checksums[filename] = digest
+            logger.info(f"Pinned {filename}: {digest}")
+        elif expected != digest:
+            if expected is None:
+                logger.error(f"{filename} has no pinned checksum; run with --pin and commit "
+                             f"{os.path.join(static_dir, CHECKSUMS_FILE)}")
+            else:
+                logger.error(f"{filename} does not match its pinned checksum {expected} (got {digest})")
+            if downloaded:
+                os.remove(path)
+            ok = False
+    if pin:
+        write_checksums(static_dir, checksums)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download and verify the vendored static assets.")
+    parser.add_argument("--static-dir", default="static", help="static folder of the web app (default: static)")
+    parser.add_argument("--pin", action="store_true", help="record the checksum of assets not pinned yet")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(0 if vendor_assets(args.static_dir, pin=args.pin) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@
 const availableACUsElement = document.querySelector('#available-acus .value');
 const lastUpdatedElement = document.getElementById('last-updated-time');
 const historyTableBody = document.querySelector('#history-table tbody');
+const historyFiltersForm = document.getElementById('history-filters');
+const historyLoadMoreBtn = document.getElementById('history-load-more');
 const usageChartCanvas = document.getElementById('usage-chart');
 const manualScrapeBtn = document.getElementById('manual-scrape-btn');
 const scrapeStatusElement = document.getElementById('scrape-status');
@@ -9,23 +11,28 @@ const scrapeStatusElement = document.getElementById('scrape-status');
 // Chart instance
 let usageChart;
 
+// Chart series currently shown (see /api/chart/usage)
+const CHART_POINTS_STEP = 50;
+let usageChartSeries = null;
+
+// API of the organization shown (/api, or /api/orgs/<id> with multiple accounts)
+const apiBase = window.apiBase || '/api';
+const orgId = window.orgId === undefined ? null : window.orgId;
+
+// Paging state of the history table
+const HISTORY_PAGE_SIZE = 50;
+let historyNextCursor = null;
+
 // Format date for display
 function formatDate(dateString) {
     const date = new Date(dateString);
     return date.toLocaleString();
 }
 
-// Format number with commas
+// Format number with commas (the API serves ACUs as numbers, or null if unknown)
 function formatNumber(num) {
-    if (isNaN(num)) return "Unknown";
-    return num.toString().replace(/\B(?=(\d{3})+(?!\d))/g, ",");
-}
-
-// Extract number from string
-function extractNumber(str) {
-    if (!str) return NaN;
-    const match = str.toString().match(/\d+/);
-    return match ? parseInt(match[0], 10) : NaN;
+    if (num === null || num === undefined || isNaN(num)) return "Unknown";
+    return num.toLocaleString('en-US', { maximumFractionDigits: 2 });
 }
 
 // Update the current usage display
@@ -36,25 +43,25 @@ function updateCurrentUsage(data) {
         return;
     }
     
-    // Extract available ACUs value
-    const availableACUs = extractNumber(data.available_acus);
-    
     // Update the display
-    availableACUsElement.textContent = formatNumber(availableACUs);
+    availableACUsElement.textContent = formatNumber(data.available_acus);
     lastUpdatedElement.textContent = formatDate(data.timestamp);
 }
 
-// Update the history table
-function updateHistoryTable(historyData) {
-    historyTableBody.innerHTML = '';
+// Update the history table; with append, rows are added below the ones already shown
+function updateHistoryTable(historyData, append = false) {
+    if (!append) {
+        historyTableBody.innerHTML = '';
+    }
     
-    if (!historyData || historyData.length === 0) {
+    if (!append && (!historyData || historyData.length === 0)) {
         const row = document.createElement('tr');
         row.innerHTML = '<td colspan="3" class="loading-message">No history data available</td>';
         historyTableBody.appendChild(row);
         return;
     }
     
+    const fragment = document.createDocumentFragment();
     historyData.forEach(item => {
         const row = document.createElement('tr');
         
@@ -62,42 +69,66 @@ function updateHistoryTable(historyData) {
         sessionCell.textContent = item.session_name || 'Unknown';
         
         const createdAtCell = document.createElement('td');
-        createdAtCell.textContent = item.created_at || 'Unknown';
+        createdAtCell.textContent = item.created_at ? formatDate(item.created_at) : (item.created_at_text || 'Unknown');
         
         const acusUsedCell = document.createElement('td');
-        acusUsedCell.textContent = item.acus_used || 'Unknown';
+        acusUsedCell.textContent = formatNumber(item.acus_used);
         
         row.appendChild(sessionCell);
         row.appendChild(createdAtCell);
         row.appendChild(acusUsedCell);
         
-        historyTableBody.appendChild(row);
+        fragment.appendChild(row);
     });
+    historyTableBody.appendChild(fragment);
 }
 
-// Create or update the usage history chart
-function updateUsageChart(historyData) {
-    if (!historyData || historyData.length === 0) {
-        return;
+// Number of chart points to request: one per pixel of canvas width, rounded like the server does
+function chartResolution() {
+    const width = usageChartCanvas.clientWidth || usageChartCanvas.parentElement.clientWidth || 1000;
+    return Math.max(CHART_POINTS_STEP, Math.ceil(width / CHART_POINTS_STEP) * CHART_POINTS_STEP);
+}
+
+// Whether a series fetched at the current canvas width would differ from the one shown
+function chartNeedsResolution(series) {
+    const wanted = chartResolution();
+    return series && wanted !== series.points && series.total_points > Math.min(wanted, series.points);
+}
+
+async function fetchUsageChart() {
+    try {
+        const response = await fetch(`${apiBase}/chart/usage?points=${chartResolution()}`);
+        const data = await response.json();
+        updateUsageChart(data);
+    } catch (error) {
+        console.error('Error fetching usage chart:', error);
     }
-    
-    historyData.sort((a, b) => {
-        return new Date(a.created_at) - new Date(b.created_at);
+}
+
+function setupChartResizing() {
+    let resizeTimer = null;
+    window.addEventListener('resize', () => {
+        clearTimeout(resizeTimer);
+        resizeTimer = setTimeout(() => {
+            if (chartNeedsResolution(usageChartSeries)) fetchUsageChart();
+        }, 300);
     });
+}
+
+// Create or update the usage history chart from columns of ACUs used per session, oldest first
+function updateUsageChart(series) {
+    usageChartSeries = series;
+    // Chart.js is not served until it has been vendored (python -m src.web.vendor)
+    if (!series || series.created_at.length === 0 || typeof Chart === 'undefined') {
+        return;
+    }
     
     // Prepare data for the chart
-    const labels = historyData.map(item => {
-        try {
-            const date = new Date(item.created_at);
-            return date.toLocaleDateString();
-        } catch (e) {
-            return item.created_at || 'Unknown';
-        }
+    const labels = series.created_at.map(createdAt => {
+        return createdAt ? new Date(createdAt).toLocaleDateString() : 'Unknown';
     });
     
-    const acusUsedValues = historyData.map(item => {
-        return extractNumber(item.acus_used) || 0;
-    });
+    const acusUsedValues = series.acus_used.map(value => value || 0);
     
     // Create or update the chart
     if (usageChart) {
@@ -153,26 +184,173 @@ function updateUsageChart(historyData) {
     }
 }
 
-// Fetch the latest credit data
-async function fetchLatestCreditData() {
+// Show the dashboard data: latest usage, first history page and chart series
+function applyBootstrap(data) {
+    updateCurrentUsage(data.latest);
+    updateUsageChart(data.chart);
+    // The bootstrap chart has the default resolution; refine it to the canvas width
+    if (chartNeedsResolution(data.chart)) fetchUsageChart();
+    
+    // The embedded page is unfiltered; with filters set, load the table separately
+    if (historyFiltersActive()) {
+        fetchHistoryPage();
+    } else {
+        historyNextCursor = data.history.next_cursor;
+        updateHistoryTable(data.history.items);
+        historyLoadMoreBtn.hidden = !historyNextCursor;
+    }
+}
+
+// Fetch everything the dashboard shows in one request
+async function fetchBootstrap() {
     try {
-        const response = await fetch('/api/latest-credit-data');
+        const response = await fetch(`${apiBase}/bootstrap`);
         const data = await response.json();
-        updateCurrentUsage(data);
+        applyBootstrap(data);
     } catch (error) {
-        console.error('Error fetching latest credit data:', error);
+        console.error('Error fetching dashboard data:', error);
         availableACUsElement.textContent = 'Error';
     }
 }
 
-async function fetchUsageHistory() {
+function historyFiltersActive() {
+    return historyFiltersForm && Array.from(new FormData(historyFiltersForm).values()).some(value => value);
+}
+
+// Load one page of the history table; with append, the page after the rows already shown
+async function fetchHistoryPage(append = false) {
+    const params = new URLSearchParams({ limit: HISTORY_PAGE_SIZE });
+    if (historyFiltersForm) {
+        new FormData(historyFiltersForm).forEach((value, key) => {
+            if (value) params.set(key, value);
+        });
+    }
+    if (append && historyNextCursor) {
+        params.set('cursor', historyNextCursor);
+    }
+    
     try {
-        const response = await fetch('/api/usage-history');
+        const response = await fetch(`${apiBase}/history?${params}`);
         const data = await response.json();
-        updateHistoryTable(data);
-        updateUsageChart(data);
+        if (!response.ok) {
+            throw new Error(data.error || response.statusText);
+        }
+        historyNextCursor = data.next_cursor;
+        updateHistoryTable(data.items, append);
+        historyLoadMoreBtn.hidden = !historyNextCursor;
     } catch (error) {
-        console.error('Error fetching usage history:', error);
+        console.error('Error fetching usage history page:', error);
+    }
+}
+
+function setupHistoryPaging() {
+    historyLoadMoreBtn.addEventListener('click', () => fetchHistoryPage(true));
+    historyFiltersForm.addEventListener('submit', event => {
+        event.preventDefault();
+        fetchHistoryPage();
+    });
+}
+
+const SCRAPE_PHASE_LABELS = {
+    driver_setup: 'Starting browser',
+    login: 'Logging in',
+    usage: 'Reading current usage',
+    history: 'Reading usage history',
+    save: 'Saving data'
+};
+
+// Live updates over Server-Sent Events; polling is only used while they are unavailable
+const FALLBACK_POLL_INTERVAL = 5 * 60 * 1000;
+let liveUpdatesConnected = false;
+let fallbackPollTimer = null;
+const jobUpdateWaiters = new Set();
+
+function refreshData() {
+    fetchBootstrap();
+}
+
+function startFallbackPolling() {
+    if (fallbackPollTimer === null) {
+        fallbackPollTimer = setInterval(refreshData, FALLBACK_POLL_INTERVAL);
+    }
+}
+
+function stopFallbackPolling() {
+    if (fallbackPollTimer !== null) {
+        clearInterval(fallbackPollTimer);
+        fallbackPollTimer = null;
+    }
+}
+
+// Resolve when a job event for jobId arrives, or after ms at the latest
+function waitForJobUpdate(jobId, ms) {
+    return new Promise(resolve => {
+        const waiter = job => {
+            if (job.id === jobId) finish();
+        };
+        const timer = setTimeout(finish, ms);
+        function finish() {
+            clearTimeout(timer);
+            jobUpdateWaiters.delete(waiter);
+            resolve();
+        }
+        jobUpdateWaiters.add(waiter);
+    });
+}
+
+function setupLiveUpdates() {
+    if (!window.EventSource) {
+        startFallbackPolling();
+        return;
+    }
+    
+    const source = new EventSource('/api/events');
+    let connectedBefore = false;
+    
+    source.addEventListener('open', () => {
+        liveUpdatesConnected = true;
+        stopFallbackPolling();
+        // Catch up on anything committed while the connection was down
+        if (connectedBefore) refreshData();
+        connectedBefore = true;
+    });
+    
+    source.addEventListener('error', () => {
+        // EventSource reconnects on its own; poll until it does
+        liveUpdatesConnected = false;
+        startFallbackPolling();
+    });
+    
+    source.addEventListener('snapshot', event => {
+        const data = JSON.parse(event.data);
+        if (data.org_id === orgId) refreshData();
+    });
+    
+    source.addEventListener('job', event => {
+        const job = JSON.parse(event.data);
+        jobUpdateWaiters.forEach(waiter => waiter(job));
+    });
+}
+
+// Poll a scrape job until it finishes, showing its current phase
+async function pollScrapeJob(jobId) {
+    while (true) {
+        const response = await fetch(`/api/scrape-jobs/${jobId}`);
+        const result = await response.json();
+        
+        if (!result.success) {
+            throw new Error(result.error || 'Unknown error');
+        }
+        
+        const job = result.job;
+        if (job.status === 'succeeded' || job.status === 'failed') {
+            return job;
+        }
+        
+        const phase = SCRAPE_PHASE_LABELS[job.phase] || 'Waiting to start';
+        scrapeStatusElement.textContent = `Scraping in progress: ${phase}...`;
+        // Job events wake us up as soon as the phase changes; poll slowly in case one is missed
+        await waitForJobUpdate(jobId, liveUpdatesConnected ? 10000 : 2000);
     }
 }
 
@@ -185,22 +363,27 @@ function setupManualScrape() {
             scrapeStatusElement.textContent = 'Scraping in progress...';
             scrapeStatusElement.className = 'status-progress';
             
-            const response = await fetch('/api/run-scrape', {
+            const response = await fetch(`${apiBase}/run-scrape`, {
                 method: 'POST'
             });
             
             const result = await response.json();
             
-            if (result.success) {
+            if (!result.success) {
+                scrapeStatusElement.textContent = `Scrape failed: ${result.error || 'Unknown error'}`;
+                scrapeStatusElement.className = 'status-error';
+                return;
+            }
+            
+            const job = await pollScrapeJob(result.job_id);
+            
+            if (job.status === 'succeeded') {
                 scrapeStatusElement.textContent = 'Scrape completed successfully!';
                 scrapeStatusElement.className = 'status-success';
                 // Refresh data after successful scrape
-                setTimeout(() => {
-                    fetchLatestCreditData();
-                    fetchUsageHistory();
-                }, 1000);
+                setTimeout(refreshData, 1000);
             } else {
-                scrapeStatusElement.textContent = `Scrape failed: ${result.error || 'Unknown error'}`;
+                scrapeStatusElement.textContent = `Scrape failed: ${job.error || 'Unknown error'}`;
                 scrapeStatusElement.className = 'status-error';
             }
         } catch (error) {
@@ -219,16 +402,20 @@ function setupManualScrape() {
 
 // Initialize the application
 function init() {
-    fetchLatestCreditData();
-    fetchUsageHistory();
+    // The page is rendered with the current data embedded; only fetch it if that is missing
+    const bootstrapElement = document.getElementById('bootstrap-data');
+    if (bootstrapElement) {
+        applyBootstrap(JSON.parse(bootstrapElement.textContent));
+    } else {
+        refreshData();
+    }
     
     setupManualScrape();
+    setupHistoryPaging();
+    setupChartResizing();
     
-    // Refresh data every 5 minutes
-    setInterval(() => {
-        fetchLatestCreditData();
-        fetchUsageHistory();
-    }, 5 * 60 * 1000);
+    // New snapshots are pushed; polling every 5 minutes is only the fallback
+    setupLiveUpdates();
 }
 
 // Start the application when the DOM is loaded
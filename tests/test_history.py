@@ -0,0 +1,40 @@
+from src.storage.store import SnapshotStore
+
+
+def _row(name, acus):
+    return {"session_name": name, "created_at": "2025-01-01T00:00:00Z", "acus_used": acus}
+
+
+def test_compaction_keeps_references_increasing(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    sessions = [_row("a", 1.0)]
+    store.append({"timestamp": "2025-01-01T00:00:00Z", "usage_history": sessions})
+    # A failed history extraction stores no rows
+    store.append({"timestamp": "2025-01-02T00:00:00Z", "usage_history": []})
+    store.append({"timestamp": "2025-01-03T00:00:00Z", "usage_history": sessions})
+
+    # The kept first and last snapshots have the same history state
+    store.compact(lambda timestamps: {0, 2})
+    store.append({"timestamp": "2025-01-04T00:00:00Z", "usage_history": [_row("b", 2.0)] + sessions})
+
+    refs = [record["history_ref"] for record in store.log.iter_records()]
+    assert refs == sorted(refs) and len(set(refs)) == len(refs)
+
+    snapshots = store.load_all()
+    assert [s["timestamp"] for s in snapshots] == [
+        "2025-01-01T00:00:00Z", "2025-01-03T00:00:00Z", "2025-01-04T00:00:00Z"]
+    assert snapshots[0]["usage_history"] == sessions
+    assert snapshots[1]["usage_history"] == sessions
+    assert snapshots[2]["usage_history"] == [_row("b", 2.0)] + sessions
+    assert store.latest() == snapshots[2]
+
+
+def test_latest_matches_full_replay(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    rows = []
+    for i in range(20):
+        rows = [_row(f"s{i}", float(i))] + rows[:8]
+        store.append({"timestamp": f"2025-01-01T00:{i:02d}:00Z", "usage_history": rows})
+        assert store.latest()["usage_history"] == rows
+
+    assert [s["usage_history"] for s in store.load_all()][-1] == rows
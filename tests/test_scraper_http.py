@@ -0,0 +1,97 @@
+import pytest
+from benchmarks.standin import create_standin_app, StandinServer, seed_session, standin_session
+from src.scraper.scraper import DevinCreditScraper
+from src.storage.store import open_store
+
+ROWS = 25
+PAGE_SIZE = 10
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    app = create_standin_app(rows=ROWS, page_size=PAGE_SIZE)
+    app.config["history_requests"] = 0
+
+    @app.before_request
+    def count_history_requests():
+        from flask import request
+        if request.path == "/api/usage/history":
+            app.config["history_requests"] += 1
+
+    with StandinServer(app) as server:
+        for name, value in server.scraper_env().items():
+            monkeypatch.setenv(name, value)
+        monkeypatch.setenv("SCRAPER_FETCH_MODE", "http")
+        monkeypatch.setenv("SCRAPER_HISTORY_MODE", "incremental")
+        monkeypatch.setenv("SCRAPER_REUSE_SESSION", "true")
+        monkeypatch.setenv("STORAGE_BACKEND", "jsonl")
+        monkeypatch.setenv("METRICS_ENABLED", "false")
+        yield app, server
+
+
+def stored_names(data_dir):
+    return [row["session_name"] for row in open_store(data_dir).latest()["usage_history"]]
+
+
+def test_http_mode_stores_rows_and_stops_at_known_history(standin, tmp_path):
+    app, server = standin
+    data_dir = str(tmp_path)
+
+    scraper = DevinCreditScraper(data_dir=data_dir)
+    seed_session(scraper, server.server.host)
+    assert scraper.run()
+    assert app.config["history_requests"] == 3
+    latest = open_store(data_dir).latest()
+    assert latest["current_usage"]["available_acus"] == 12345
+    assert stored_names(data_dir) == [f"Session {ROWS - i}" for i in range(ROWS)]
+
+    # One new session on the first page: the second run stops there
+    app.config["rows"].insert(0, {"session_name": "Session new", "created_at": "2025-02-01 00:00",
+                                  "acus_used": "1.5"})
+    app.config["history_requests"] = 0
+    assert DevinCreditScraper(data_dir=data_dir).run()
+    assert app.config["history_requests"] == 1
+    assert stored_names(data_dir) == ["Session new"] + [f"Session {ROWS - i}" for i in range(ROWS)]
+
+
+def test_http_mode_logs_in_when_the_saved_session_is_rejected(standin, tmp_path, monkeypatch):
+    app, server = standin
+    scraper = DevinCreditScraper(data_dir=str(tmp_path))
+    seed_session(scraper, server.server.host, value="expired")
+
+    logins = []
+
+    def browser_login(client, timer, driver_pool=None):
+        # Stands in for the Chrome login, which hands a fresh session to the client
+        logins.append(True)
+        scraper.apply_session(client, standin_session(server.server.host))
+        return True
+
+    monkeypatch.setattr(scraper, "browser_login", browser_login)
+    assert scraper.run()
+    assert logins == [True]
+    assert len(stored_names(str(tmp_path))) == ROWS
+
+
+def test_http_mode_backfills_periodically(standin, tmp_path, monkeypatch):
+    app, server = standin
+    data_dir = str(tmp_path)
+    monkeypatch.setenv("SCRAPER_BACKFILL_EVERY_RUNS", "3")
+
+    scraper = DevinCreditScraper(data_dir=data_dir)
+    seed_session(scraper, server.server.host)
+    assert scraper.run()
+
+    # A session deleted upstream stays while runs are incremental...
+    deleted = app.config["rows"].pop()
+    for _ in range(2):
+        app.config["history_requests"] = 0
+        assert DevinCreditScraper(data_dir=data_dir).run()
+        assert app.config["history_requests"] == 1
+        assert deleted["session_name"] in stored_names(data_dir)
+
+    # ...and is dropped by the next full crawl
+    app.config["history_requests"] = 0
+    assert DevinCreditScraper(data_dir=data_dir).run()
+    assert app.config["history_requests"] == 3
+    assert deleted["session_name"] not in stored_names(data_dir)